@@ -0,0 +1,146 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Compares the file name dispatch of ChoseParser with the previous chained
+if-statements on 100k synthetic file names.
+
+    python benchmarks/bench_dispatch.py
+
+Runs with plain stand-in classes, which shows the dispatch overhead itself, and with
+the real Chose sections when nomad and baseclasses are installed, which also shows
+the cost of the sections the chained ifs build and throw away.
+'''
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chose_parser.dispatch import (  # noqa: E402
+    MeasurementDispatcher, attach_nothing, attach_data_file_list)
+
+SUFFIXES = [
+    'jv.txt', 'jv.csv', 'jvi.txt', 'eqe.txt', 'pl.txt', 'pli.dat', 'uvvis.csv',
+    'spv.txt', 'chose.txt']
+REPEAT = 15
+
+
+class Section:
+    def __init__(self):
+        self.data_file = None
+
+
+stand_ins = dict(
+    Measurement=type('Measurement', (Section,), {}),
+    JV=type('JV', (Section,), {}),
+    EQE=type('EQE', (Section,), {}),
+    SolarCellEQE=type('SolarCellEQE', (Section,), {}),
+    PL=type('PL', (Section,), {}),
+    UVvis=type('UVvis', (Section,), {}))
+
+
+def load_sections():
+    try:
+        from nomad.datamodel.metainfo.eln import SolarCellEQE
+        from chose_parser import schema
+    except ImportError:
+        return None
+    return dict(
+        Measurement=schema.Chose_Measurement,
+        JV=schema.Chose_JVmeasurement,
+        EQE=schema.Chose_EQEmeasurement,
+        SolarCellEQE=SolarCellEQE,
+        PL=schema.Chose_PLmeasurement,
+        UVvis=schema.Chose_UVvismeasurement)
+
+
+def legacy_create_entry(file_name, c):
+    mainfile_split = file_name.split('.')
+    entry = c['Measurement']()
+    if mainfile_split[-1] == "txt" and mainfile_split[-2] == "jv":
+        entry = c['JV']()
+    if mainfile_split[-1] == "txt" and mainfile_split[-2] == "eqe":
+        sc_eqe = c['SolarCellEQE']()
+        sc_eqe.eqe_data_file = file_name
+        entry = c['EQE']()
+        entry.eqe_data = [sc_eqe]
+    if mainfile_split[-2] == "pl":
+        entry = c['PL']()
+    if mainfile_split[-2] == "uvvis":
+        entry = c['UVvis']()
+        entry.data_file = [file_name]
+    if not mainfile_split[-2] == "eqe" and not mainfile_split[-2] == "uvvis":
+        entry.data_file = file_name
+    return entry
+
+
+def create_dispatcher(c):
+    dispatcher = MeasurementDispatcher()
+    dispatcher.register_default()(lambda file_name: c['Measurement']())
+    dispatcher.register('jv', 'txt')(lambda file_name: c['JV']())
+
+    @dispatcher.register('eqe', 'txt', attach=attach_nothing)
+    def create_eqe_entry(file_name):
+        sc_eqe = c['SolarCellEQE']()
+        sc_eqe.eqe_data_file = file_name
+        entry = c['EQE']()
+        entry.eqe_data = [sc_eqe]
+        return entry
+
+    dispatcher.register('pl')(lambda file_name: c['PL']())
+    dispatcher.register('uvvis', attach=attach_data_file_list)(lambda file_name: c['UVvis']())
+    return dispatcher
+
+
+def run(label, file_names, c):
+    dispatcher = create_dispatcher(c)
+
+    for file_name in file_names[:1000]:
+        legacy, current = legacy_create_entry(file_name, c), dispatcher.create_entry(file_name)
+        assert type(legacy) is type(current)
+        assert legacy.data_file == current.data_file
+
+    # the repeats alternate, so that both see the same load of the machine
+    legacy, current = [], []
+    for _ in range(REPEAT):
+        legacy.append(timeit.timeit(
+            lambda: [legacy_create_entry(file_name, c) for file_name in file_names], number=1))
+        current.append(timeit.timeit(
+            lambda: [dispatcher.create_entry(file_name) for file_name in file_names], number=1))
+    legacy, current = min(legacy), min(current)
+    print(
+        f'{label:<12} {len(file_names)} file names  chained ifs {legacy * 1e3:9.2f} ms  '
+        f'dispatcher {current * 1e3:9.2f} ms')
+
+
+def main(n=100000):
+    random.seed(0)
+    file_names = [
+        f'HZB_S{i}.note{i % 7}.{random.choice(SUFFIXES)}' for i in range(n)]
+
+    run('stand-ins', file_names, stand_ins)
+    sections = load_sections()
+    if sections is not None:
+        run('sections', file_names, sections)
+
+
+if __name__ == '__main__':
+    main()
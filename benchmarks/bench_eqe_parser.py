@@ -0,0 +1,89 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Compares the eqe_parser with the generic path of SolarCellEQE, i.e. nomad's
+EQEAnalyzer with header_lines=9, which reads and analyzes the file. Without nomad the
+generic path is approximated by its pandas read of the file, which is then compared
+with the read of the eqe_parser only, the analysis is reported separately.
+
+    python benchmarks/bench_eqe_parser.py
+'''
+
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import write_eqe_file  # noqa: E402
+from chose_parser.eqe_parser import analyze_eqe, get_eqe_data  # noqa: E402
+
+
+def generic_path():
+    # (label, function of the path, whether it includes the analysis)
+    try:
+        from nomad.datamodel.metainfo.eln.perovskite_solar_cell_database.eqe_parser import (
+            EQEAnalyzer)
+    except ImportError:
+        import pandas as pd
+
+        def pandas_read(path):
+            df = pd.read_csv(path, header=9, sep='\t')
+            return df.iloc[:, 0].to_numpy(), df.iloc[:, 1].to_numpy()
+        return 'pandas read', pandas_read, False
+
+    def eqe_analyzer(path):
+        return EQEAnalyzer(path, header_lines=9).eqe_dict()
+    return 'EQEAnalyzer', eqe_analyzer, True
+
+
+def eqe_parser(path):
+    eqe_dict = get_eqe_data(path)
+    return analyze_eqe(eqe_dict['wavelength'], eqe_dict['eqe'])
+
+
+def best(functions, repeat):
+    # the repeats alternate, so that all functions see the same load of the machine
+    times = [[] for _ in functions]
+    for _ in range(repeat):
+        for function, function_times in zip(functions, times):
+            function_times.append(timeit.timeit(function, number=1))
+    return [min(function_times) for function_times in times]
+
+
+def main(repeat=15):
+    name, generic, with_analysis = generic_path()
+    current = eqe_parser if with_analysis else get_eqe_data
+    current_name = 'eqe_parser' if with_analysis else 'eqe_parser read'
+    with tempfile.TemporaryDirectory() as directory:
+        for points in (100, 1000, 10000):
+            path = write_eqe_file(os.path.join(directory, f'bench_{points}.eqe.txt'), points)
+            eqe_dict = get_eqe_data(path)
+            legacy, new, analysis = best([
+                lambda: generic(path), lambda: current(path),
+                lambda: analyze_eqe(eqe_dict['wavelength'], eqe_dict['eqe'])], repeat)
+            print(
+                f'points={points:>6}  {name} {legacy * 1e3:8.2f} ms  '
+                f'{current_name} {new * 1e3:8.2f} ms  speedup {legacy / new:5.1f}x  '
+                f'analysis {analysis * 1e3:6.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Measures the import time of the package and its modules with `python -X importtime`
+in fresh processes and fails if a module exceeds its budget or pulls in a dependency
+it must not load. Modules whose dependencies are not installed are skipped. The own
+time of chose_parser.schema, without its imports, is the cost of creating and
+registering the section definitions at worker startup.
+
+    python benchmarks/bench_import.py [--scale 2.0]
+'''
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READER_FORBIDDEN = ('pandas', 'chardet', 'nomad', 'baseclasses')
+SCHEMA_BUDGET = 6000
+
+# module: (budget of the cumulative import time in ms, modules it must not import)
+BUDGETS = {
+    'chose_parser': (20, READER_FORBIDDEN + ('numpy',)),
+    'chose_parser.encoding': (40, READER_FORBIDDEN + ('numpy',)),
+    'chose_parser.jv_parser': (300, READER_FORBIDDEN),
+    'chose_parser.mpp_parser': (300, READER_FORBIDDEN),
+    # the parser plugin, nomad is loaded by the worker anyway
+    'chose_parser.parser': (3000, ('pandas', 'chardet', 'baseclasses', 'chose_parser.schema')),
+    'chose_parser.schema': (SCHEMA_BUDGET, ('pandas', 'chardet')),
+    'chose_parser.schema_plugin': (SCHEMA_BUDGET, ('pandas', 'chardet')),
+}
+
+# module: budget of the own import time in ms, without the modules it imports
+SELF_BUDGETS = {
+    'chose_parser.schema': 150,
+    'chose_parser.schema_layout': 2,
+}
+
+
+def import_times(module, own=False):
+    '''
+    Imports `module` in a fresh interpreter. Returns the cumulative import time in ms
+    of every imported module, or None if the import failed. With `own` the times
+    without the imports of each module.
+    '''
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_time if own else cumulative) / 1000
+    return times
+
+
+def main(scale=1.):
+    failures = []
+    for module, (budget, forbidden) in BUDGETS.items():
+        times = import_times(module)
+        if times is None:
+            print(f'{module:<26} skipped, could not be imported')
+            continue
+        total = times[module]
+        loaded = sorted(
+            name for name in forbidden if any(
+                imported == name or imported.startswith(f'{name}.') for imported in times))
+        status = 'ok'
+        if total > budget * scale:
+            status = f'over budget of {budget * scale:.0f} ms'
+        if loaded:
+            status = f'imports {", ".join(loaded)}'
+        if status != 'ok':
+            failures.append(module)
+        print(f'{module:<26} {total:8.1f} ms  {status}')
+
+    for module, budget in SELF_BUDGETS.items():
+        times = import_times(module, own=True)
+        if times is None:
+            print(f'{module + " (own)":<26} skipped, could not be imported')
+            continue
+        total = times[module]
+        status = 'ok'
+        if total > budget * scale:
+            status = f'over budget of {budget * scale:.0f} ms'
+            failures.append(module)
+        print(f'{module + " (own)":<26} {total:8.1f} ms  {status}')
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=float, default=1., help='factor for all time budgets')
+    failures = main(parser.parse_args().scale)
+    sys.exit(1 if failures else 0)
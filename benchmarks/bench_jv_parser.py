@@ -0,0 +1,114 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Compares get_jv_data against the previous three-pass pandas implementation and
+times the recomputation of the figures of merit from the parsed curves.
+
+    python benchmarks/bench_jv_parser.py
+'''
+
+import os
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import write_jv_file  # noqa: E402
+from chose_parser.jv_analysis import compute_jv_parameters  # noqa: E402
+from chose_parser.jv_parser import get_jv_data  # noqa: E402
+
+
+def legacy_get_jv_data(filename, encoding='utf-8'):
+    df = pd.read_csv(
+        filename, skiprows=42, header=[0, 1], nrows=2, sep='\t', index_col=0,
+        engine='python', encoding=encoding)
+    df_header = pd.read_csv(
+        filename, skiprows=11, nrows=8, header=None, sep='\t', index_col=0,
+        encoding=encoding, engine='python')
+    df_curves = pd.read_csv(
+        filename, skiprows=46, on_bad_lines='skip', sep='\t', encoding=encoding,
+        engine='python')
+    df_curves = df_curves.dropna(how='all', axis=1)
+
+    df_header.replace([np.inf, -np.inf, np.nan], 0, inplace=True)
+    df.replace([np.inf, -np.inf, np.nan], 0, inplace=True)
+
+    jv_dict = {}
+    jv_dict['intensity'] = float(df_header.iloc[2, 0])
+    jv_dict['active_area'] = float(df_header.iloc[7, 0])
+    jv_dict['J_sc'] = list(df["Jsc"]["mA/cm²"])
+    jv_dict['V_oc'] = list(df["Voc"]["V"])
+    jv_dict['Fill_factor'] = list(df["FF"]["%"])
+    jv_dict['Efficiency'] = list(df["Eff"]["%"])
+    jv_dict['P_MPP'] = list(df["P_MPP"]["mW/cm²"])
+    jv_dict['J_MPP'] = list(df["J_MPP"]["mA/cm²"])
+    jv_dict['U_MPP'] = list(df["V_MPP"]["V"])
+    jv_dict['R_ser'] = list(df["Rs"]["Ohm"])
+    jv_dict['R_par'] = list(df["R//"]["Ohm"])
+    jv_dict['jv_curve'] = []
+    scan_direction = ["FW", "RV"] if str(df_header.iloc[3, 0]).strip() == "FW->RV" else ["RV", "FW"]
+    for column in range(0, len(df_curves.columns), 2):
+        jv_dict['jv_curve'].append({'name': scan_direction[int(column/2) % 2] + " " + df_curves.columns[column],
+                                    'voltage': df_curves[df_curves.columns[column]].values,
+                                    'current_density': df_curves[df_curves.columns[column+1]].values})
+    return jv_dict
+
+
+def assert_same(expected, actual):
+    assert expected.keys() == actual.keys()
+    for key, value in expected.items():
+        if key == 'jv_curve':
+            assert len(value) == len(actual[key])
+            for a, b in zip(value, actual[key]):
+                assert a['name'] == b['name']
+                np.testing.assert_array_equal(a['voltage'], b['voltage'])
+                np.testing.assert_array_equal(a['current_density'], b['current_density'])
+        else:
+            np.testing.assert_array_equal(value, actual[key])
+
+
+def main(repeat=5):
+    with tempfile.TemporaryDirectory() as directory:
+        for points in (1000, 10000):
+            for pixels in (1, 4):
+                path = write_jv_file(
+                    os.path.join(directory, f'bench_{points}_{pixels}.jv.txt'), points, pixels)
+                assert_same(legacy_get_jv_data(path), get_jv_data(path))
+
+                legacy = min(timeit.repeat(lambda: legacy_get_jv_data(path), number=1, repeat=repeat))
+                current = min(timeit.repeat(lambda: get_jv_data(path), number=1, repeat=repeat))
+
+                curves = get_jv_data(path)['jv_curve']
+                voltages = [curve['voltage'] for curve in curves]
+                current_densities = [curve['current_density'] for curve in curves]
+                analysis = min(timeit.repeat(
+                    lambda: compute_jv_parameters(voltages, current_densities, 0.16),
+                    number=10, repeat=repeat)) / 10
+                print(
+                    f'points={points:>6} pixels={pixels}  legacy {legacy * 1e3:8.2f} ms  '
+                    f'get_jv_data {current * 1e3:8.2f} ms  speedup {legacy / current:5.1f}x  '
+                    f'figures of merit {analysis * 1e6 / len(curves):7.1f} us/curve')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Compares the chunked get_mpp_data with the previous pandas implementation on a
+synthetic tracking file with 1M rows. Each run happens in a fresh process so that
+the peak RSS can be attributed to it.
+
+    python benchmarks/bench_mpp_parser.py [rows]
+'''
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COLUMNS = ["Time (hours) ", "P (mWcm-2)", "V (V)", "J (mAcm-2)"]
+
+
+def legacy_get_mpp_arrays(filename, encoding='utf-8'):
+    import numpy as np
+    import pandas as pd
+    df = pd.read_csv(filename, skiprows=42, sep='\t', encoding=encoding, engine='python')
+    return [np.array(df[column]) for column in COLUMNS]
+
+
+def get_mpp_arrays(filename):
+    from chose_parser.mpp_parser import get_mpp_data
+    _, data = get_mpp_data(filename)
+    return [data[column] for column in COLUMNS]
+
+
+def measure(implementation, filename):
+    # runs in the child process, prints wall time and peak RSS increase
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import chose_parser.mpp_parser  # noqa: F401
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    arrays = implementation(filename)
+    wall = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    final = sum(array.nbytes for array in arrays)
+    # ru_maxrss is in kilobytes on linux
+    print(wall, (peak - baseline) * 1024, final)
+
+
+def main(rows=1000000):
+    from benchmarks.synthetic import write_mpp_file
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = write_mpp_file(os.path.join(directory, 'bench.Tracking.txt'), rows)
+        print(f'{rows} rows, {os.path.getsize(filename) / 1e6:.1f} MB')
+        for name in ['legacy_get_mpp_arrays', 'get_mpp_arrays']:
+            output = subprocess.run(
+                [sys.executable, __file__, '--measure', name, filename],
+                check=True, capture_output=True, text=True).stdout
+            wall, peak, final = (float(value) for value in output.split())
+            print(
+                f'{name:<22} {wall:7.2f} s  peak RSS +{peak / 1e6:7.1f} MB  '
+                f'arrays {final / 1e6:6.1f} MB  ({peak / final:4.1f}x)')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--measure':
+        measure(globals()[sys.argv[2]], sys.argv[3])
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,293 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Benchmarks the ingest pipeline stage by stage on synthetic files of every format the
+parser matches: sniff, encoding, parse, archive build and write. For each stage it
+reports min/mean/stddev of the wall time over several rounds, the tracemalloc peak
+and optionally writes a cProfile dump. The archive build stage is the Chose side
+computation that fills the sections (figures of merit, previews, EQE analysis,
+spectra matrix), the write stage serializes the result to JSON like create_archive.
+
+    python benchmarks/bench_pipeline.py                      # compare with the baseline
+    python benchmarks/bench_pipeline.py --save-baseline      # store a new baseline
+    python benchmarks/bench_pipeline.py --profile-dir prof   # cProfile dumps per stage
+
+The run fails if a stage is slower than its baseline by more than --threshold. The
+baseline stores the times relative to a fixed reference workload that is measured in
+the same run, so that it can be compared across machines.
+'''
+
+import argparse
+import cProfile
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import synthetic  # noqa: E402
+from chose_parser.downsampling import decimate  # noqa: E402
+from chose_parser.encoding import decode_raw  # noqa: E402
+from chose_parser.eqe_parser import analyze_eqe, read_eqe_data  # noqa: E402
+from chose_parser.jv_analysis import compute_jv_parameters  # noqa: E402
+from chose_parser.jv_parser import read_jv_data  # noqa: E402
+from chose_parser.jv_summary import measurement_record  # noqa: E402
+from chose_parser.mpp_parser import (  # noqa: E402
+    get_preview_resolutions, get_preview_series, read_mpp_data)
+from chose_parser.sniffing import sniff_file  # noqa: E402
+from chose_parser.spectra_parser import combine_spectra, read_spectra  # noqa: E402
+
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+STAGES = ['sniff', 'encoding', 'parse', 'build', 'write']
+# differences below this are noise, whatever the relative slowdown
+MIN_DIFFERENCE = 5e-3
+# fast stages are repeated until they ran this long, as pytest-benchmark calibrates
+MIN_TIME = 0.2
+MAX_ROUNDS = 1000
+REFERENCE_KEY = 'reference'
+REFERENCE_ROUNDS = 20
+
+Format = namedtuple('Format', ['file_name', 'write', 'read', 'build'])
+
+
+def build_jv(jv_dict):
+    curves = jv_dict['jv_curve']
+    computed = compute_jv_parameters(
+        [curve['voltage'] for curve in curves], [curve['current_density'] for curve in curves],
+        jv_dict['active_area'], jv_dict['intensity'] or 100.)
+    return dict(jv_dict, record=measurement_record(jv_dict, computed))
+
+
+def build_mpp(parsed):
+    header_dict, data = parsed
+    # as get_mpp_previews, without the schema sections
+    series = get_preview_series(data)
+    previews = [
+        decimate(series, 'efficiency', resolution)
+        for resolution in get_preview_resolutions(len(series['time']))]
+    return dict(header=header_dict, data=data, previews=previews)
+
+
+def build_eqe(eqe_dict):
+    return dict(eqe_dict, analysis=analyze_eqe(eqe_dict['wavelength'], eqe_dict['eqe']))
+
+
+def build_spectra(spectra):
+    names, wavelength, intensity = combine_spectra([spectra])
+    return dict(names=names, wavelength=wavelength, intensity=intensity)
+
+
+def get_formats(args):
+    return {
+        'jv': Format(
+            'S1.bench.jv.txt',
+            lambda path: synthetic.write_jv_file(path, args.points, args.pixels),
+            read_jv_data, build_jv),
+        'mpp': Format(
+            'S1.bench.jv.txt',
+            lambda path: synthetic.write_mpp_file(path, args.rows),
+            read_mpp_data, build_mpp),
+        'eqe': Format(
+            'S1.bench.eqe.txt',
+            lambda path: synthetic.write_eqe_file(path, args.points),
+            read_eqe_data, build_eqe),
+        'pl': Format(
+            'S1.bench.pl.txt',
+            lambda path: synthetic.write_spectra_file(path, args.points, args.spectra),
+            read_spectra, build_spectra),
+        'uvvis': Format(
+            'S1.bench.uvvis.txt',
+            lambda path: synthetic.write_spectra_file(path, args.points, args.spectra, seed=1),
+            read_spectra, build_spectra),
+    }
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(type(value))
+
+
+def get_stages(fmt, path, output):
+    # each stage is a function of the result of the previous one
+    def encoding(_):
+        with open(path, 'rb') as f:
+            return decode_raw(f.read())[0]
+
+    def write(payload):
+        with open(output, 'w') as f:
+            json.dump(payload, f, default=_json_default)
+
+    return {
+        'sniff': lambda _: sniff_file(path),
+        'encoding': encoding,
+        'parse': lambda text: fmt.read(io.StringIO(text, newline=None)),
+        'build': fmt.build,
+        'write': write,
+    }
+
+
+def reference_workload(_):
+    # text splitting, float conversion, numpy and json, the mix of the pipeline stages,
+    # without any code of the parser
+    lines = [f'{index * 1e-3:.6f}\t{index * 2e-3:.6f}' for index in range(5000)]
+    values = np.array([[float(value) for value in line.split('\t')] for line in lines])
+    np.sort(np.random.default_rng(0).random(100000))
+    return json.dumps(values.tolist())
+
+
+def measure(stage, argument, rounds, profile_path=None):
+    times = []
+    while len(times) < rounds or (sum(times) < MIN_TIME and len(times) < MAX_ROUNDS):
+        start = time.perf_counter()
+        result = stage(argument)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    stage(argument)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if profile_path:
+        profile = cProfile.Profile()
+        profile.runcall(stage, argument)
+        profile.dump_stats(profile_path)
+
+    return result, dict(
+        min=min(times), mean=statistics.mean(times),
+        stddev=statistics.stdev(times) if len(times) > 1 else 0., rounds=len(times), peak=peak)
+
+
+def run(args):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, fmt in get_formats(args).items():
+            if args.formats and name not in args.formats:
+                continue
+            path = fmt.write(os.path.join(directory, fmt.file_name))
+            stages = get_stages(fmt, path, os.path.join(directory, f'{name}.archive.json'))
+            # measured before and after the stages of each format, the faster run counts
+            reference = measure_reference(args)
+            value = None
+            for stage_name in STAGES:
+                profile_path = None
+                if args.profile_dir:
+                    os.makedirs(args.profile_dir, exist_ok=True)
+                    profile_path = os.path.join(args.profile_dir, f'{name}-{stage_name}.prof')
+                argument = value
+                value, stats = measure(stages[stage_name], argument, args.rounds, profile_path)
+                if stage_name in ('sniff', 'write'):
+                    value = argument
+                results[f'{name}/{stage_name}'] = stats
+            after = measure_reference(args)
+            results[f'{name}/{REFERENCE_KEY}'] = min(reference, after, key=lambda stats: stats['min'])
+    return results
+
+
+def measure_reference(args):
+    return measure(reference_workload, None, max(args.rounds, REFERENCE_ROUNDS))[1]
+
+
+def get_unit(results, key):
+    # the time of the reference workload measured with the stages of the format of key
+    name = key.split('/')[0]
+    return results[f'{name}/{REFERENCE_KEY}']['min']
+
+
+def relative(results):
+    # the minimum times in units of the reference workload
+    return {
+        key: dict(stats, relative=stats['min'] / get_unit(results, key))
+        for key, stats in results.items()}
+
+
+def compare(results, baseline, threshold):
+    '''
+    The stages that are slower than in the baseline relative to the reference workload,
+    as (key, expected time, time) in seconds on this machine.
+    '''
+    failures = []
+    for key, stats in results.items():
+        reference = baseline.get(key)
+        if reference is None or key.endswith(f'/{REFERENCE_KEY}'):
+            continue
+        expected = reference['relative'] * get_unit(results, key)
+        if stats['min'] - expected > MIN_DIFFERENCE and stats['min'] > expected * (1 + threshold):
+            failures.append((key, expected, stats['min']))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('formats', nargs='*', help='jv, mpp, eqe, pl, uvvis (default all)')
+    parser.add_argument('--points', type=int, default=1000, help='points per curve/spectrum')
+    parser.add_argument('--pixels', type=int, default=4, help='JV curves per file')
+    parser.add_argument('--rows', type=int, default=100000, help='MPP tracking rows')
+    parser.add_argument('--spectra', type=int, default=100, help='spectra per PL/UV-vis file')
+    parser.add_argument('--rounds', type=int, default=5, help='minimum rounds per stage')
+    parser.add_argument('--profile-dir', help='write a cProfile dump per format and stage')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.5, help='allowed relative slowdown')
+    args = parser.parse_args()
+
+    results = relative(run(args))
+    print(
+        f'{"stage":<16} {"min ms":>9} {"mean ms":>9} {"stddev":>8} {"relative":>9} '
+        f'{"rounds":>6} {"peak MB":>8}')
+    for key, stats in results.items():
+        print(
+            f'{key:<16} {stats["min"] * 1e3:9.2f} {stats["mean"] * 1e3:9.2f} '
+            f'{stats["stddev"] * 1e3:8.2f} {stats["relative"]:9.3f} {stats["rounds"]:6d} '
+            f'{stats["peak"] / 1e6:8.2f}')
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'baseline written to {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('no baseline to compare with')
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if not any(key.endswith(f'/{REFERENCE_KEY}') for key in baseline):
+        print('the baseline has no reference workload, store a new one with --save-baseline')
+        return 0
+    failures = compare(results, baseline, args.threshold)
+    for key, reference, current in failures:
+        print(f'SLOWER {key}: expected {reference * 1e3:.2f} ms, took {current * 1e3:.2f} ms')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
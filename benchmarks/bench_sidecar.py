@@ -0,0 +1,96 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Compares the size, write and load time of measurement arrays stored as JSON lists,
+as in an archive, with the binary sidecar file, for MPP tracking data and a matrix of
+spectra.
+
+    python benchmarks/bench_sidecar.py
+'''
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import write_mpp_file, write_spectra_file  # noqa: E402
+from chose_parser.mpp_parser import get_mpp_data  # noqa: E402
+from chose_parser.sidecar import load_arrays, pack_arrays  # noqa: E402
+from chose_parser.spectra_parser import get_spectra  # noqa: E402
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def json_path(arrays, path):
+    def write():
+        with open(path, 'w') as f:
+            json.dump({name: array.tolist() for name, array in arrays.items()}, f)
+
+    def load():
+        with open(path) as f:
+            data = json.load(f)
+        return {name: np.array(values) for name, values in data.items()}
+
+    _, write_time = timed(write)
+    loaded, load_time = timed(load)
+    _, access_time = timed(lambda: [array.sum() for array in loaded.values()])
+    return os.path.getsize(path), write_time, load_time + access_time
+
+
+def sidecar_path(arrays, path):
+    path = f'{path}.npy'
+
+    def write():
+        buffer, layout = pack_arrays(arrays)
+        np.save(path, buffer)
+        return layout
+
+    layout, write_time = timed(write)
+    loaded, load_time = timed(lambda: load_arrays(path, layout))
+    _, access_time = timed(lambda: [array.sum() for array in loaded.values()])
+    return os.path.getsize(path), write_time, load_time + access_time
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        _, mpp = get_mpp_data(write_mpp_file(os.path.join(directory, 'bench.Tracking.txt'), 1000000))
+        spectra = get_spectra(write_spectra_file(os.path.join(directory, 'bench.pl.txt'), 2000, 500))
+        cases = {
+            'mpp 1M rows': mpp,
+            'spectra 500x2000': {'wavelength': spectra['wavelength'], 'intensity': spectra['intensity']},
+        }
+        for name, arrays in cases.items():
+            for label, store in [('json', json_path), ('sidecar', sidecar_path)]:
+                size, write_time, load_time = store(arrays, os.path.join(directory, f'arrays.{label}'))
+                print(
+                    f'{name:<18} {label:<8} {size / 1e6:8.1f} MB  write {write_time * 1e3:8.1f} ms  '
+                    f'load {load_time * 1e3:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Generators for synthetic files in the layout written by the Chose instruments.
+'''
+
+import numpy as np
+
+
+def jv_file_content(points=1000, pixels=1, seed=0):
+    # pixels is the number of voltage/current column pairs in the curve block
+    rng = np.random.default_rng(seed)
+    lines = ['Chose JV measurement'] + [f'# instrument line {i}' for i in range(1, 11)]
+    lines += [
+        'Sample\tS1',
+        'Cell\tC1',
+        'Intensity [mW/cm²]\t100',
+        'Scan direction\tFW->RV',
+        'Scan rate [mV/s]\t100',
+        'Settling time [s]\t0.1',
+        'Integration time [s]\t0.02',
+        'Active area [cm²]\t0.16']
+    lines += [f'# instrument line {i}' for i in range(19, 42)]
+    lines += [
+        '\tJsc\tVoc\tFF\tEff\tP_MPP\tJ_MPP\tV_MPP\tRs\tR//',
+        '\tmA/cm²\tV\t%\t%\tmW/cm²\tmA/cm²\tV\tOhm\tOhm',
+        'FW\t21.5\t1.12\t78.1\t18.8\t18.8\t19.9\t0.945\t25.3\t10512.0',
+        'RV\t21.7\t1.13\t80.2\tinf\t19.7\t20.4\t0.966\t23.9\tnan']
+    names = []
+    for pixel in range(pixels):
+        names += [f'V_{pixel + 1}', f'J_{pixel + 1}']
+    lines.append('\t'.join(names))
+
+    voltage = np.linspace(-0.2, 1.2, points)
+    columns = []
+    for pixel in range(pixels):
+        current = 21.5 - 1e-9 * np.expm1(voltage / 0.05) + rng.normal(0, 0.01, points)
+        columns += [voltage, current]
+    data = np.column_stack(columns)
+    lines += ['\t'.join(f'{v:.6f}' for v in row) for row in data]
+    return '\n'.join(lines) + '\n'
+
+
+def write_jv_file(path, points=1000, pixels=1, seed=0, encoding='utf-8'):
+    with open(path, 'w', encoding=encoding) as f:
+        f.write(jv_file_content(points, pixels, seed))
+    return path
+
+
+def eqe_file_content(points=500, bandgap=1.6, seed=0):
+    # 9 header lines and the column names, wavelength in nm and EQE in percent
+    rng = np.random.default_rng(seed)
+    lines = ['Chose EQE measurement'] + [f'# instrument line {i}' for i in range(1, 9)]
+    lines.append('Wavelength (nm)\tEQE (%)')
+    wavelength = np.linspace(300, 900, points)
+    energy = 1239.84198 / wavelength
+    eqe = 85 / (1 + np.exp(-(energy - bandgap) / 0.02)) + rng.normal(0, 0.2, points)
+    lines += [f'{w:.2f}\t{e:.4f}' for w, e in zip(wavelength, eqe)]
+    return '\n'.join(lines) + '\n'
+
+
+def write_eqe_file(path, points=500, bandgap=1.6, seed=0, encoding='utf-8'):
+    with open(path, 'w', encoding=encoding) as f:
+        f.write(eqe_file_content(points, bandgap, seed))
+    return path
+
+
+def spectra_file_content(points=1000, spectra=100, seed=0):
+    # PL/UV-vis export: wavelength in nm and one intensity column per spectrum
+    rng = np.random.default_rng(seed)
+    lines = ['Chose spectra export', 'Integration time [ms]\t100']
+    lines.append('\t'.join(['Wavelength (nm)'] + [f'Spectrum {i + 1}' for i in range(spectra)]))
+    wavelength = np.linspace(400, 1000, points)
+    centers = rng.normal(770, 5, spectra)
+    intensity = np.exp(-((wavelength[None, :] - centers[:, None]) / 20) ** 2)
+    intensity += rng.normal(0, 0.01, intensity.shape)
+    data = np.column_stack([wavelength, intensity.T])
+    lines += ['\t'.join(f'{v:.5g}' for v in row) for row in data]
+    return '\n'.join(lines) + '\n'
+
+
+def write_spectra_file(path, points=1000, spectra=100, seed=0, encoding='utf-8'):
+    with open(path, 'w', encoding=encoding) as f:
+        f.write(spectra_file_content(points, spectra, seed))
+    return path
+
+
+MPP_HEADER = [
+    'Chose MPP tracking',
+    'Datetime:\t2023-10-19 06:33 PM',
+    'Start voltage manually:\ttrue',
+    'Perturbation frequency [s]:\t0.5',
+    'Sampling:\t10',
+    'Perturbation voltage [V]:\t0.002',
+    'Perturbation delay [s]:\t0.1',
+    'Time [s]:\t360000',
+    'Status:\tfinished',
+    'Last PCE [%]:\t18.2',
+    'Last Vmpp [V]:\t0.95',
+]
+
+
+def write_mpp_file(path, rows=100000, seed=0, encoding='utf-8', chunk_rows=100000):
+    # written in chunks so that files with millions of rows need little memory
+    rng = np.random.default_rng(seed)
+    with open(path, 'w', encoding=encoding) as f:
+        header = MPP_HEADER + [f'# instrument line {i}' for i in range(len(MPP_HEADER), 42)]
+        f.write('\n'.join(header) + '\n')
+        f.write('Time (hours) \tP (mWcm-2)\tV (V)\tJ (mAcm-2)\tPCE\n')
+        for start in range(0, rows, chunk_rows):
+            n = min(chunk_rows, rows - start)
+            time = (start + np.arange(n)) * 0.5 / 3600
+            voltage = 0.95 - 1e-4 * time + rng.normal(0, 1e-3, n)
+            current = 19.9 - 1e-3 * time + rng.normal(0, 1e-2, n)
+            power = voltage * current
+            data = np.column_stack([time, power, voltage, current, power])
+            np.savetxt(f, data, fmt='%.6f', delimiter='\t')
+    return path
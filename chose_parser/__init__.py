@@ -1,2 +1,30 @@
-from .parser import *
-from .schema import *
+'''
+The parser and the schema are imported on first access of one of their names, e.g.
+`chose_parser.ChoseParser` or `chose_parser.Chose_JVmeasurement`. Importing the package
+itself loads neither nomad nor baseclasses, so the parser plugin matches files without
+the schema. The sections are registered with NOMAD by the separate schema plugin
+`chose_parser.schema_plugin`.
+'''
+
+import importlib
+import importlib.util
+
+# names looked up in the parser module first, all others are looked up in the schema
+# first, as with the former `from .parser import *` and `from .schema import *`
+_PARSER_NAMES = {'ChoseParser', 'RawFileChose', 'create_entry', 'get_search_id'}
+
+
+def __getattr__(name):
+    if name.startswith('_'):
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    # `from chose_parser import encoding` asks for the attribute before the submodule
+    if importlib.util.find_spec(f'{__name__}.{name}') is not None:
+        return importlib.import_module(f'.{name}', __name__)
+    modules = ('parser', 'schema') if name in _PARSER_NAMES else ('schema', 'parser')
+    for module_name in modules:
+        module = importlib.import_module(f'.{module_name}', __name__)
+        if hasattr(module, name):
+            value = getattr(module, name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,283 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Export of a batch as one table with a row per sample. The columns are the scalar
+quantities of the processes and measurements that reference the sample, e.g.
+`SpinCoating.solution.0.solution_volume` or `JVmeasurement.jv_curve.0.efficiency`,
+prefixed by the section name and numbered if a sample has several entries of one type.
+Arrays, e.g. curves, are left out.
+
+The samples are loaded a chunk at a time and the rows are spooled to a temporary file
+until the set of columns is known, so the memory does not grow with the number of
+samples. Parquet output needs pyarrow.
+'''
+
+import csv
+import json
+import os
+import re
+import tempfile
+
+EXPORT_FORMATS = ('csv', 'parquet')
+# samples whose entries are searched and loaded together
+SAMPLE_CHUNK = 16
+ROW_GROUP_SIZE = 64
+SKIPPED_KEYS = {
+    'm_def', 'm_annotations', 'samples', 'batch', 'previous_process', 'data_file',
+    'lab_id', 'name', 'results', 'instruments', 'steps', 'users'}
+
+# entry id in the proxy value of a sample reference
+ENTRY_ID_RE = re.compile(r'archive/([^/#]+)')
+
+
+def strip_arrays(data):
+    # the section dict without lists of numbers, as far as flatten would skip them
+    if isinstance(data, dict):
+        return {key: strip_arrays(value) for key, value in data.items() if key not in SKIPPED_KEYS}
+    if isinstance(data, list):
+        if len(data) > 1 and not any(isinstance(item, dict) for item in data):
+            return None
+        return [strip_arrays(item) for item in data]
+    return data
+
+
+def flatten(data, prefix, row):
+    # adds the scalars of a section dict to row, lists of numbers are skipped
+    for key, value in data.items():
+        if key in SKIPPED_KEYS:
+            continue
+        column = f'{prefix}.{key}'
+        if isinstance(value, dict):
+            flatten(value, column, row)
+        elif isinstance(value, list):
+            if len(value) == 1 and not isinstance(value[0], (dict, list)):
+                row[column] = value[0]
+            for index, item in enumerate(value):
+                if isinstance(item, dict):
+                    flatten(item, f'{column}.{index}', row)
+        elif value is not None:
+            row[column] = value
+    return row
+
+
+def entry_prefix(entry_type):
+    return entry_type[len('Chose_'):] if entry_type.startswith('Chose_') else entry_type
+
+
+def sample_row(sample_id, entries):
+    '''
+    The row of one sample from (entry_type, data dict) of its entries, in the order of
+    their datetime.
+    '''
+    row = {'sample_id': sample_id}
+    counts = {}
+    for entry_type, data in sorted(entries, key=lambda entry: str(entry[1].get('datetime') or '')):
+        prefix = entry_prefix(entry_type)
+        counts[prefix] = counts.get(prefix, 0) + 1
+        if counts[prefix] > 1:
+            prefix = f'{prefix}_{counts[prefix]}'
+        flatten(data, prefix, row)
+    return row
+
+
+def _kind(value):
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    return 'str'
+
+
+def _widen(kind, other):
+    if kind is None or kind == other:
+        return other
+    if {kind, other} == {'int', 'float'}:
+        return 'float'
+    return 'str'
+
+
+class RowSpool:
+    '''
+    Rows in a temporary JSON lines file, with the union of their columns in the order
+    of appearance and the kind of every column.
+    '''
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile('w+', encoding='utf-8')
+        self.columns = {}
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.file.close()
+
+    def append(self, row):
+        for column, value in row.items():
+            self.columns[column] = _widen(self.columns.get(column), _kind(value))
+        self.file.write(json.dumps(row, default=str))
+        self.file.write('\n')
+        self.rows += 1
+
+    def __iter__(self):
+        self.file.seek(0)
+        for line in self.file:
+            yield json.loads(line)
+
+
+def write_csv(spool, f):
+    writer = csv.DictWriter(f, fieldnames=list(spool.columns), restval='', lineterminator='\n')
+    writer.writeheader()
+    for row in spool:
+        writer.writerow(row)
+
+
+def check_export_format(export_format):
+    # raises before anything is read or written if the format cannot be written
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'unknown export format {export_format}')
+    if export_format == 'parquet':
+        import importlib.util
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ImportError('the parquet export needs pyarrow')
+
+
+def get_export_path(archive, batch, export_format):
+    # next to the mainfile of the batch
+    directory = os.path.dirname(archive.metadata.mainfile or '')
+    return os.path.join(directory, f'{batch.lab_id or batch.name}.samples.{export_format}')
+
+
+def write_parquet(spool, f):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError('the parquet export needs pyarrow') from e
+
+    types = dict(bool=pa.bool_(), int=pa.int64(), float=pa.float64(), str=pa.string())
+    schema = pa.schema([(column, types[kind]) for column, kind in spool.columns.items()])
+    converters = {
+        column: (lambda value: None if value is None else str(value)) if kind == 'str'
+        else (lambda value: value)
+        for column, kind in spool.columns.items()}
+
+    with pq.ParquetWriter(f, schema) as writer:
+        rows = []
+        for row in spool:
+            rows.append(row)
+            if len(rows) == ROW_GROUP_SIZE:
+                writer.write_table(_table(pa, schema, converters, rows))
+                rows = []
+        if rows or not spool.rows:
+            writer.write_table(_table(pa, schema, converters, rows))
+
+
+def _table(pa, schema, converters, rows):
+    return pa.table({
+        column: [converter(row.get(column)) for row in rows]
+        for column, converter in converters.items()}, schema=schema)
+
+
+def export_rows(rows, f, export_format='csv'):
+    '''
+    Writes the rows, dicts of column to value, to the file object f, text for csv and
+    binary for parquet.
+    '''
+    check_export_format(export_format)
+    with RowSpool() as spool:
+        for row in rows:
+            spool.append(row)
+        if export_format == 'csv':
+            write_csv(spool, f)
+        else:
+            write_parquet(spool, f)
+    return spool.rows
+
+
+def get_batch_samples(batch):
+    # (lab_id, entry_id) of the samples of the batch
+    samples = []
+    for entity in batch.entities or []:
+        # the proxy value gives the entry id without loading the sample
+        reference = entity.reference
+        match = ENTRY_ID_RE.search(str(getattr(reference, 'm_proxy_value', '') or ''))
+        if match:
+            entry_id = match.group(1)
+        elif reference is not None:
+            entry_id = reference.m_root().metadata.entry_id
+        else:
+            entry_id = None
+        samples.append((entity.lab_id, entry_id))
+    return samples
+
+
+def search_sample_entries(archive, entry_ids):
+    # search hits of all entries that reference one of the samples
+    from nomad.search import search
+    from nomad.app.v1.models import MetadataPagination, MetadataRequired
+
+    page_after_value = None
+    while True:
+        search_result = search(
+            owner='visible',
+            query={'entry_references.target_entry_id:any': list(entry_ids)},
+            pagination=MetadataPagination(page_size=100, page_after_value=page_after_value),
+            required=MetadataRequired(include=[
+                'entry_id', 'upload_id', 'entry_type', 'entry_references']),
+            user_id=archive.metadata.main_author.user_id)
+        yield from search_result.data
+        page_after_value = search_result.pagination.next_page_after_value
+        if not page_after_value:
+            break
+
+
+def load_entry_data(upload_id, entry_id):
+    from nomad.files import UploadFiles
+
+    upload_files = UploadFiles.get(upload_id)
+    with upload_files.read_archive(entry_id) as archive_reader:
+        return archive_reader[entry_id]['data'].to_dict()
+
+
+def iter_batch_rows(archive, batch):
+    samples = get_batch_samples(batch)
+    for start in range(0, len(samples), SAMPLE_CHUNK):
+        chunk = samples[start:start + SAMPLE_CHUNK]
+        entries = {entry_id: [] for _, entry_id in chunk if entry_id}
+        hits = search_sample_entries(archive, list(entries)) if entries else []
+        for hit in hits:
+            targets = {
+                reference.get('target_entry_id') for reference in hit.get('entry_references', [])}
+            targets.intersection_update(entries)
+            if not targets:
+                continue
+            data = strip_arrays(load_entry_data(hit['upload_id'], hit['entry_id']))
+            for entry_id in targets:
+                entries[entry_id].append((hit['entry_type'], data))
+        for lab_id, entry_id in chunk:
+            yield sample_row(lab_id, entries.get(entry_id, []))
+
+
+def export_batch(archive, batch, path, export_format='csv'):
+    with archive.m_context.raw_file(path, 'w' if export_format == 'csv' else 'wb') as f:
+        return export_rows(iter_batch_rows(archive, batch), f, export_format)
@@ -0,0 +1,66 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Settings of the Chose parser, read from environment variables of the NOMAD workers.
+'''
+
+import os
+
+
+def _flag(name, default=True):
+    value = os.environ.get(name)
+    return default if value is None else value.strip().lower() not in ('0', 'false', 'no', 'off', '')
+
+
+# directory of the parsed measurement cache, e.g. a local disk of the worker, an empty
+# value disables the cache
+parse_cache_directory = os.environ.get('CHOSE_PARSE_CACHE_DIRECTORY', '')
+parse_cache_max_bytes = int(os.environ.get('CHOSE_PARSE_CACHE_MAX_BYTES', 2 << 30))
+
+# recompute the JV figures of merit from the curves and warn about disagreeing values
+validate_jv_parameters = _flag('CHOSE_VALIDATE_JV_PARAMETERS')
+
+# write the figures of merit of every JV file to <data_file>.jv_record.json and the
+# per-sample and per-batch summaries to <id>.jv_summary.json, see chose_parser.jv_summary
+write_jv_summaries = _flag('CHOSE_WRITE_JV_SUMMARIES')
+
+# number of following raw files of the same kind read ahead while a file is parsed, 0 disables
+raw_prefetch_depth = int(os.environ.get('CHOSE_RAW_PREFETCH_DEPTH', 0))
+
+# store the large arrays of MPP and spectra measurements in <data_file>.arrays.npy
+# next to the data file instead of the archive
+array_sidecar = _flag('CHOSE_ARRAY_SIDECAR', default=False)
+
+# log the wall and CPU time, bytes, rows and cache hits of the parser and normalizer
+# stages per entry and per upload, see chose_parser.instrumentation
+instrumentation = _flag('CHOSE_INSTRUMENTATION')
+# fraction of the entries that are instrumented
+instrumentation_sample_rate = float(os.environ.get('CHOSE_INSTRUMENTATION_SAMPLE_RATE', 0.1))
+
+# number of processes that create the entries of an upload in ChoseParser.parse_bulk,
+# 1 creates them in the worker itself
+bulk_workers = int(os.environ.get('CHOSE_BULK_WORKERS', os.cpu_count() or 1))
+
+# execute experimental plans against a recording context and write only the new or
+# changed archives in one step, see chose_parser.plan_executor
+bulk_plan_execution = _flag('CHOSE_BULK_PLAN_EXECUTION')
+
+# add every process to `<lab_id>.process_history.json` at the upload root of the samples
+# it references
+write_process_history = _flag('CHOSE_WRITE_PROCESS_HISTORY')
@@ -0,0 +1,84 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from collections import namedtuple
+
+
+def attach_data_file(entry, file_name):
+    entry.data_file = file_name
+
+
+def attach_data_file_list(entry, file_name):
+    entry.data_file = [file_name]
+
+
+def attach_nothing(entry, file_name):
+    pass
+
+
+MeasurementType = namedtuple('MeasurementType', ['factory', 'attach'])
+
+
+class MeasurementDispatcher:
+    '''
+    Maps the (type token, extension) of a file name like `<id>.<notes>.jv.txt` to the
+    factory that creates its entry and the policy that attaches the file to it.
+    Registrations with `extension=None` apply to all extensions of a token.
+    '''
+
+    def __init__(self):
+        self._types = {}
+        self._resolved = {}
+        self.default = None
+
+    def register(self, type_token, extension=None, attach=attach_data_file):
+        def decorator(factory):
+            self._types[(type_token, extension)] = MeasurementType(factory, attach)
+            self._resolved.clear()
+            return factory
+        return decorator
+
+    def register_default(self, attach=attach_data_file):
+        def decorator(factory):
+            self.default = MeasurementType(factory, attach)
+            self._resolved.clear()
+            return factory
+        return decorator
+
+    def resolve(self, type_token, extension):
+        types = self._types
+        return types.get((type_token, extension)) or types.get((type_token, None)) or self.default
+
+    def create_entry(self, file_name, type_token=None):
+        # type_token overrides the token of the file name, e.g. after sniffing the content.
+        # The types are cached by the `<token>.<extension>` suffix of the name, the hot
+        # path is one slice and one lookup.
+        suffix = file_name[file_name.rfind('.', 0, file_name.rfind('.')) + 1:]
+        resolved = self._resolved.get(suffix if type_token is None else (suffix, type_token))
+        if resolved is None:
+            name_token, _, extension = suffix.rpartition('.')
+            resolved = self.resolve(type_token or name_token, extension)
+            self._resolved[suffix if type_token is None else (suffix, type_token)] = resolved
+        factory, attach = resolved
+        entry = factory(file_name)
+        attach(entry, file_name)
+        return entry
+
+
+measurement_dispatcher = MeasurementDispatcher()
+register_measurement = measurement_dispatcher.register
@@ -0,0 +1,53 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import numpy as np
+
+
+def minmax_indices(y, n_out):
+    '''
+    Indices of a min/max preserving decimation of `y` to about `n_out` points: the
+    series is split into n_out / 2 equal buckets and the minimum and maximum of each
+    bucket are kept, together with the first and last point.
+    '''
+    y = np.asarray(y)
+    n = y.shape[0]
+    if n <= n_out:
+        return np.arange(n)
+
+    size = -(-n // max(n_out // 2, 1))
+    buckets = -(-n // size)
+    padded = np.empty(buckets * size)
+    padded[:n] = y
+    padded[n:] = np.nan
+
+    nan = np.isnan(padded)
+    rows = np.where(nan, np.inf, padded).reshape(buckets, size)
+    minima = rows.argmin(axis=1)
+    rows = np.where(nan, -np.inf, padded).reshape(buckets, size)
+    maxima = rows.argmax(axis=1)
+
+    offsets = np.arange(buckets) * size
+    indices = np.concatenate([[0, n - 1], offsets + minima, offsets + maxima])
+    return np.unique(indices[indices < n])
+
+
+def decimate(series, key, n_out):
+    # decimates all arrays in `series` with the indices chosen on series[key]
+    indices = minmax_indices(series[key], n_out)
+    return {name: np.asarray(values)[indices] for name, values in series.items()}
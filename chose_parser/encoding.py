@@ -0,0 +1,218 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import codecs
+import io
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .instrumentation import count, stage
+
+# bytes looked at by the BOM/UTF-8 probe and by chardet
+PROBE_SIZE = 4 * 1024
+CHARDET_SAMPLE_SIZE = 64 * 1024
+CACHE_SIZE = 1024
+
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+# (upload_id, file name pattern) -> encoding
+_encoding_cache = OrderedDict()
+
+
+def get_file_name_pattern(file_name):
+    # files of one instrument share the last two dotted components, e.g. jv.txt
+    return '.'.join(os.path.basename(file_name).split('.')[-2:])
+
+
+def probe_encoding(raw):
+    for bom, encoding in BOMS:
+        if raw.startswith(bom):
+            return encoding
+
+    try:
+        # the incremental decoder tolerates a multi-byte character cut at the probe end
+        codecs.getincrementaldecoder('utf-8')().decode(raw[:PROBE_SIZE], final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return None
+
+
+def detect_encoding(raw):
+    encoding = probe_encoding(raw)
+    if encoding is None:
+        import chardet
+        encoding = chardet.detect(raw[:CHARDET_SAMPLE_SIZE])['encoding']
+    return encoding or 'utf-8'
+
+
+def _cache_key(upload_id, file_name):
+    return (upload_id, get_file_name_pattern(file_name)) if upload_id and file_name else None
+
+
+def _cache_encoding(key, encoding):
+    if key:
+        _encoding_cache[key] = encoding
+        if len(_encoding_cache) > CACHE_SIZE:
+            _encoding_cache.popitem(last=False)
+
+
+def _decode_utf8(raw):
+    # a file with a BOM or in utf-8 decodes in most single byte encodings too, into wrong
+    # characters, so they are checked before an encoding cached for a sibling file
+    encoding = probe_encoding(raw)
+    if encoding is None:
+        return None
+    try:
+        return raw.decode(encoding), encoding
+    except UnicodeDecodeError:
+        return None
+
+
+def decode_raw(raw, upload_id=None, file_name=None):
+    with stage('encoding'):
+        return _decode_raw(raw, upload_id, file_name)
+
+
+def _decode_raw(raw, upload_id, file_name):
+    decoded = _decode_utf8(raw)
+    if decoded is not None:
+        return decoded
+
+    key = _cache_key(upload_id, file_name)
+    encoding = _encoding_cache.get(key) if key else None
+    if encoding is not None:
+        try:
+            text = raw.decode(encoding)
+            _encoding_cache.move_to_end(key)
+            count(cache_hits=1)
+            return text, encoding
+        except UnicodeDecodeError:
+            del _encoding_cache[key]
+    count(cache_misses=1)
+
+    encoding = detect_encoding(raw)
+    try:
+        text = raw.decode(encoding)
+    except UnicodeDecodeError as e:
+        # the sample did not contain the first non-ascii byte, detect around it
+        import chardet
+        encoding = chardet.detect(raw[e.start:e.start + CHARDET_SAMPLE_SIZE])['encoding'] or 'utf-8'
+        try:
+            text = raw.decode(encoding)
+        except (UnicodeDecodeError, LookupError):
+            return raw.decode(encoding, errors='replace'), encoding
+
+    _cache_encoding(key, encoding)
+    return text, encoding
+
+
+def _first_non_utf8(data):
+    # offset of the first byte of data that is not valid utf-8, None if there is none
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for start in range(0, len(data), CHARDET_SAMPLE_SIZE):
+        chunk = data[start:start + CHARDET_SAMPLE_SIZE]
+        try:
+            decoder.decode(chunk, final=start + len(chunk) >= len(data))
+        except UnicodeDecodeError as e:
+            # e.object starts with the bytes the decoder kept from the previous chunk
+            return max(start + e.start - (len(e.object) - len(chunk)), 0)
+    return None
+
+
+def detect_stream_encoding(data):
+    '''
+    The encoding of the whole content of a raw_io.RawBuffer, detected around the first
+    byte that is not utf-8.
+    '''
+    position = _first_non_utf8(data)
+    if position is None:
+        return 'utf-8'
+    import chardet
+    start = max(position - PROBE_SIZE, 0)
+    return chardet.detect(bytes(data[start:start + CHARDET_SAMPLE_SIZE]))['encoding'] or 'utf-8'
+
+
+@contextmanager
+def open_raw_text(raw, upload_id=None, file_name=None, encoding=None):
+    # Text stream over a raw_io.RawBuffer for files too large to decode at once: the
+    # encoding is resolved on the first sample and the buffer is then read as text.
+    # Bytes that do not decode raise UnicodeDecodeError, see read_raw_text.
+    if encoding is None:
+        with stage('encoding'):
+            encoding = _sample_encoding(raw.data[:CHARDET_SAMPLE_SIZE], upload_id, file_name)
+
+    text = io.TextIOWrapper(raw.stream(), encoding=encoding, newline=None)
+    try:
+        yield text
+    finally:
+        text.close()
+
+
+def _sample_encoding(sample, upload_id, file_name):
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    if _decodes(sample, 'utf-8'):
+        return 'utf-8'
+
+    key = _cache_key(upload_id, file_name)
+    encoding = _encoding_cache.get(key) if key else None
+    if encoding is not None and _decodes(sample, encoding):
+        _encoding_cache.move_to_end(key)
+        count(cache_hits=1)
+        return encoding
+    count(cache_misses=1)
+    encoding = detect_encoding(sample)
+    _cache_encoding(key, encoding)
+    return encoding
+
+
+def _decodes(sample, encoding):
+    try:
+        # the incremental decoder tolerates a multi-byte character cut at the sample end
+        codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+
+def read_raw_text(raw, read, upload_id=None, file_name=None):
+    '''
+    Returns read(f) for the text stream f of open_raw_text. If a later part of the file
+    does not decode in the encoding of the first sample, the encoding is detected again
+    on the whole file and the file is read again.
+    '''
+    try:
+        with open_raw_text(raw, upload_id, file_name) as f:
+            return read(f)
+    except UnicodeDecodeError:
+        pass
+
+    with stage('encoding'):
+        count(cache_misses=1)
+        encoding = detect_stream_encoding(raw.data)
+        _cache_encoding(_cache_key(upload_id, file_name), encoding)
+    with open_raw_text(raw, upload_id, file_name, encoding) as f:
+        return read(f)
@@ -0,0 +1,237 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import functools
+import importlib.util
+import os
+
+import numpy as np
+
+from .numeric import is_numeric_line, read_table
+
+# h * c / e in eV nm
+HC_EV_NM = 1239.84198
+ELEMENTARY_CHARGE = 1.602176634e-19
+PLANCK_EV = 4.135667696e-15  # eV s
+SPEED_OF_LIGHT = 2.99792458e10  # cm/s
+BOLTZMANN_EV = 8.617333262e-5  # eV/K
+# cell temperature of the radiative limit
+TEMPERATURE = 300.
+
+# AM1.5G photon flux shipped with nomad, columns: index, energy (eV), flux (1/(cm² s eV))
+AM15G_FILE = os.path.join(
+    'datamodel', 'metainfo', 'eln', 'perovskite_solar_cell_database', 'AM15G.dat.txt')
+
+# points of the moving average applied before the derivative for the bandgap
+SMOOTHING_POINTS = 5
+
+# the Urbach tail is fitted below the bandgap where the EQE is at most this fraction of
+# its maximum, and extrapolated this many Urbach energies below the measured range
+URBACH_MAX_FRACTION = 0.1
+URBACH_MIN_POINTS = 3
+URBACH_TAIL_WIDTH = 20
+
+
+def detect_header_lines(lines):
+    '''
+    The index of the column name line, i.e. the number of lines before it, in the
+    convention of SolarCellEQE.header_lines. None if the data has no column names.
+    '''
+    for index, line in enumerate(lines):
+        if is_numeric_line(line):
+            return index - 1 if index > 0 else None
+    raise ValueError('not an EQE file, no numeric data found')
+
+
+def read_eqe_data(f):
+    # The header is read line by line up to the first numeric row, the data in one go.
+    preamble = []
+    while True:
+        line = f.readline()
+        if not line:
+            break
+        preamble.append(line)
+        if is_numeric_line(line):
+            break
+    header_lines = detect_header_lines(preamble)
+
+    if header_lines is None:
+        names, data = read_table('wavelength\teqe\n' + preamble[-1] + f.read())
+    else:
+        names, data = read_table(preamble[header_lines] + preamble[-1] + f.read())
+    if data.shape[1] < 2:
+        raise ValueError('not an EQE file, less than two numeric columns')
+
+    x, eqe = data[:, 0], data[:, 1]
+    valid = np.isfinite(x) & np.isfinite(eqe) & (x > 0)
+    x, eqe = x[valid], eqe[valid]
+    # the first column is the wavelength in nm, or the photon energy in eV
+    if x.size and x.max() < 20:
+        wavelength = HC_EV_NM / x
+    else:
+        wavelength = x
+    # EQE in percent
+    if eqe.size and np.nanmax(eqe) > 1.5:
+        eqe = eqe / 100
+
+    return {
+        'header_lines': header_lines,
+        'column_names': names,
+        'wavelength': wavelength,
+        'eqe': eqe,
+    }
+
+
+def get_eqe_data(filename, encoding='utf-8'):
+    with open(filename, encoding=encoding) as f:
+        return read_eqe_data(f)
+
+
+@functools.lru_cache(maxsize=1)
+def load_am15g():
+    # (energy in eV, photon flux in 1/(cm² s eV)) sorted by energy, None without nomad
+    spec = importlib.util.find_spec('nomad')
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    path = os.path.join(list(spec.submodule_search_locations)[0], AM15G_FILE)
+    if not os.path.exists(path):
+        return None
+    data = np.loadtxt(path, delimiter=',', skiprows=1, usecols=(1, 2))
+    data = data[np.argsort(data[:, 0])]
+    return data[:, 0], data[:, 1]
+
+
+def _cumulative_trapezoid(y, x):
+    return np.concatenate([[0.], np.cumsum((y[1:] + y[:-1]) * np.diff(x) / 2)])
+
+
+def blackbody_flux(photon_energy, temperature=TEMPERATURE):
+    # photon flux of a black body in 1/(cm² s eV)
+    return (2 * np.pi * photon_energy ** 2 / (PLANCK_EV ** 3 * SPEED_OF_LIGHT ** 2)
+            / np.expm1(photon_energy / (BOLTZMANN_EV * temperature)))
+
+
+def fit_urbach_tail(photon_energy, eqe, bandgap):
+    '''
+    The Urbach energy in eV, the slope of ln(EQE), and the lowest energy of the fitted
+    tail: the points below the bandgap from URBACH_MAX_FRACTION of the maximum EQE down
+    to the first point in the noise floor. None without such a tail.
+    '''
+    below = np.flatnonzero((photon_energy < bandgap) & (eqe <= URBACH_MAX_FRACTION * eqe.max()))
+    if below.size == 0:
+        return None
+    # the contiguous positive points next to the bandgap
+    start = end = below[-1] + 1
+    for index in below[::-1]:
+        if index != start - 1 or eqe[index] <= 0:
+            break
+        start = index
+    if end - start < URBACH_MIN_POINTS:
+        return None
+    slope = np.polyfit(photon_energy[start:end], np.log(eqe[start:end]), 1)[0]
+    if slope <= 0:
+        return None
+    return float(1 / slope), float(photon_energy[start])
+
+
+def radiative_j0(photon_energy, eqe, tail=None):
+    '''
+    Radiative dark saturation current in A/m² of the EQE under the black body spectrum.
+    With the (urbach_energy, start) of the tail, the EQE below its start is replaced by
+    the fitted exponential, the noise floor would dominate the integral otherwise.
+    '''
+    eqe = np.clip(eqe, 0, None)
+    if tail is not None:
+        urbach_energy, start = tail
+        measured = photon_energy >= start
+        photon_energy, eqe = photon_energy[measured], eqe[measured]
+        energies = np.linspace(
+            max(start - URBACH_TAIL_WIDTH * urbach_energy, 0.), start, 200, endpoint=False)
+        photon_energy = np.concatenate([energies, photon_energy])
+        eqe = np.concatenate([eqe[0] * np.exp((energies - start) / urbach_energy), eqe])
+    valid = photon_energy > 0
+    y = eqe[valid] * blackbody_flux(photon_energy[valid])
+    x = photon_energy[valid]
+    return float(np.sum((y[1:] + y[:-1]) * np.diff(x)) / 2 * ELEMENTARY_CHARGE * 1e4)
+
+
+def analyze_eqe(wavelength, eqe, spectrum=None):
+    '''
+    Photon energy, integrated Jsc in A/m² against the AM1.5G spectrum, the bandgap in eV
+    as the energy of the steepest EQE onset, the Urbach energy in eV of the tail below
+    it, the radiative dark saturation current j0 in A/m² and the radiative Voc limit in
+    V. The arrays are sorted by energy.
+    '''
+    photon_energy = HC_EV_NM / wavelength
+    if np.all(wavelength[1:] > wavelength[:-1]):
+        # the usual increasing wavelengths only have to be reversed
+        photon_energy, eqe, wavelength = photon_energy[::-1], eqe[::-1], wavelength[::-1]
+    else:
+        order = np.argsort(photon_energy)
+        photon_energy, eqe, wavelength = photon_energy[order], eqe[order], wavelength[order]
+    result = {'photon_energy': photon_energy, 'wavelength': wavelength, 'eqe': eqe,
+              'jsc': None, 'bandgap': None, 'urbach_energy': None, 'j0': None, 'voc_rad': None}
+    if photon_energy.size < 2:
+        return result
+
+    spectrum = spectrum or load_am15g()
+    if spectrum is not None:
+        flux = np.interp(photon_energy, spectrum[0], spectrum[1], left=0., right=0.)
+        result['jsc'] = float(
+            _cumulative_trapezoid(eqe * flux, photon_energy).max() * ELEMENTARY_CHARGE * 1e4)
+
+    points = min(SMOOTHING_POINTS, photon_energy.size)
+    smoothed = np.convolve(eqe, np.ones(points) / points, mode='same')
+    derivative = np.gradient(smoothed, photon_energy)
+    # the moving average is biased at the ends of the range
+    derivative[:points // 2] = -np.inf
+    if points // 2:
+        derivative[-(points // 2):] = -np.inf
+    result['bandgap'] = float(photon_energy[np.argmax(derivative)])
+
+    tail = fit_urbach_tail(photon_energy, eqe, result['bandgap'])
+    if tail is not None:
+        result['urbach_energy'] = tail[0]
+    result['j0'] = radiative_j0(photon_energy, eqe, tail)
+    if result['jsc'] and result['j0']:
+        result['voc_rad'] = float(
+            BOLTZMANN_EV * TEMPERATURE * np.log(result['jsc'] / result['j0'] + 1))
+    return result
+
+
+def get_eqe_archive(eqe_dict, analysis, eqe_section):
+    from nomad.units import ureg
+
+    eqe_section.header_lines = eqe_dict['header_lines']
+    eqe_section.measured = True
+    eqe_section.raw_wavelength_array = eqe_dict['wavelength'] * ureg('nm')
+    eqe_section.raw_photon_energy_array = HC_EV_NM / eqe_dict['wavelength'] * ureg('eV')
+    eqe_section.raw_eqe_array = eqe_dict['eqe']
+    eqe_section.wavelength_array = analysis['wavelength'] * ureg('nm')
+    eqe_section.photon_energy_array = analysis['photon_energy'] * ureg('eV')
+    eqe_section.eqe_array = analysis['eqe']
+    if analysis['bandgap'] is not None:
+        eqe_section.bandgap_eqe = analysis['bandgap'] * ureg('eV')
+    if analysis['jsc'] is not None:
+        eqe_section.integrated_jsc = analysis['jsc'] * ureg('A/m**2')
+    if analysis['j0'] is not None:
+        eqe_section.integrated_j0 = analysis['j0'] * ureg('A/m**2')
+    if analysis['voc_rad'] is not None:
+        eqe_section.voc_rad = analysis['voc_rad'] * ureg('V')
+    if analysis['urbach_energy'] is not None:
+        eqe_section.urbach_energy = analysis['urbach_energy'] * ureg('eV')
@@ -0,0 +1,210 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Timings and counters of the hot paths of the parser and the normalizers. A trace
+covers the processing of one entry, the code marks its stages with `stage` and adds
+counters (bytes, rows, cache hits and misses) with `count`. At the end of the trace
+the stages are logged with the NOMAD logger and added to the totals of the upload,
+which are logged every UPLOAD_REPORT_INTERVAL traces.
+
+Only a fraction of the entries is traced (config.instrumentation_sample_rate), outside
+of a trace `stage` and `count` do nothing. Stages nest, the time of a stage includes
+the time of the stages within it.
+'''
+
+import functools
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from . import config
+
+COUNTERS = ('bytes', 'rows', 'cache_hits', 'cache_misses')
+UPLOAD_REPORT_INTERVAL = 100
+# upload totals kept per process
+MAX_UPLOADS = 64
+
+
+class StageStats:
+    __slots__ = ('calls', 'wall', 'cpu') + COUNTERS
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def add(self, other):
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def to_dict(self):
+        result = dict(calls=self.calls, wall=round(self.wall, 6), cpu=round(self.cpu, 6))
+        result.update((name, getattr(self, name)) for name in COUNTERS if getattr(self, name))
+        return result
+
+
+class Trace:
+    def __init__(self, upload_id, entry):
+        self.upload_id = upload_id
+        self.entry = entry
+        self.stages = {}
+        self.path = []
+
+    def get_stage(self, name):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        return stats
+
+    def count(self, **counters):
+        stats = self.get_stage(self.path[-1] if self.path else 'entry')
+        for name, value in counters.items():
+            setattr(stats, name, getattr(stats, name) + value)
+
+    def to_dict(self):
+        return {name: stats.to_dict() for name, stats in self.stages.items()}
+
+
+class UploadStats:
+    def __init__(self):
+        self.traces = 0
+        self.stages = {}
+
+    def add(self, trace):
+        self.traces += 1
+        for name, stats in trace.stages.items():
+            self.stages.setdefault(name, StageStats()).add(stats)
+
+    def to_dict(self):
+        return {name: stats.to_dict() for name, stats in self.stages.items()}
+
+
+# the trace of the current entry, False if the entry is not sampled
+_current = ContextVar('chose_trace', default=None)
+_uploads = OrderedDict()
+_lock = threading.Lock()
+
+
+def is_enabled():
+    return config.instrumentation and config.instrumentation_sample_rate > 0
+
+
+@contextmanager
+def trace(logger, upload_id, entry):
+    '''
+    Traces the processing of one entry. Within another trace, including one that was
+    not sampled, it continues that trace.
+    '''
+    if _current.get() is not None:
+        yield
+        return
+
+    sampled = is_enabled() and random.random() < config.instrumentation_sample_rate
+    current = Trace(upload_id, entry) if sampled else False
+    token = _current.set(current)
+    try:
+        with stage('total'):
+            yield
+    finally:
+        _current.reset(token)
+        if current:
+            _report(logger, current)
+
+
+@contextmanager
+def stage(name, **counters):
+    current = _current.get()
+    if not current:
+        yield
+        return
+
+    stats = current.get_stage(name)
+    current.path.append(name)
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        stats.wall += time.perf_counter() - wall
+        stats.cpu += time.thread_time() - cpu
+        stats.calls += 1
+        current.path.pop()
+        for counter, value in counters.items():
+            setattr(stats, counter, getattr(stats, counter) + value)
+
+
+def count(**counters):
+    # adds the counters to the innermost stage of the current trace
+    current = _current.get()
+    if current:
+        current.count(**counters)
+
+
+def instrumented(normalize):
+    # traces the normalize(self, archive, logger) of a measurement section
+    @functools.wraps(normalize)
+    def wrapper(self, archive, logger):
+        metadata = getattr(archive, 'metadata', None)
+        entry = getattr(self, 'data_file', None) or type(self).__name__
+        with trace(logger, getattr(metadata, 'upload_id', None), entry):
+            with stage('normalize'):
+                return normalize(self, archive, logger)
+    return wrapper
+
+
+def get_upload_stats(upload_id):
+    with _lock:
+        stats = _uploads.get(upload_id)
+        return None if stats is None else dict(traces=stats.traces, stages=stats.to_dict())
+
+
+def report_upload(logger, upload_id):
+    # logs and removes the totals of an upload
+    with _lock:
+        stats = _uploads.pop(upload_id, None)
+    if stats is not None and logger is not None:
+        _log_upload(logger, upload_id, stats.traces, stats.to_dict())
+
+
+def _log_upload(logger, upload_id, traces, stages):
+    logger.info(
+        'chose parser upload timings', upload_id=upload_id, traces=traces,
+        sample_rate=config.instrumentation_sample_rate, stages=stages)
+
+
+def _report(logger, current):
+    with _lock:
+        stats = _uploads.get(current.upload_id)
+        if stats is None:
+            stats = _uploads[current.upload_id] = UploadStats()
+            while len(_uploads) > MAX_UPLOADS:
+                _uploads.popitem(last=False)
+        stats.add(current)
+        if stats.traces % UPLOAD_REPORT_INTERVAL == 0:
+            report = (stats.traces, stats.to_dict())
+        else:
+            report = None
+    if logger is None:
+        return
+    logger.info(
+        'chose parser timings', upload_id=current.upload_id, entry=current.entry,
+        stages=current.to_dict())
+    if report:
+        _log_upload(logger, current.upload_id, *report)
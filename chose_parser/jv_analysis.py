@@ -0,0 +1,170 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import numpy as np
+
+# number of points on each side of Voc and of V=0 used for the resistance fits
+FIT_POINTS = 3
+
+# keys of the instrument summary in the jv_dict and their relative tolerances
+TOLERANCES = {
+    'J_sc': 0.02,
+    'V_oc': 0.02,
+    'Fill_factor': 0.03,
+    'Efficiency': 0.03,
+    'P_MPP': 0.03,
+    'J_MPP': 0.05,
+    'U_MPP': 0.05,
+    'R_ser': 0.5,
+    'R_par': 0.5,
+}
+
+
+def _stack(arrays):
+    # curves of different length are padded with nan
+    points = max((len(array) for array in arrays), default=0)
+    result = np.full((len(arrays), points), np.nan)
+    for index, array in enumerate(arrays):
+        result[index, :len(array)] = array
+    return result
+
+
+def _interpolate_zero(x, y, index):
+    # x where y crosses zero between index - 1 and index, row by row
+    rows = np.arange(x.shape[0])
+    x0, x1 = x[rows, index - 1], x[rows, index]
+    y0, y1 = y[rows, index - 1], y[rows, index]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return x0 - y0 * (x1 - x0) / (y1 - y0)
+
+
+def _fit_resistance(voltage, current_density, index, active_area):
+    # |dV/dJ| from a least squares line through the points around index, in Ohm
+    # (or Ohm cm² without an area), J is in mA/cm²
+    points = voltage.shape[1]
+    window = index[:, None] + np.arange(-FIT_POINTS, FIT_POINTS)[None, :]
+    window = np.clip(window, 0, points - 1)
+    rows = np.arange(voltage.shape[0])[:, None]
+    x = voltage[rows, window]
+    y = current_density[rows, window]
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x = np.where(valid, x, 0.)
+    y = np.where(valid, y, 0.)
+    n = valid.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (n * (x * y).sum(axis=1) - x.sum(axis=1) * y.sum(axis=1)) / (
+            n * (x * x).sum(axis=1) - x.sum(axis=1) ** 2)
+        resistance = np.abs(1e3 / slope)
+    if active_area:
+        resistance = resistance / active_area
+    return resistance
+
+
+def compute_jv_parameters(voltages, current_densities, active_area=None, intensity=100.):
+    '''
+    Computes the figures of merit of all given curves at once. Voltages are in V,
+    current densities in mA/cm² and the intensity in mW/cm². Returns a dict of
+    arrays with one value per curve, keyed like the instrument values in the jv_dict.
+    '''
+    voltage = _stack(voltages)
+    current_density = _stack(current_densities)
+    n_curves = voltage.shape[0]
+    if n_curves == 0 or voltage.shape[1] < 2:
+        return {key: np.full(n_curves, np.nan) for key in TOLERANCES}
+
+    # generated current is counted positive, whatever the sign convention of the file:
+    # the sign is taken from the current at the voltage closest to 0
+    rows = np.arange(n_curves)
+    closest = np.argmin(np.where(np.isnan(voltage), np.inf, np.abs(voltage)), axis=1)
+    sign = np.where(current_density[rows, closest] < 0, -1., 1.)
+    current_density = current_density * sign[:, None]
+
+    # sort each curve by voltage, nan go to the end
+    order = np.argsort(voltage, axis=1)
+    voltage = np.take_along_axis(voltage, order, axis=1)
+    current_density = np.take_along_axis(current_density, order, axis=1)
+    valid = ~(np.isnan(voltage) | np.isnan(current_density))
+    n_valid = valid.sum(axis=1)
+
+    # Jsc: J interpolated at V = 0, only if the scan covers V = 0
+    index_sc = np.clip((voltage < 0).sum(axis=1), 1, np.maximum(n_valid - 1, 1))
+    covered = (voltage[:, 0] <= 0) & (voltage[rows, np.maximum(n_valid - 1, 0)] >= 0)
+    j_sc = np.where(covered, _interpolate_zero(current_density, voltage, index_sc), np.nan)
+
+    # Voc: first point where the current becomes negative
+    negative = valid & (current_density <= 0) & (voltage > 0)
+    index_oc = np.clip(np.argmax(negative, axis=1), 1, None)
+    v_oc = np.where(negative.any(axis=1), _interpolate_zero(voltage, current_density, index_oc), np.nan)
+
+    # MPP: maximum of the power in the power generating quadrant
+    power = np.where(valid & (voltage >= 0) & (current_density >= 0), voltage * current_density, -np.inf)
+    index_mpp = np.argmax(power, axis=1)
+    p_mpp = power[rows, index_mpp]
+    p_mpp = np.where(np.isfinite(p_mpp), p_mpp, np.nan)
+    u_mpp = np.where(np.isfinite(p_mpp), voltage[rows, index_mpp], np.nan)
+    j_mpp = np.where(np.isfinite(p_mpp), current_density[rows, index_mpp], np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fill_factor = 100 * p_mpp / (j_sc * v_oc)
+        efficiency = 100 * p_mpp / intensity
+
+    return {
+        'J_sc': j_sc,
+        'V_oc': v_oc,
+        'Fill_factor': fill_factor,
+        'Efficiency': efficiency,
+        'P_MPP': p_mpp,
+        'J_MPP': j_mpp,
+        'U_MPP': u_mpp,
+        'R_ser': _fit_resistance(voltage, current_density, index_oc, active_area),
+        'R_par': _fit_resistance(voltage, current_density, index_sc, active_area),
+    }
+
+
+def compare_jv_parameters(jv_dict, computed, tolerances=TOLERANCES):
+    '''
+    Compares the instrument values in the jv_dict with the computed ones, curve i
+    with row i of the instrument summary. Returns a list of disagreements
+    (curve name, key, instrument value, computed value).
+    '''
+    disagreements = []
+    for key, rtol in tolerances.items():
+        for index, instrument in enumerate(jv_dict.get(key, [])[:len(jv_dict['jv_curve'])]):
+            value = computed[key][index]
+            if not np.isfinite(value):
+                continue
+            # the parser writes 0 for values the instrument could not determine
+            if instrument == 0 or not np.isclose(abs(instrument), value, rtol=rtol, atol=0):
+                disagreements.append((jv_dict['jv_curve'][index]['name'], key, instrument, float(value)))
+    return disagreements
+
+
+def validate_jv_parameters(jv_dict, logger, intensity=None):
+    # the efficiencies are computed at the intensity of the file header, 1 sun without it
+    intensity = intensity or jv_dict.get('intensity') or 100.
+    curves = jv_dict['jv_curve']
+    computed = compute_jv_parameters(
+        [curve['voltage'] for curve in curves],
+        [curve['current_density'] for curve in curves],
+        jv_dict.get('active_area'), intensity)
+    disagreements = compare_jv_parameters(jv_dict, computed)
+    for name, key, instrument, value in disagreements:
+        logger.warning(
+            'instrument JV parameter disagrees with the curve',
+            curve=name, parameter=key, instrument_value=instrument, computed_value=value)
+    return computed, disagreements
@@ -16,74 +16,75 @@
 # limitations under the License.
 #
 
-import chardet
-import pandas as pd
 import numpy as np
-import ast
 
+from .numeric import read_table
+
+# Line offsets of the blocks in the files written by the Chose JV setup.
+HEADER_START = 11
+HEADER_ROWS = 8
+TABLE_START = 42
+CURVES_START = 46
+
+TABLE_COLUMNS = {
+    'J_sc': 'Jsc',
+    'V_oc': 'Voc',
+    'Fill_factor': 'FF',
+    'Efficiency': 'Eff',
+    'P_MPP': 'P_MPP',
+    'J_MPP': 'J_MPP',
+    'U_MPP': 'V_MPP',
+    'R_ser': 'Rs',
+    'R_par': 'R//',
+}
+
+
+def _split(line):
+    return line.rstrip('\r\n').split('\t')
+
+
+def _to_float(value):
+    # the instrument writes inf/nan for values it could not determine
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.
+    return value if np.isfinite(value) else 0.
 
-def get_jv_data(filename, encoding='utf-8'):
-    # Block to clean up some bad characters found in the file which gives
-    # trouble reading.
-
-    df = pd.read_csv(
-        filename,
-        skiprows=42,
-        header=[0, 1],
-        nrows=2,
-        sep='\t',
-        index_col=0,
-        engine='python',
-        encoding=encoding)
-
-    df_header = pd.read_csv(
-        filename,
-        skiprows=11,
-        nrows=8,
-        header=None,
-        sep='\t',
-        index_col=0,
-        encoding=encoding,
-        engine='python')
-
-    df_curves = pd.read_csv(
-        filename,
-        skiprows=46,
-        on_bad_lines='skip',
-        sep='\t',
-        encoding=encoding,
-        engine='python')
-    df_curves = df_curves.dropna(how='all', axis=1)
-
-    df_header.replace([np.inf, -np.inf, np.nan], 0, inplace=True)
-    df.replace([np.inf, -np.inf, np.nan], 0, inplace=True)
+
+def read_jv_data(f):
+    # Reads the file once: the preamble line by line, the curve block in one go.
+    preamble = [f.readline() for _ in range(CURVES_START)]
+    curves = f.read()
+
+    header = [_split(line) for line in preamble[HEADER_START:HEADER_START + HEADER_ROWS]]
+    header_values = [row[1] if len(row) > 1 else None for row in header]
+
+    names = _split(preamble[TABLE_START])
+    rows = [_split(line) for line in preamble[TABLE_START + 2:CURVES_START]]
 
     jv_dict = {}
-    jv_dict['active_area'] = float(df_header.iloc[7, 0])
-
-    jv_dict['J_sc'] = list(df["Jsc"]["mA/cm²"])
-    jv_dict['V_oc'] = list(df["Voc"]["V"])
-    jv_dict['Fill_factor'] = list(df["FF"]["%"])
-    jv_dict['Efficiency'] = list(df["Eff"]["%"])
-    jv_dict['P_MPP'] = list(df["P_MPP"]["mW/cm²"])
-    jv_dict['J_MPP'] = list(df["J_MPP"]["mA/cm²"])
-    jv_dict['U_MPP'] = list(df["V_MPP"]["V"])
-    jv_dict['R_ser'] = list(df["Rs"]["Ohm"])
-    jv_dict['R_par'] = list(df["R//"]["Ohm"])
+    jv_dict['intensity'] = _to_float(header_values[2])
+    jv_dict['active_area'] = _to_float(header_values[7])
+
+    for key, column in TABLE_COLUMNS.items():
+        index = names.index(column)
+        jv_dict[key] = [_to_float(row[index]) if index < len(row) else 0. for row in rows]
+
+    # one float64 array of shape (points, 2 * pixels), the curves are views into it
+    names, curve_data = read_table(curves)
 
     jv_dict['jv_curve'] = []
 
-    scan_direction = ["FW", "RV"] if str(df_header.iloc[3, 0]).strip() == "FW->RV" else ["RV", "FW"]
-    for column in range(0, len(df_curves.columns), 2):
-        jv_dict['jv_curve'].append({'name': scan_direction[int(column/2) % 2] + " " + df_curves.columns[column],
-                                    'voltage': df_curves[df_curves.columns[column]].values,
-                                    'current_density': df_curves[df_curves.columns[column+1]].values})
+    scan_direction = ["FW", "RV"] if str(header_values[3]).strip() == "FW->RV" else ["RV", "FW"]
+    for column in range(0, len(names), 2):
+        jv_dict['jv_curve'].append({'name': scan_direction[int(column/2) % 2] + " " + names[column],
+                                    'voltage': curve_data[:, column],
+                                    'current_density': curve_data[:, column+1]})
 
     return jv_dict
 
 
-# file = "/home/a2853/Documents/Projects/nomad/chose/18.33.10/001_2023_10_19_18.33.25_1A_3C_C1_1_JV.txt"
-# with open(file, "br") as f:
-#     encoding = chardet.detect(f.read())["encoding"]
-# print(encoding)
-# get_jv_data(file, encoding)
+def get_jv_data(filename, encoding='utf-8'):
+    with open(filename, encoding=encoding) as f:
+        return read_jv_data(f)
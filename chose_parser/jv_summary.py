@@ -0,0 +1,200 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Compact per-sample and per-batch summaries of the JV measurements of an upload. Each
+normalized Chose_JVmeasurement writes the figures of merit of its data file to
+`<data_file>.jv_record.json` and rebuilds `<search_id>.jv_summary.json` from the records
+of its sample. Normalizing a Chose_Batch rebuilds `<batch_id>.jv_summary.json` from the
+summaries of its samples. A query for a sample or a batch then reads one small file.
+Records whose data file was removed or renamed are left out.
+'''
+
+import json
+import os
+
+import numpy as np
+
+from .raw_io import update_json_file
+
+FIGURES_OF_MERIT = [
+    'J_sc', 'V_oc', 'Fill_factor', 'Efficiency', 'P_MPP', 'J_MPP', 'U_MPP', 'R_ser', 'R_par']
+
+RECORD_SUFFIX = '.jv_record.json'
+SUMMARY_SUFFIX = '.jv_summary.json'
+
+
+def get_batch_id(search_id):
+    # sample ids are the batch id followed by the sample number
+    return search_id.rsplit('_', 1)[0]
+
+
+def _value(value):
+    return float(value) if value is not None and np.isfinite(value) and value != 0 else None
+
+
+def measurement_record(jv_dict, computed=None):
+    '''
+    Figures of merit of all curves of one measurement. Values the instrument could not
+    determine are taken from the `computed` ones of the jv_analysis if available. The
+    curves alternate between the two scan directions, every pair of curves gives the
+    hysteresis index (PCE_RV - PCE_FW) / PCE_RV.
+    '''
+    names = [curve['name'] for curve in jv_dict['jv_curve']]
+    record = {'curves': names}
+    for key in FIGURES_OF_MERIT:
+        values = []
+        for index in range(len(names)):
+            value = _value(jv_dict[key][index]) if index < len(jv_dict.get(key, [])) else None
+            if value is None and computed is not None:
+                value = _value(computed[key][index])
+            values.append(value)
+        record[key] = values
+
+    hysteresis = []
+    for index in range(0, len(names) - 1, 2):
+        efficiency = dict(zip(
+            (name.split(' ')[0] for name in names[index:index + 2]),
+            record['Efficiency'][index:index + 2]))
+        forward, reverse = efficiency.get('FW'), efficiency.get('RV')
+        hysteresis.append((reverse - forward) / reverse if forward and reverse else None)
+    record['hysteresis_index'] = hysteresis
+    return record
+
+
+def _statistics(values, key):
+    values = np.array([value for value in values if value is not None])
+    if values.size == 0:
+        return {'n': 0, 'best': None, 'median': None, 'stdev': None}
+    if key == 'R_ser':
+        best = values.min()
+    elif key == 'hysteresis_index':
+        best = values[np.abs(values).argmin()]
+    else:
+        best = values.max()
+    return {
+        'n': int(values.size),
+        'best': float(best),
+        'median': float(np.median(values)),
+        'stdev': float(values.std(ddof=1)) if values.size > 1 else 0.}
+
+
+def summarize(records):
+    # best/median/stdev of every figure of merit over all curves of the records
+    return {
+        key: _statistics([value for record in records for value in record[key]], key)
+        for key in FIGURES_OF_MERIT + ['hysteresis_index']}
+
+
+def write_jv_record(archive, data_file, search_id, record):
+    '''
+    Writes the record of `data_file` to `<data_file>.jv_record.json`, only the entry of
+    the data file writes it.
+    '''
+    content = {
+        'data_file': data_file, 'search_id': search_id, 'batch_id': get_batch_id(search_id),
+        'record': record}
+    with archive.m_context.raw_file(f'{data_file}{RECORD_SUFFIX}', 'w') as f:
+        json.dump(content, f, indent=1)
+
+
+def _list(context, directory, prefix, suffix):
+    try:
+        names = os.listdir(os.path.join(context.raw_path(), directory))
+    except (AttributeError, NotImplementedError, OSError):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in names
+        if name.startswith(prefix) and name.endswith(suffix))
+
+
+def _load(context, path):
+    try:
+        with context.raw_file(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_jv_records(archive, directory='', search_id=None):
+    # the records in directory, of one sample if given, whose data file still exists
+    context = archive.m_context
+    prefix = f'{search_id}.' if search_id else ''
+    records = []
+    for path in _list(context, directory, prefix, RECORD_SUFFIX):
+        content = _load(context, path)
+        if content is not None and context.raw_path_exists(content['data_file']):
+            records.append(content)
+    return records
+
+
+def get_summary_path(summary_id, directory=''):
+    return os.path.join(directory, f'{summary_id}{SUMMARY_SUFFIX}')
+
+
+def sample_summary(records, search_id):
+    measurements = {
+        content['data_file']: content['record'] for content in records
+        if content['search_id'] == search_id}
+    return {
+        'search_id': search_id, 'batch_id': get_batch_id(search_id),
+        'measurements': measurements, 'summary': summarize(list(measurements.values()))}
+
+
+def batch_summary(samples, batch_id):
+    # from the summaries of the samples, which hold the records of their measurements
+    samples = {
+        sample['search_id']: sample for sample in samples if sample['batch_id'] == batch_id}
+    return {
+        'batch_id': batch_id,
+        'samples': {search_id: samples[search_id]['summary'] for search_id in sorted(samples)},
+        'summary': summarize([
+            record for search_id in sorted(samples)
+            for record in samples[search_id]['measurements'].values()])}
+
+
+def update_sample_summary(archive, search_id, directory=''):
+    '''
+    Rebuilds `<search_id>.jv_summary.json` from the records of the sample. The summary
+    is locked while the records are listed, the last entry of a sample that finishes
+    sees the records of all others.
+    '''
+    def update(summary):
+        records = load_jv_records(archive, directory, search_id)
+        summary.clear()
+        summary.update(sample_summary(records, search_id))
+    update_json_file(archive, get_summary_path(search_id, directory), update)
+
+
+def write_batch_summary(archive, batch_id, directory=''):
+    # rebuilds `<batch_id>.jv_summary.json` from the summaries of the samples of the batch
+    context = archive.m_context
+    samples = []
+    for path in _list(context, directory, f'{batch_id}_', SUMMARY_SUFFIX):
+        content = _load(context, path)
+        if content is not None and 'search_id' in content:
+            samples.append(content)
+    summary = batch_summary(samples, batch_id)
+    with context.raw_file(get_summary_path(batch_id, directory), 'w') as f:
+        json.dump(summary, f, indent=1)
+    return summary
+
+
+def load_jv_summary(archive, summary_id, directory=''):
+    # the summary of a sample or a batch, None if there is none
+    return _load(archive.m_context, get_summary_path(summary_id, directory))
@@ -1,45 +1,157 @@
-import pandas as pd
+import itertools
+import os
+
 import numpy as np
 from datetime import datetime
-import chardet
 # import glob
 
-from baseclasses.solar_energy.mpp_tracking import MPPTrackingProperties
+from .downsampling import decimate
+from .numeric import ColumnBuffer, parse_numeric_block, parse_numeric_lines, unique_names
+
+MPP_HEADER_LINES = 42
+CHUNK_LINES = 1 << 16
+# number of points of the decimated series stored for plotting
+PREVIEW_RESOLUTIONS = (1000, 10000)
+MPP_COLUMNS = ["Time (hours) ", "P (mWcm-2)", "V (V)", "J (mAcm-2)"]
 
 
 def get_parameter(d, key):
     return d[key] if key in d else None
 
 
-def get_mpp_data(filename, encoding='utf-8'):
+def normalize_header_key(key):
+    # "Perturbation frequency (s):" -> "perturbation_frequency_[s]"
+    key = key.strip().rstrip(':').strip().lower()
+    key = key.replace('(', '[').replace(')', ']')
+    return '_'.join(key.split())
+
+
+def convert_header_value(value):
+    value = value.strip()
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
 
-    df = pd.read_csv(
-        filename,
-        skiprows=42,
-        sep='\t',
-        # index_col=0,
-        encoding=encoding,
-        engine='python')
+def parse_mpp_header(lines):
     header_dict = {}
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if '\t' in line:
+            key, value = line.split('\t', 1)
+        else:
+            key, _, value = line.partition(':')
+        key = normalize_header_key(key)
+        if not key or key.startswith('#') or not value.strip():
+            continue
+        header_dict[key] = convert_header_value(value)
+    return header_dict
+
+
+def check_mpp_columns(names):
+    # cheap check on the column header before any data is parsed
+    missing = [column for column in MPP_COLUMNS if column not in names]
+    if missing:
+        raise ValueError(
+            f'not a Chose MPP tracking file, the columns {missing} are missing in line '
+            f'{MPP_HEADER_LINES + 1}')
+
+
+def read_mpp_data(f, chunk_lines=CHUNK_LINES, size_hint=None):
+    # Streams the tracking data in chunks of lines into one growable float buffer,
+    # the returned columns are contiguous views indexed by the column names.
+    if size_hint is None:
+        try:
+            size_hint = os.fstat(f.fileno()).st_size
+        except (AttributeError, OSError):
+            pass
+
+    header_dict = parse_mpp_header([f.readline() for _ in range(MPP_HEADER_LINES)])
+
+    names = f.readline().rstrip('\r\n').split('\t')
+    check_mpp_columns(names)
+    nfields = len(names)
+    ncols = nfields
+    while ncols > 0 and not names[ncols - 1].strip():
+        ncols -= 1
+    names = unique_names(names[:ncols])
+
+    capacity = 1024
+    buffer = None
+    while True:
+        lines = list(itertools.islice(f, chunk_lines))
+        if not lines:
+            break
+        block = ''.join(lines)
+        data = parse_numeric_block(block, ncols)
+        if data is None:
+            data = parse_numeric_lines(lines, nfields)[:, :ncols]
+        if buffer is None:
+            if size_hint:
+                # estimate the number of rows from the bytes per row of the first chunk
+                capacity = int(1.05 * size_hint * len(lines) / max(len(block), 1)) + 1
+            buffer = ColumnBuffer(ncols, capacity)
+        buffer.append(data)
+        del lines, block, data
+
+    columns = buffer.columns() if buffer is not None else np.empty((ncols, 0))
+    return header_dict, dict(zip(names, columns))
+
+
+def get_mpp_data(filename, encoding='utf-8'):
+    with open(filename, encoding=encoding) as f:
+        return read_mpp_data(f)
+
+
+def get_preview_resolutions(n_points):
+    # the lowest resolution is always stored for the default plot, the higher ones only
+    # if they would not be a copy of the series
+    return [PREVIEW_RESOLUTIONS[0]] + [
+        resolution for resolution in PREVIEW_RESOLUTIONS[1:] if resolution < n_points]
+
+
+def get_preview_series(data):
+    series = dict(zip(['time', 'power_density', 'voltage', 'current_density'],
+                      (data[column] for column in MPP_COLUMNS)))
+    # without a PCE column, the efficiency in % at 100 mW/cm**2 is the power density
+    series['efficiency'] = data['PCE'] if 'PCE' in data else series['power_density']
+    return series
+
+
+def get_mpp_previews(data):
+    from .schema import ChoseMPPTrackingPreview
 
-    return header_dict, df
+    series = get_preview_series(data)
+    previews = []
+    for resolution in get_preview_resolutions(len(series['time'])):
+        previews.append(ChoseMPPTrackingPreview(
+            resolution=resolution, **decimate(series, 'efficiency', resolution)))
+    return previews
 
 
-def get_mpp_archive(header_dict, df, mpp_entitiy, mainfile=None):
+def get_mpp_archive(header_dict, data, mpp_entitiy, mainfile=None, full_resolution=True):
+    from baseclasses.solar_energy.mpp_tracking import MPPTrackingProperties
 
-    mpp_entitiy.time = np.array(df["Time (hours) "])
-    mpp_entitiy.power_density = np.array(df["P (mWcm-2)"])
-    mpp_entitiy.voltage = np.array(df["V (V)"])
-    mpp_entitiy.current_density = np.array(df["J (mAcm-2)"])
-    # mpp_entitiy.efficiency = np.array(df["PCE"])
+    # without full resolution only the previews are stored, e.g. with an array sidecar
+    if full_resolution:
+        mpp_entitiy.time = data["Time (hours) "]
+        mpp_entitiy.power_density = data["P (mWcm-2)"]
+        mpp_entitiy.voltage = data["V (V)"]
+        mpp_entitiy.current_density = data["J (mAcm-2)"]
+    # mpp_entitiy.efficiency = data["PCE"]
+    mpp_entitiy.previews = get_mpp_previews(data)
     if mainfile is not None:
         mpp_entitiy.data_file = mainfile
 
     datetime_str = get_parameter(header_dict, "datetime")
-    datetime_object = datetime.strptime(
-        datetime_str, '%Y-%m-%d %I:%M %p')
-    mpp_entitiy.datetime = datetime_object.strftime(
-        "%Y-%m-%d %H:%M:%S.%f")
+    if datetime_str is not None:
+        datetime_object = datetime.strptime(
+            datetime_str, '%Y-%m-%d %I:%M %p')
+        mpp_entitiy.datetime = datetime_object.strftime(
+            "%Y-%m-%d %H:%M:%S.%f")
 
     properties = MPPTrackingProperties()
     properties.start_voltage_manually = get_parameter(
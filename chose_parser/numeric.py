@@ -0,0 +1,141 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import warnings
+
+import numpy as np
+
+
+def unique_names(names):
+    # the column names pandas.read_csv would give, i.e. "Unnamed: i" for empty and
+    # "name.1" for repeated names
+    result, seen = [], {}
+    for index, name in enumerate(names):
+        name = name if name else f'Unnamed: {index}'
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        result.append(name)
+    return result
+
+
+def is_numeric_line(line):
+    # a row of at least two whitespace separated numbers
+    fields = line.split()
+    if len(fields) < 2:
+        return False
+    try:
+        for field in fields:
+            float(field)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_numeric_block(text, ncols, dtype=np.float64):
+    '''
+    Parses whitespace separated numbers into one C-contiguous array of shape
+    (rows, ncols). Returns None if the block is not a complete numeric table.
+    '''
+    with warnings.catch_warnings():
+        # older numpy versions only warn about unparsable data
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            values = np.fromstring(text, dtype=dtype, sep=' ')
+        except (ValueError, DeprecationWarning):
+            return None
+
+    stripped = text.strip()
+    nrows = stripped.count('\n') + 1 if stripped else 0
+    if ncols == 0 or values.size != nrows * ncols:
+        return None
+    return values.reshape(nrows, ncols)
+
+
+def parse_numeric_lines(lines, ncols, sep='\t', dtype=np.float64):
+    # slow path with the semantics of pandas.read_csv(on_bad_lines='skip'):
+    # rows with too many fields are skipped, missing and unparsable fields are nan
+    rows = []
+    for line in lines:
+        fields = line.rstrip('\r\n').split(sep)
+        if not line.strip() or len(fields) > ncols:
+            continue
+        row = []
+        for field in fields:
+            try:
+                row.append(float(field))
+            except ValueError:
+                row.append(np.nan)
+        rows.append(row + [np.nan] * (ncols - len(row)))
+    return np.array(rows, dtype=dtype).reshape(len(rows), ncols)
+
+
+def read_table(text, sep='\t', dtype=np.float64):
+    '''
+    Reads a table with one header line into the column names and a 2-D array.
+    Columns that contain only nan are dropped like `DataFrame.dropna(how='all', axis=1)`.
+    '''
+    header, _, body = text.partition('\n')
+    names = header.rstrip('\r').split(sep)
+
+    # a trailing separator in the header adds an empty column without data
+    ncols = len(names)
+    while ncols > 0 and not names[ncols - 1].strip():
+        ncols -= 1
+
+    data = parse_numeric_block(body, ncols, dtype)
+    if data is None:
+        data = parse_numeric_lines(body.split('\n'), len(names), sep, dtype)
+    else:
+        names = names[:ncols]
+    names = unique_names(names)
+
+    keep = ~np.isnan(data).all(axis=0)
+    if not keep.all():
+        data = data[:, keep]
+        names = [name for name, kept in zip(names, keep) if kept]
+    return names, data
+
+
+class ColumnBuffer:
+    '''
+    Growable column-major float buffer for tables that are parsed in chunks. Each
+    column of the result is a contiguous view, growing doubles the capacity.
+    '''
+
+    def __init__(self, ncols, capacity=1024, dtype=np.float64):
+        self.size = 0
+        self._data = np.empty((ncols, max(capacity, 1)), dtype=dtype)
+
+    def append(self, block):
+        rows = block.shape[0]
+        capacity = self._data.shape[1]
+        if self.size + rows > capacity:
+            data = np.empty((self._data.shape[0], max(2 * capacity, self.size + rows)), self._data.dtype)
+            data[:, :self.size] = self._data[:, :self.size]
+            self._data = data
+        self._data[:, self.size:self.size + rows] = block.T
+        self.size += rows
+
+    def columns(self):
+        # trim when more than half of the capacity is unused
+        if self.size < self._data.shape[1] // 2:
+            self._data = self._data[:, :self.size].copy()
+        return self._data[:, :self.size]
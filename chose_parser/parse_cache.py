@@ -0,0 +1,219 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from . import config
+from .instrumentation import count, stage
+
+# Bump this whenever the output of read_jv_data or read_mpp_data changes, it is part
+# of every cache key and invalidates all previously cached results.
+PARSER_VERSION = 2
+# fraction of max_bytes a process stores before it scans the directory for eviction
+EVICT_FRACTION = 1 / 16
+
+
+class ParseCache:
+    '''
+    On-disk cache of parsed raw files keyed by the hash of the file content and the
+    parser version. Each result is one uncompressed npz file, the least recently used
+    files are removed once the directory exceeds `max_bytes`. The directory is scanned
+    for that each time the process has stored another `EVICT_FRACTION` of `max_bytes`.
+    '''
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evict_interval = int(max_bytes * EVICT_FRACTION)
+        # bytes stored since the last scan, the first store scans
+        self._stored = self.evict_interval
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, kind, digest):
+        return os.path.join(self.directory, f'{kind}-v{PARSER_VERSION}-{digest}.npz')
+
+    def load(self, kind, digest):
+        path = self._path(kind, digest)
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+        except (OSError, ValueError, KeyError):
+            return None
+        # the modification time orders the files for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return arrays
+
+    def store(self, kind, digest, arrays):
+        path = self._path(kind, digest)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._stored += size
+        if self._stored >= self.evict_interval:
+            self.evict()
+
+    def evict(self):
+        self._stored = 0
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.npz'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+_parse_cache = None
+
+
+def get_parse_cache():
+    global _parse_cache
+    if _parse_cache is None and config.parse_cache_directory:
+        try:
+            _parse_cache = ParseCache(config.parse_cache_directory, config.parse_cache_max_bytes)
+        except OSError:
+            return None
+    return _parse_cache
+
+
+def content_digest(raw):
+    return hashlib.sha256(raw).hexdigest()
+
+
+def pack_jv_dict(jv_dict):
+    arrays = {
+        key: np.asarray(value, dtype=np.float64) for key, value in jv_dict.items()
+        if key != 'jv_curve'}
+    curves = jv_dict['jv_curve']
+    arrays['curve_names'] = np.array([curve['name'] for curve in curves], dtype=str)
+    columns = []
+    for curve in curves:
+        columns += [curve['voltage'], curve['current_density']]
+    arrays['curve_data'] = np.column_stack(columns) if columns else np.empty((0, 0))
+    return arrays
+
+
+def unpack_jv_dict(arrays):
+    jv_dict = {}
+    for key, value in arrays.items():
+        if key in ('active_area', 'intensity'):
+            jv_dict[key] = float(value)
+        elif key not in ('curve_names', 'curve_data'):
+            jv_dict[key] = value.tolist()
+    curve_data = arrays['curve_data']
+    jv_dict['jv_curve'] = [
+        {'name': str(name),
+         'voltage': curve_data[:, 2 * index],
+         'current_density': curve_data[:, 2 * index + 1]}
+        for index, name in enumerate(arrays['curve_names'])]
+    return jv_dict
+
+
+def pack_mpp_data(header_dict, data):
+    arrays = {'header': np.array(json.dumps(header_dict))}
+    arrays['column_names'] = np.array(list(data), dtype=str)
+    arrays['columns'] = np.stack(list(data.values())) if data else np.empty((0, 0))
+    return arrays
+
+
+def unpack_mpp_data(arrays):
+    header_dict = json.loads(str(arrays['header']))
+    columns = arrays['columns']
+    data = {str(name): columns[index] for index, name in enumerate(arrays['column_names'])}
+    return header_dict, data
+
+
+def load_jv_data(archive, path):
+    # jv_dict of a raw file, parsed only if the content is not in the cache
+    from .encoding import decode_raw
+    from .jv_parser import read_jv_data
+    from .raw_io import read_raw_file
+
+    with read_raw_file(archive, path) as buffer:
+        raw = buffer.tobytes()
+
+    cache = get_parse_cache()
+    digest = content_digest(raw)
+    arrays = None
+    if cache:
+        with stage('parse_cache'):
+            arrays = cache.load('jv', digest)
+            count(**{'cache_misses' if arrays is None else 'cache_hits': 1})
+    if arrays is not None:
+        return unpack_jv_dict(arrays)
+
+    text, _ = decode_raw(raw, archive.metadata.upload_id, path)
+    with stage('parse'):
+        jv_dict = read_jv_data(io.StringIO(text, newline=None))
+        count(rows=sum(len(curve['voltage']) for curve in jv_dict['jv_curve']))
+    if cache:
+        with stage('parse_cache'):
+            cache.store('jv', digest, pack_jv_dict(jv_dict))
+    return jv_dict
+
+
+def load_mpp_data(archive, path):
+    from .encoding import read_raw_text
+    from .mpp_parser import read_mpp_data
+    from .raw_io import read_raw_file
+
+    with read_raw_file(archive, path) as raw:
+        cache = get_parse_cache()
+        if cache:
+            digest = content_digest(raw.data)
+            with stage('parse_cache'):
+                arrays = cache.load('mpp', digest)
+                count(**{'cache_misses' if arrays is None else 'cache_hits': 1})
+            if arrays is not None:
+                return unpack_mpp_data(arrays)
+
+        def read(f):
+            with stage('parse'):
+                header_dict, data = read_mpp_data(f, size_hint=len(raw))
+                count(rows=len(next(iter(data.values()), ())))
+            return header_dict, data
+
+        header_dict, data = read_raw_text(raw, read, archive.metadata.upload_id, path)
+    if cache:
+        with stage('parse_cache'):
+            cache.store('mpp', digest, pack_mpp_data(header_dict, data))
+    return header_dict, data
@@ -19,20 +19,18 @@
 from nomad.datamodel import EntryArchive
 from nomad.parsing import MatchingParser
 
-from .schema import (Chose_JVmeasurement,
-                     Chose_EQEmeasurement,
-                     Chose_PLmeasurement,
-                     Chose_Measurement,
-                     Chose_UVvismeasurement)
+from . import config
+from .dispatch import (
+    measurement_dispatcher, register_measurement, attach_data_file_list)
+from .instrumentation import report_upload, stage, trace
+from .sample_reference import get_sample_reference_cache
+from .sniffing import sniff_file
 
-from nomad.datamodel.metainfo.eln import SolarCellEQE
-
-
-from baseclasses.helper.utilities import set_sample_reference, create_archive, get_entry_id_from_file_name, get_reference
 from nomad.datamodel.data import (
     EntryData,
 )
 from nomad.metainfo import (
+    MSection,
     Quantity,
 )
 from nomad.datamodel.metainfo.basesections import (
@@ -42,13 +40,14 @@ from nomad.datamodel.metainfo.annotations import (
     ELNAnnotation,
 )
 
-import json
 import os
 import datetime
+from concurrent.futures import ProcessPoolExecutor
 
-'''
-This is a hello world style example for an example parser/converter.
-'''
+# the plugin creates the parser itself (parser_as_interface), the matching settings are
+# only defined here, the names are the ones of the plugin that the entries store
+PARSER_NAME = 'parsers/chose_parser'
+MAINFILE_NAME_RE = r'^(.+\.?.+\.((eqe|jv|jvi|pl|pli|chose|spv|uvvis)\..{1,4}))$'
 
 
 class RawFileChose(EntryData):
@@ -60,48 +59,165 @@ class RawFileChose(EntryData):
     )
 
 
+def get_search_id(mainfile):
+    return os.path.basename(mainfile).split('.')[0]
+
+
+@measurement_dispatcher.register_default()
+def create_measurement_entry(file_name):
+    from .schema import Chose_Measurement
+    return Chose_Measurement()
+
+
+@register_measurement('jv', 'txt')
+def create_jv_entry(file_name):
+    from .schema import Chose_JVmeasurement
+    return Chose_JVmeasurement()
+
+
+@register_measurement('eqe', 'txt')
+def create_eqe_entry(file_name):
+    from .schema import Chose_EQEmeasurement
+    return Chose_EQEmeasurement()
+
+
+@register_measurement('mpp')
+def create_mpp_entry(file_name):
+    from .schema import Chose_MPPTracking
+    return Chose_MPPTracking()
+
+
+@register_measurement('pl')
+def create_pl_entry(file_name):
+    from .schema import Chose_PLmeasurement
+    return Chose_PLmeasurement()
+
+
+@register_measurement('uvvis', attach=attach_data_file_list)
+def create_uvvis_entry(file_name):
+    from .schema import Chose_UVvismeasurement
+    return Chose_UVvismeasurement()
+
+
+def create_entry(mainfile):
+    file_name = os.path.basename(mainfile)
+    mainfile_split = file_name.split('.')
+    notes = ''
+    if len(mainfile_split) > 2:
+        notes = mainfile_split[1]
+
+    # a file whose content belongs to another measurement type is created as that type
+    with stage('sniff'):
+        type_token = sniff_file(mainfile)
+    entry = measurement_dispatcher.create_entry(file_name, type_token)
+
+    search_id = get_search_id(mainfile)
+    entry.name = f"{search_id} {notes}"
+    entry.description = f"Notes from file name: {notes}"
+    entry.datetime = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    return entry, search_id
+
+
+def _create_entry_dicts(mainfiles):
+    # runs in the worker processes, the sections are sent back as dicts
+    return [create_entry(mainfile)[0].m_to_dict(with_root_def=True) for mainfile in mainfiles]
+
+
+def create_entries(groups, workers=1):
+    '''
+    Creates the entries of the mainfiles in `groups`, a list of mainfile lists, and
+    returns them in the same order. With more than one worker the groups are fanned out
+    over a process pool, all files of a group are created by the same worker.
+    '''
+    if workers <= 1 or len(groups) < 2:
+        return [create_entry(mainfile)[0] for mainfiles in groups for mainfile in mainfiles]
+
+    # a few chunks per worker, so that large groups do not leave the others idle
+    n_chunks = min(len(groups), workers * 4)
+    chunks = [
+        [mainfile for mainfiles in groups[i::n_chunks] for mainfile in mainfiles]
+        for i in range(n_chunks)]
+    with ProcessPoolExecutor(max_workers=min(workers, n_chunks)) as executor:
+        results = list(executor.map(_create_entry_dicts, chunks))
+
+    entries = {}
+    for chunk, entry_dicts in zip(chunks, results):
+        for mainfile, entry_dict in zip(chunk, entry_dicts):
+            entries[mainfile] = MSection.from_dict(entry_dict)
+    return [entries[mainfile] for mainfiles in groups for mainfile in mainfiles]
+
+
 class ChoseParser(MatchingParser):
     def __init__(self):
         super().__init__(
-            name='parsers/Chose', code_name='Chose', code_homepage='https://www.example.eu/',
+            name=PARSER_NAME, code_name='Chose code', code_homepage='https://www.example.eu/',
+            mainfile_name_re=MAINFILE_NAME_RE,
             supported_compressions=['gz', 'bz2', 'xz']
         )
 
-    def parse(self, mainfile: str, archive: EntryArchive, logger):
-        # Log a hello world, just to get us started. TODO remove from an actual parser.
-
-        mainfile_split = os.path.basename(mainfile).split('.')
-        notes = ''
-        if len(mainfile_split) > 2:
-            notes = mainfile_split[1]
-        entry = Chose_Measurement()
-        if mainfile_split[-1] == "txt" and mainfile_split[-2] == "jv":
-            entry = Chose_JVmeasurement()
-        if mainfile_split[-1] == "txt" and mainfile_split[-2] == "eqe":
-            header_lines = 9
-            sc_eqe = SolarCellEQE()
-            sc_eqe.eqe_data_file = os.path.basename(mainfile)
-            sc_eqe.header_lines = header_lines
-            entry = Chose_EQEmeasurement()
-            entry.eqe_data = [sc_eqe]
-        if mainfile_split[-2] == "pl":
-            entry = Chose_PLmeasurement()
-        if mainfile_split[-2] == "uvvis":
-            entry = Chose_UVvismeasurement()
-            entry.data_file = [os.path.basename(mainfile)]
-        archive.metadata.entry_name = os.path.basename(mainfile)
+    def is_mainfile(self, filename, mime, buffer, decoded_buffer, compression=None):
+        # the name decides the candidates, the header of the content decides the match
+        if not super().is_mainfile(filename, mime, buffer, decoded_buffer, compression):
+            return False
+        return sniff_file(filename) is not None
 
-        search_id = mainfile_split[0]
-        set_sample_reference(archive, entry, search_id)
+    def parse(self, mainfile: str, archive: EntryArchive, logger):
+        with trace(logger, archive.metadata.upload_id, os.path.basename(mainfile)):
+            with stage('create_entry'):
+                entry, search_id = create_entry(mainfile)
+            with stage('sample_reference'):
+                get_sample_reference_cache(archive.metadata.upload_id).set_sample_reference(
+                    archive, entry, search_id)
+            self.write_entry(mainfile, archive, entry)
 
-        entry.name = f"{search_id} {notes}"
-        entry.description = f"Notes from file name: {notes}"
+    def write_entry(self, mainfile, archive, entry):
+        from baseclasses.helper.utilities import create_archive, get_entry_id_from_file_name, get_reference
 
-        if not mainfile_split[-2] == "eqe" and not mainfile_split[-2] == "uvvis":
-            entry.data_file = os.path.basename(mainfile)
-        entry.datetime = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+        archive.metadata.entry_name = os.path.basename(mainfile)
 
         file_name = f'{os.path.basename(mainfile)}.archive.json'
         eid = get_entry_id_from_file_name(file_name, archive)
         archive.data = RawFileChose(processed_archive=get_reference(archive.metadata.upload_id, eid))
-        create_archive(entry, archive, file_name)
+        with stage('write'):
+            create_archive(entry, archive, file_name)
+
+    def parse_bulk(self, mainfiles, archives, logger, workers=None):
+        '''
+        Parses all matched mainfiles of an upload, `archives` maps each mainfile to its
+        archive. The files are grouped by sample id and their entries are created in
+        `workers` processes, `config.bulk_workers` by default. The sample references of
+        all sample ids are looked up in one search, then all archives are written in
+        the order of the sorted sample ids and file names.
+        '''
+        if not mainfiles:
+            return
+        if workers is None:
+            workers = config.bulk_workers
+
+        groups = {}
+        for mainfile in sorted(mainfiles):
+            groups.setdefault(get_search_id(mainfile), []).append(mainfile)
+        search_ids = sorted(groups)
+        ordered = [mainfile for search_id in search_ids for mainfile in groups[search_id]]
+
+        first_archive = archives[ordered[0]]
+        upload_id = first_archive.metadata.upload_id
+        sample_references = get_sample_reference_cache(upload_id)
+
+        with trace(logger, upload_id, 'bulk'):
+            with stage('create_entry'):
+                entries = create_entries([groups[search_id] for search_id in search_ids], workers)
+
+            with stage('sample_reference'):
+                sample_references.prefetch(first_archive, search_ids)
+                for mainfile, entry in zip(ordered, entries):
+                    sample_references.set_sample_reference(
+                        archives[mainfile], entry, get_search_id(mainfile))
+
+            for mainfile, entry in zip(ordered, entries):
+                self.write_entry(mainfile, archives[mainfile], entry)
+        logger.info(
+            'parsed upload in bulk mode', n_mainfiles=len(mainfiles), n_samples=len(search_ids),
+            workers=workers, **sample_references.stats())
+        report_upload(logger, upload_id)
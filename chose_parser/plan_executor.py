@@ -0,0 +1,267 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Bulk execution of experimental plans. execute_solar_sample_plan creates the samples,
+the batch and the process entries one archive at a time and every archive is processed
+as soon as it is written. Here it runs against a recording context instead: all
+archives of the plan are collected in memory first, compared with the files of the
+upload and only the new or changed ones are written, in one step at the end.
+
+A manifest next to the plan file keeps the hash of every archive the plan wrote. An
+existing archive is only replaced if it is still the one the plan wrote, archives
+edited since then, or created before the manifest existed, are kept as they are.
+Archives are compared without the VOLATILE_KEYS, which the plan sets from the current
+time, so that an unchanged plan writes nothing.
+'''
+
+import hashlib
+import io
+import json
+from collections import OrderedDict, namedtuple
+
+from .instrumentation import count, stage
+
+MANIFEST_SUFFIX = '.plan_manifest.json'
+ARCHIVE_SUFFIX = '.archive.json'
+
+PlanResult = namedtuple('PlanResult', ['new', 'changed', 'unchanged', 'kept'])
+
+# keys of the archives compared without their values, at any depth
+VOLATILE_KEYS = {'datetime'}
+
+# the parts of an experimental plan the generated samples, batches and processes depend on
+FINGERPRINT_KEYS = [
+    'lab_id', 'number_of_substrates', 'substrates_per_subbatch', 'standard_plan',
+    'solar_cell_properties', 'plan']
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def _strip_volatile(data):
+    if isinstance(data, dict):
+        return {
+            key: _strip_volatile(value) for key, value in data.items() if key not in VOLATILE_KEYS}
+    if isinstance(data, list):
+        return [_strip_volatile(item) for item in data]
+    return data
+
+
+def archive_hash(content):
+    '''
+    Hash of the content of an archive file without the VOLATILE_KEYS, of the bytes if
+    it is not JSON.
+    '''
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return content_hash(content)
+    return content_hash(json.dumps(_strip_volatile(data), sort_keys=True).encode())
+
+
+def plan_fingerprint(plan):
+    '''
+    Hash of the parts of the plan section in FINGERPRINT_KEYS, references are hashed by
+    their value as in the archive.
+    '''
+    content = plan.m_to_dict()
+    selected = {key: content[key] for key in FINGERPRINT_KEYS if key in content}
+    return content_hash(json.dumps(selected, sort_keys=True, default=str).encode())
+
+
+class _RecordingFile:
+    # collects what is written to a raw file, stored in `files` on close
+    def __init__(self, files, path, binary, initial=b''):
+        self._files = files
+        self._path = path
+        self._binary = binary
+        self._buffer = io.BytesIO(initial) if binary else io.StringIO(initial.decode())
+        self._buffer.seek(0, io.SEEK_END)
+
+    def __getattr__(self, name):
+        return getattr(self._buffer, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._buffer.closed:
+            return
+        value = self._buffer.getvalue()
+        self._files[self._path] = value if self._binary else value.encode()
+        self._buffer.close()
+
+
+class RecordingContext:
+    '''
+    Wraps the context of an archive, files written through it are kept in memory and
+    processing requests are recorded. Everything else goes to the wrapped context.
+    Archive files of the upload are reported as missing, so that the plan renders all
+    of its archives.
+    '''
+
+    def __init__(self, context):
+        self.context = context
+        self.files = OrderedDict()
+        self.process_calls = {}
+
+    def __getattr__(self, name):
+        return getattr(self.context, name)
+
+    def raw_path_exists(self, path):
+        if path in self.files:
+            return True
+        if path.endswith(ARCHIVE_SUFFIX):
+            return False
+        return self.context.raw_path_exists(path)
+
+    def raw_file(self, path, mode='r', *args, **kwargs):
+        if any(flag in mode for flag in 'wax+'):
+            initial = b''
+            if 'a' in mode or '+' in mode:
+                initial = self.files.get(path) or _read(self.context, path) or b''
+            return _RecordingFile(self.files, path, 'b' in mode, initial)
+        if path in self.files:
+            content = self.files[path]
+            return io.BytesIO(content) if 'b' in mode else io.StringIO(content.decode())
+        return self.context.raw_file(path, mode, *args, **kwargs)
+
+    def process_updated_raw_file(self, path, *args, **kwargs):
+        # replayed for the files that are actually written
+        self.process_calls[path] = (args, kwargs)
+
+
+class _PlanArchive:
+    # the archive of the plan with the recording context
+    def __init__(self, archive, context):
+        object.__setattr__(self, '_archive', archive)
+        object.__setattr__(self, 'm_context', context)
+
+    def __getattr__(self, name):
+        return getattr(self._archive, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._archive, name, value)
+
+
+def _read(context, path):
+    try:
+        if not context.raw_path_exists(path):
+            return None
+        with context.raw_file(path, 'rb') as f:
+            return f.read()
+    except (OSError, KeyError):
+        return None
+
+
+def get_manifest_path(archive):
+    return f'{archive.metadata.mainfile}{MANIFEST_SUFFIX}'
+
+
+def load_manifest(context, path):
+    content = _read(context, path)
+    try:
+        return json.loads(content) if content else {}
+    except ValueError:
+        return {}
+
+
+def diff_plan(context, files, manifest):
+    '''
+    Compares the archives of the plan with the files of the upload. Returns the
+    PlanResult with the paths of new, changed, unchanged and kept archives.
+    '''
+    result = PlanResult([], [], [], [])
+    for path, content in files.items():
+        existing = _read(context, path)
+        if existing is None:
+            result.new.append(path)
+            continue
+        existing_hash = archive_hash(existing)
+        if existing_hash == archive_hash(content):
+            result.unchanged.append(path)
+        elif manifest.get(path) in (existing_hash, content_hash(existing)):
+            result.changed.append(path)
+        else:
+            result.kept.append(path)
+    return result
+
+
+def write_plan(context, recording, paths, replaced=()):
+    # the files first, processing afterwards, both in the order of the plan, the
+    # entries of replaced archives exist already and are processed with allow_modify
+    with stage('write'):
+        for path in paths:
+            with context.raw_file(path, 'wb') as f:
+                f.write(recording.files[path])
+            count(bytes=len(recording.files[path]))
+    with stage('process'):
+        for path in paths:
+            if path in replaced:
+                context.process_updated_raw_file(path, allow_modify=True)
+            elif path in recording.process_calls:
+                args, kwargs = recording.process_calls[path]
+                context.process_updated_raw_file(path, *args, **kwargs)
+
+
+def execute_plan(plan, archive, sample_cls, batch_cls, logger, execute=None):
+    '''
+    Runs `execute`, by default execute_solar_sample_plan, against a recording context
+    and writes the new and changed archives of the plan afterwards. Other files the
+    plan writes are written as they are.
+    '''
+    if execute is None:
+        from baseclasses.helper.execute_solar_sample_plan import execute_solar_sample_plan
+        execute = execute_solar_sample_plan
+
+    context = archive.m_context
+    recording = RecordingContext(context)
+    with stage('plan'):
+        execute(plan, _PlanArchive(archive, recording), sample_cls, batch_cls, logger)
+
+    archives = OrderedDict(
+        (path, content) for path, content in recording.files.items()
+        if path.endswith(ARCHIVE_SUFFIX))
+    manifest_path = get_manifest_path(archive)
+    manifest = load_manifest(context, manifest_path)
+    result = diff_plan(context, archives, manifest)
+
+    update = set(result.new + result.changed)
+    write_plan(context, recording, [
+        path for path in recording.files if path in update or path not in archives],
+        set(result.changed))
+
+    hashes = {path: archive_hash(archives[path]) for path in update.union(result.unchanged)}
+    if any(manifest.get(path) != value for path, value in hashes.items()):
+        manifest.update(hashes)
+        with context.raw_file(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+
+    if result.kept:
+        logger.warning(
+            'archives of the plan were edited since they were created and are kept',
+            paths=result.kept)
+    logger.info(
+        'executed experimental plan', n_new=len(result.new), n_changed=len(result.changed),
+        n_unchanged=len(result.unchanged), n_kept=len(result.kept))
+    return result
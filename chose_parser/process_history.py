@@ -0,0 +1,103 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Process history of the samples of an upload. Every normalized process entry adds or
+replaces its record in `<lab_id>.process_history.json` at the root of its upload for
+each sample it references. The process chain of a sample is then one small file
+instead of a search and one archive load per process. Records of processes whose
+mainfile was deleted are dropped when the history is read or written.
+
+The file is the source of truth and is read on demand with `load_process_history`.
+The sample entries are not processed again when a process is added, which would cost
+one reprocessing per sample and process and depend on the search index; a sample
+links its history file and copies the records it finds when it is normalized.
+'''
+
+import json
+
+from .raw_io import update_json_file
+
+HISTORY_SUFFIX = '.process_history.json'
+
+
+def get_history_path(lab_id):
+    return f'{lab_id}{HISTORY_SUFFIX}'
+
+
+def process_record(section, archive):
+    datetime = getattr(section, 'datetime', None)
+    return {
+        'entry_id': archive.metadata.entry_id,
+        'upload_id': archive.metadata.upload_id,
+        'mainfile': archive.metadata.mainfile,
+        'entry_type': section.m_def.name,
+        'name': getattr(section, 'name', None),
+        'datetime': datetime.isoformat() if datetime is not None else None,
+        'position_in_experimental_plan': getattr(section, 'position_in_experimental_plan', None),
+    }
+
+
+def _order(record):
+    # plan position first, processes outside of the plan by date
+    position = record.get('position_in_experimental_plan')
+    return (position is None, position or 0, record.get('datetime') or '', record.get('name') or '')
+
+
+def _exists(context, record):
+    # records written before the mainfile was stored are kept
+    mainfile = record.get('mainfile')
+    return mainfile is None or context.raw_path_exists(mainfile)
+
+
+def add_process(history, record, exists=None):
+    # replaces an earlier record of the same entry and keeps the history ordered
+    processes = [
+        process for process in history.get('processes', [])
+        if process['entry_id'] != record['entry_id'] and (exists is None or exists(process))]
+    processes.append(record)
+    processes.sort(key=_order)
+    history['processes'] = processes
+    return history
+
+
+def update_process_history(section, archive):
+    '''
+    Adds the process `section` to the history of all samples it references by lab id.
+    '''
+    lab_ids = sorted({sample.lab_id for sample in section.samples or [] if sample.lab_id})
+    if not lab_ids:
+        return
+    context = archive.m_context
+    record = process_record(section, archive)
+    for lab_id in lab_ids:
+        def update(history, lab_id=lab_id):
+            history['lab_id'] = lab_id
+            add_process(history, record, lambda process: _exists(context, process))
+        update_json_file(archive, get_history_path(lab_id), update)
+
+
+def load_process_history(archive, lab_id):
+    # the ordered process records of a sample whose mainfile still exists
+    context = archive.m_context
+    try:
+        with context.raw_file(get_history_path(lab_id), 'r') as f:
+            processes = json.load(f).get('processes', [])
+    except (OSError, KeyError, ValueError):
+        return []
+    return [process for process in processes if _exists(context, process)]
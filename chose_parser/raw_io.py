@@ -0,0 +1,260 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Raw file access for the normalizers: every raw file is opened exactly once and its
+content is kept in one buffer that is shared by hashing, encoding detection and
+parsing. Optionally the next files of the same kind in the directory are read ahead
+in a thread pool while the current one is parsed. JSON files that several entries
+update, e.g. summaries and indices, are changed under a file lock.
+'''
+
+import fcntl
+import io
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config
+from .encoding import get_file_name_pattern
+from .instrumentation import count, stage
+
+# files from this size on are memory mapped instead of read
+MMAP_MIN_BYTES = 1 << 20
+# larger files are not read ahead, they would be mapped anyway
+PREFETCH_MAX_BYTES = 16 << 20
+# read size of text streams over mapped files
+STREAM_BUFFER_SIZE = 1 << 20
+
+
+class _BufferIO(io.RawIOBase):
+    # read-only raw stream over a bytes-like buffer, without copying it
+    def __init__(self, data):
+        self._data = memoryview(data)
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), len(self._data) - self._position)
+        b[:n] = self._data[self._position:self._position + n]
+        self._position += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._data)
+        self._position = max(offset, 0)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        self._data.release()
+        super().close()
+
+
+class RawBuffer:
+    '''
+    The content of one raw file, either bytes or a read-only mmap. Use it as a context
+    manager to release the mapping.
+    '''
+
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def tobytes(self):
+        return self.data if isinstance(self.data, bytes) else self.data[:]
+
+    def stream(self):
+        if isinstance(self.data, bytes):
+            # shares the bytes object until it is written to
+            return io.BytesIO(self.data)
+        return io.BufferedReader(_BufferIO(self.data), buffer_size=STREAM_BUFFER_SIZE)
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+
+def _read(archive, path):
+    with archive.m_context.raw_file(path, 'br') as f:
+        try:
+            fileno = f.fileno()
+            size = os.fstat(fileno).st_size
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return f.read()
+        if size >= MMAP_MIN_BYTES:
+            try:
+                # the mapping stays valid after the file is closed
+                return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                pass
+        return f.read()
+
+
+def _signature(archive, path):
+    # size and modification time of a raw file, None if it has no local path
+    try:
+        stat = os.stat(os.path.join(archive.m_context.raw_path(), path))
+    except (AttributeError, NotImplementedError, OSError):
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class RawFilePrefetcher:
+    '''
+    Reads the files following a requested file in a thread pool. Results are kept
+    until they are requested, at most 2 * depth per process, and are only used if the
+    size and modification time of the file did not change since they were read.
+    '''
+
+    def __init__(self, depth, workers=None):
+        self.depth = depth
+        self.workers = workers or depth
+        self._executor = None
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, archive, path):
+        with self._lock:
+            future = self._futures.pop((archive.metadata.upload_id, path), None)
+        if future is None:
+            return None
+        try:
+            result = future.result()
+        except OSError:
+            return None
+        if result is None:
+            return None
+        signature, data = result
+        if signature != _signature(archive, path):
+            # changed since it was read ahead
+            return None
+        return data
+
+    def siblings(self, archive, path):
+        # the next files in the directory that share the file name pattern of path
+        directory = os.path.dirname(path)
+        pattern = get_file_name_pattern(path)
+        try:
+            names = sorted(os.listdir(os.path.join(archive.m_context.raw_path(), directory)))
+        except (AttributeError, NotImplementedError, OSError):
+            return []
+        name = os.path.basename(path)
+        names = [
+            other for other in names
+            if other > name and get_file_name_pattern(other) == pattern]
+        return [os.path.join(directory, other) for other in names[:self.depth]]
+
+    def schedule(self, archive, path):
+        upload_id = archive.metadata.upload_id
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='chose-prefetch')
+            for sibling in self.siblings(archive, path):
+                key = (upload_id, sibling)
+                if key in self._futures:
+                    continue
+                self._futures[key] = self._executor.submit(self._prefetch, archive, sibling)
+                while len(self._futures) > 2 * self.depth:
+                    self._futures.popitem(last=False)[1].cancel()
+
+    @staticmethod
+    def _prefetch(archive, path):
+        # the signature is taken before the read, a change during the read shows in take
+        signature = _signature(archive, path)
+        if signature is None or signature[0] > PREFETCH_MAX_BYTES:
+            return None
+        data = _read(archive, path)
+        if isinstance(data, mmap.mmap):
+            # the copy is kept, the mapping is released right away
+            with data as mapping:
+                data = mapping[:]
+        return signature, data
+
+
+_prefetcher = None
+
+
+def get_prefetcher():
+    global _prefetcher
+    if _prefetcher is None and config.raw_prefetch_depth > 0:
+        _prefetcher = RawFilePrefetcher(config.raw_prefetch_depth)
+    return _prefetcher
+
+
+def read_raw_file(archive, path):
+    '''
+    Returns the RawBuffer of a raw file of the archive's upload, read ahead if the
+    prefetcher has it already, and schedules the read ahead of the following files.
+    '''
+    prefetcher = get_prefetcher()
+    data = None
+    with stage('read'):
+        if prefetcher is not None:
+            data = prefetcher.take(archive, path)
+        if data is not None:
+            count(cache_hits=1)
+        else:
+            data = _read(archive, path)
+        count(bytes=len(data))
+    if prefetcher is not None:
+        prefetcher.schedule(archive, path)
+    return RawBuffer(path, data)
+
+
+def update_json_file(archive, path, update):
+    # read-modify-write under an exclusive lock, entries are normalized concurrently
+    with archive.m_context.raw_file(path, 'a+') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            content = f.read()
+            try:
+                content = json.loads(content) if content else {}
+            except ValueError:
+                content = {}
+            update(content)
+            f.seek(0)
+            f.truncate()
+            json.dump(content, f, indent=1)
+            f.flush()
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,139 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import time
+from collections import OrderedDict
+
+from .instrumentation import count
+
+MAX_UPLOADS = 16
+PAGE_SIZE = 1000
+
+
+def search_lab_ids(archive, search_ids):
+    # one search request for all ids, returns lab_id -> list of matching entries
+    from nomad.search import search
+    from nomad.app.v1.models import MetadataPagination, MetadataRequired
+
+    search_ids = list(search_ids)
+    hits = {search_id: [] for search_id in search_ids}
+    page_after_value = None
+    while True:
+        search_result = search(
+            owner='visible',
+            query={'results.eln.lab_ids:any': search_ids},
+            pagination=MetadataPagination(page_size=PAGE_SIZE, page_after_value=page_after_value),
+            required=MetadataRequired(include=[
+                'entry_id', 'upload_id', 'entry_type', 'results.eln.lab_ids']),
+            user_id=archive.metadata.main_author.user_id)
+        for data in search_result.data:
+            lab_ids = data.get('results', {}).get('eln', {}).get('lab_ids', [])
+            for lab_id in lab_ids:
+                if lab_id in hits:
+                    hits[lab_id].append(data)
+        page_after_value = search_result.pagination.next_page_after_value
+        if not page_after_value:
+            break
+    return hits
+
+
+class SampleReferenceCache:
+    '''
+    Caches the search hits for the sample ids of one upload. Entries expire after
+    `ttl` seconds, ids without hits after `miss_ttl` seconds, so that a sample created
+    in the meantime is found, and the least recently used ones are evicted beyond
+    `max_size`.
+    '''
+
+    def __init__(self, max_size=4096, ttl=600, miss_ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def _get(self, search_id):
+        item = self._entries.get(search_id)
+        if item is None:
+            return None
+        timestamp, value = item
+        if time.monotonic() - timestamp > (self.ttl if value else self.miss_ttl):
+            del self._entries[search_id]
+            return None
+        self._entries.move_to_end(search_id)
+        return item
+
+    def _put(self, search_id, value):
+        self._entries[search_id] = (time.monotonic(), value)
+        self._entries.move_to_end(search_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def prefetch(self, archive, search_ids):
+        missing = sorted({search_id for search_id in search_ids if self._get(search_id) is None})
+        if not missing:
+            return
+        for search_id, data in search_lab_ids(archive, missing).items():
+            self._put(search_id, data)
+
+    def resolve(self, archive, search_id):
+        item = self._get(search_id)
+        if item is not None:
+            self.hits += 1
+            count(cache_hits=1)
+            return item[1]
+
+        self.misses += 1
+        count(cache_misses=1)
+        data = search_lab_ids(archive, [search_id])[search_id]
+        self._put(search_id, data)
+        return data
+
+    def set_sample_reference(self, archive, entry, search_id):
+        data = self.resolve(archive, search_id)
+        if len(data) != 1:
+            return
+
+        entry_type = data[0]['entry_type'].lower()
+        if 'sample' in entry_type or 'library' in entry_type:
+            from nomad.datamodel.metainfo.basesections import CompositeSystemReference
+            from baseclasses.helper.utilities import get_reference
+            entry.samples = [CompositeSystemReference(
+                reference=get_reference(data[0]['upload_id'], data[0]['entry_id']),
+                lab_id=search_id)]
+        else:
+            # other referenced entry types are handled by the uncached lookup
+            from baseclasses.helper.utilities import set_sample_reference
+            set_sample_reference(archive, entry, search_id)
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, size=len(self._entries))
+
+
+_caches = OrderedDict()
+
+
+def get_sample_reference_cache(upload_id):
+    cache = _caches.get(upload_id)
+    if cache is None:
+        cache = _caches[upload_id] = SampleReferenceCache()
+        while len(_caches) > MAX_UPLOADS:
+            _caches.popitem(last=False)
+    _caches.move_to_end(upload_id)
+    return cache
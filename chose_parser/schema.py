@@ -18,6 +18,8 @@
 
 import os
 
+import numpy as np
+
 from baseclasses import (
     BaseProcess, BaseMeasurement, LayerDeposition, Batch
 )
@@ -52,43 +54,65 @@ from baseclasses.wet_chemical_deposition import (
     LP50InkjetPrinting,
     SprayPyrolysis,
     WetChemicalDeposition)
-from nomad.datamodel.data import EntryData
+from nomad.datamodel.data import ArchiveSection, EntryData
+from nomad.datamodel.metainfo.basesections import Entity
 from nomad.datamodel.results import Results, Properties, Material, ELN
 # from nomad.units import ureg
 from nomad.metainfo import (
+    Datetime,
+    JSON,
+    MEnum,
     Package,
     Quantity,
     SubSection,
     Section)
 
+from . import config
+from .instrumentation import count, instrumented, stage
+from .schema_layout import eln_annotations
+
 m_package0 = Package(name='Chose')
 
 
+def normalize_process(section, archive, logger):
+    # adds the process to the process history of its samples
+    if config.write_process_history:
+        from .process_history import update_process_history
+        try:
+            with stage('process_history'):
+                update_process_history(section, archive)
+        except OSError as e:
+            logger.warning('could not update the process history of the samples', exc_info=e)
+
+
 # %% ####################### Entities
 
 class Chose_ExperimentalPlan(ExperimentalPlan, EntryData):
-    m_def = Section(
-        a_eln=dict(hide=['users'],
-                   properties=dict(
-                       order=[
-                           "name",
-                           "standard_plan",
-                           "load_standard_processes",
-                           "create_samples_and_processes",
-                           "number_of_substrates",
-                           "substrates_per_subbatch",
-                           "lab_id"
-                       ])),
-        a_template=dict(institute="HZB_Chose"))
+    m_def = Section(**eln_annotations('Chose_ExperimentalPlan'))
 
     solar_cell_properties = SubSection(
         section_def=SolarCellProperties)
 
+    plan_fingerprint = Quantity(
+        type=str,
+        description='Hash of the plan parts the samples and processes were generated from.')
+
+    @instrumented
     def normalize(self, archive, logger):
         super(Chose_ExperimentalPlan, self).normalize(archive, logger)
 
-        from baseclasses.helper.execute_solar_sample_plan import execute_solar_sample_plan
-        execute_solar_sample_plan(self, archive, Chose_Sample, Chose_Batch, logger)
+        from .plan_executor import plan_fingerprint
+        fingerprint = plan_fingerprint(self)
+        # edits of e.g. the description do not regenerate samples and processes
+        if fingerprint != self.plan_fingerprint or self.create_samples_and_processes \
+                or self.load_standard_processes:
+            if config.bulk_plan_execution:
+                from .plan_executor import execute_plan
+                execute_plan(self, archive, Chose_Sample, Chose_Batch, logger)
+            else:
+                from baseclasses.helper.execute_solar_sample_plan import execute_solar_sample_plan
+                execute_solar_sample_plan(self, archive, Chose_Sample, Chose_Batch, logger)
+            self.plan_fingerprint = plan_fingerprint(self)
 
         # actual normalization!!
         archive.results = Results()
@@ -99,58 +123,19 @@ class Chose_ExperimentalPlan(ExperimentalPlan, EntryData):
 
 
 class Chose_StandardSample(StandardSampleSolarCell, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=['users'],
-            properties=dict(
-                order=[
-                    "name",
-                    "architecture",
-                    "substrate",
-                    "processes",
-                    "lab_id"
-                ])))
+    m_def = Section(**eln_annotations('Chose_StandardSample'))
 
 
 class Chose_Substrate(Substrate, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users', 'components', 'elemental_composition'],
-            properties=dict(
-                order=[
-                    "name",
-                    "substrate",
-                    "conducting_material",
-                    "solar_cell_area",
-                    "pixel_area",
-                    "number_of_pixels"])))
+    m_def = Section(**eln_annotations('Chose_Substrate'))
 
 
 class ChoseSolutionChemical(SolutionChemical):
-    m_def = Section(label_quantity='name',  a_eln=dict(
-        hide=['chemical']))
+    m_def = Section(**eln_annotations('ChoseSolutionChemical', label_quantity='name'))
 
 
 class Chose_Solution(Solution, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'users', 'components', 'elemental_composition', "method", "temperature", "time", "speed",
-                "solvent_ratio", "washing"],
-            properties=dict(
-                order=[
-                    "name",
-                    "datetime",
-                    "lab_id",
-                    "description", "preparation", "solute", "solvent", "other_solution", "additive", "storage"
-                ],
-            )),
-        a_template=dict(
-            temperature=45,
-            time=15,
-            method='Shaker'))
+    m_def = Section(**eln_annotations('Chose_Solution'))
 
     preparation = SubSection(section_def=SolutionPreparationStandard)
     solute = SubSection(section_def=ChoseSolutionChemical, repeats=True)
@@ -158,49 +143,109 @@ class Chose_Solution(Solution, EntryData):
     solvent = SubSection(section_def=ChoseSolutionChemical, repeats=True)
 
 
+class ChoseProcessHistoryStep(ArchiveSection):
+    m_def = Section(label_quantity='name')
+
+    process = Quantity(
+        type=Entity,
+        a_eln=dict(component='ReferenceEditQuantity'))
+
+    entry_type = Quantity(type=str)
+
+    name = Quantity(type=str)
+
+    datetime = Quantity(type=Datetime)
+
+    position_in_experimental_plan = Quantity(type=int)
+
+
 class Chose_Sample(SolcarCellSample, EntryData):
-    m_def = Section(
-        a_eln=dict(hide=['users', 'components', 'elemental_composition'], properties=dict(
-            order=["name", "substrate", "architecture"])),
-        a_template=dict(institute="HZB_Chose"),
-        label_quantity='sample_id'
-    )
+    m_def = Section(**eln_annotations('Chose_Sample', label_quantity='sample_id'))
+
+    process_history_file = Quantity(
+        type=str,
+        description='The process history of the sample, kept up to date by its processes.',
+        a_browser=dict(adaptor='RawFileAdaptor'))
+
+    process_history = SubSection(
+        section_def=ChoseProcessHistoryStep, repeats=True,
+        description='The processes in the history file when the sample was normalized, in '
+                    'the order of the plan, see `chose_parser.process_history`.')
+
+    def normalize(self, archive, logger):
+        super(Chose_Sample, self).normalize(archive, logger)
+
+        if self.lab_id:
+            from baseclasses.helper.utilities import get_reference
+            from .process_history import get_history_path, load_process_history
+
+            self.process_history_file = get_history_path(self.lab_id)
+            with stage('process_history'):
+                history = load_process_history(archive, self.lab_id)
+            if history:
+                self.process_history = [
+                    ChoseProcessHistoryStep(
+                        process=get_reference(record['upload_id'], record['entry_id']),
+                        entry_type=record['entry_type'], name=record['name'],
+                        datetime=record['datetime'],
+                        position_in_experimental_plan=record['position_in_experimental_plan'])
+                    for record in history]
 
 
 class Chose_BasicSample(BasicSampleWithID, EntryData):
-    m_def = Section(
-        a_eln=dict(hide=['users', 'components', 'elemental_composition']),
-        a_template=dict(institute="HZB_Chose"),
-        label_quantity='sample_id'
-    )
+    m_def = Section(**eln_annotations('Chose_BasicSample', label_quantity='sample_id'))
 
 
 class Chose_Batch(Batch, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=['users', 'samples'],
-            properties=dict(
-                order=[
-                    "name",
-                    "export_batch_ids",
-                    "csv_export_file"])))
+    m_def = Section(**eln_annotations('Chose_Batch'))
+
+    export_table = Quantity(
+        type=bool, default=False,
+        description='Export the processes and measurements of all samples as one table.',
+        a_eln=dict(component='BoolEditQuantity'))
+
+    table_export_format = Quantity(
+        type=MEnum('csv', 'parquet'), default='csv',
+        a_eln=dict(component='EnumEditQuantity'))
+
+    table_export_file = Quantity(
+        type=str,
+        a_browser=dict(adaptor='RawFileAdaptor'))
+
+    def normalize(self, archive, logger):
+        super(Chose_Batch, self).normalize(archive, logger)
+
+        if config.write_jv_summaries and self.lab_id:
+            from .jv_summary import write_batch_summary
+            try:
+                with stage('summary'):
+                    write_batch_summary(archive, self.lab_id)
+            except OSError as e:
+                logger.warning('could not write the JV summary of the batch', exc_info=e)
+
+        if self.export_table:
+            from .batch_export import check_export_format, export_batch, get_export_path
+            export_format = self.table_export_format or 'csv'
+            try:
+                check_export_format(export_format)
+            except ImportError as e:
+                # the flag stays set, the export runs once the format can be written
+                logger.error('could not export the batch table', exc_info=e)
+                return
+            self.export_table = False
+            path = get_export_path(archive, self, export_format)
+            try:
+                with stage('export'):
+                    export_batch(archive, self, path, export_format)
+            except (ImportError, OSError) as e:
+                logger.error('could not export the batch table', exc_info=e)
+            else:
+                self.table_export_file = path
 
 
 # %% ####################### Cleaning
 class Chose_Cleaning(Cleaning, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name", "location",
-                    "present",
-                    "datetime", "previous_process",
-                    "batch",
-                    "samples"])))
+    m_def = Section(**eln_annotations('Chose_Cleaning'))
 
     location = Quantity(
         type=str,
@@ -219,27 +264,14 @@ class Chose_Cleaning(Cleaning, EntryData):
     cleaning_plasma = SubSection(
         section_def=PlasmaCleaning, repeats=True)
 
+    def normalize(self, archive, logger):
+        super(Chose_Cleaning, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
+
 
 # %% ##################### Layer Deposition
 class Chose_SprayPyrolysis(SprayPyrolysis, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name", "location",
-                    "present",
-                    "datetime", "previous_process",
-                    "batch",
-                    "samples",
-                    "solution",
-                    "layer",
-                    "properties",
-                    "quenching",
-                    "annealing"])))
+    m_def = Section(**eln_annotations('Chose_SprayPyrolysis'))
 
     location = Quantity(
         type=str,
@@ -249,36 +281,17 @@ class Chose_SprayPyrolysis(SprayPyrolysis, EntryData):
                 suggestions=['Chose HTFumeHood'])
         ))
 
+    def normalize(self, archive, logger):
+        super(Chose_SprayPyrolysis, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
+
 
 # %% ### Printing
 
 
 class Chose_Inkjet_Printing(
         LP50InkjetPrinting, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name", "location",
-                    "present",
-                    "recipe_used", "print_head_used",
-                    "datetime", "previous_process",
-                    "batch",
-                    "samples",
-                    "solution",
-                    "layer",
-                    "properties",
-                    "print_head_path",
-                    "nozzle_voltage_profile",
-                    "quenching",
-                    "annealing"])),
-        a_template=dict(
-            layer_type="Absorber Layer",
-        ))
+    m_def = Section(**eln_annotations('Chose_Inkjet_Printing'))
 
     location = Quantity(
         type=str,
@@ -288,30 +301,14 @@ class Chose_Inkjet_Printing(
                 suggestions=['IRIS HZBGloveBoxes Pero3Inkjet'])
         ))
 
+    def normalize(self, archive, logger):
+        super(Chose_Inkjet_Printing, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
+
 
 # %% ### Spin Coating
 class Chose_SpinCoating(SpinCoating, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'end_time', 'steps', 'instruments', 'results', 'recipe'],
-            properties=dict(
-                order=[
-                    "name", "location",
-                    "present",
-                    "recipe"
-                    "datetime", "previous_process",
-                    "batch",
-                    "samples",
-                    "solution",
-                    "layer",
-                    "quenching",
-                    "annealing"])),
-        a_template=dict(
-            layer_type="Absorber Layer",
-        ))
+    m_def = Section(**eln_annotations('Chose_SpinCoating'))
 
     location = Quantity(
         type=str,
@@ -322,188 +319,97 @@ class Chose_SpinCoating(SpinCoating, EntryData):
                              'IRIS HZBGloveBoxes Pero2Spincoater'])
         ))
 
+    def normalize(self, archive, logger):
+        super(Chose_SpinCoating, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
+
 
 # %% ### Dip Coating
 
 
 class Chose_DipCoating(DipCoating, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name", "location",
-                    "present",
-                    "datetime",
-                    "batch",
-                    "samples",
-                    "solution",
-                    "layer",
-                    "quenching",
-                    "annealing"])),
-        a_template=dict(
-            layer_type="Absorber Layer",
-        ))
+    m_def = Section(**eln_annotations('Chose_DipCoating'))
+
+    def normalize(self, archive, logger):
+        super(Chose_DipCoating, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
 
 
 # %% ### Slot Die Coating
 
 
 class Chose_SlotDieCoating(SlotDieCoating, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'author',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name", "location",
-                    "present",
-                    "datetime", "previous_process",
-                    "batch",
-                    "samples",
-                    "solution",
-                    "layer",
-                    "properties",
-                    "quenching",
-                    "annealing"
-                ])),
-        a_template=dict(
-            layer_type="Absorber Layer"))
+    m_def = Section(**eln_annotations('Chose_SlotDieCoating'))
+
+    def normalize(self, archive, logger):
+        super(Chose_SlotDieCoating, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
 
 
 # %% ### Sputterring
 class Chose_Sputtering(
         Sputtering, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name", "location",
-                    "present",
-                    "datetime",
-                    "batch",
-                    "samples", "layer"])))
+    m_def = Section(**eln_annotations('Chose_Sputtering'))
+
+    def normalize(self, archive, logger):
+        super(Chose_Sputtering, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
 
 
 # %% ### AtomicLayerDepositio
 class Chose_AtomicLayerDeposition(
         AtomicLayerDeposition, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name", "location",
-                    "present",
-                    "datetime",
-                    "batch",
-                    "samples", "layer"])))
+    m_def = Section(**eln_annotations('Chose_AtomicLayerDeposition'))
+
+    def normalize(self, archive, logger):
+        super(Chose_AtomicLayerDeposition, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
 
 
 # %% ### Evaporation
 
 class ChoseEvaporation(Evaporation):
-    m_def = Section(label_quantity='name',  a_eln=dict(
-        hide=['chemical']))
+    m_def = Section(**eln_annotations('ChoseEvaporation', label_quantity='name'))
 
 
 class Chose_Evaporation(
         Evaporations, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'end_time', 'steps', 'instruments', 'results', "organic_evaporation", "inorganic_evaporation",
-                "perovskite_evaporation"],
-            properties=dict(
-                order=[
-                    "name", "location",
-                    "present",
-                    "datetime",
-                    "batch",
-                    "samples", "layer"])))
+    m_def = Section(**eln_annotations('Chose_Evaporation'))
 
     properties = SubSection(
         section_def=ChoseEvaporation)
 
+    def normalize(self, archive, logger):
+        super(Chose_Evaporation, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
+
 
 # %% ## Laser Scribing
 class Chose_LaserScribing(LaserScribing, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name", "location",
-                    "present",
-                    "datetime",
-                    "batch",
-                    "samples"])))
+    m_def = Section(**eln_annotations('Chose_LaserScribing'))
+
+    def normalize(self, archive, logger):
+        super(Chose_LaserScribing, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
 
 
 # %% ## Storage
 
 
 class Chose_Storage(Storage, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'location',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name", "location",
-                    "present",
-                    "datetime", "previous_process",
-                    "batch",
-                    "samples"])))
+    m_def = Section(**eln_annotations('Chose_Storage'))
+
+    def normalize(self, archive, logger):
+        super(Chose_Storage, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
 
 
 # %%####################################### Measurements
 
 
 class Chose_JVmeasurement(JVMeasurement, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id', 'solution',
-                'users',
-                'author',
-                'certified_values',
-                'certification_institute',
-                'end_time', 'steps', 'instruments', 'results',
-            ],
-            properties=dict(
-                order=[
-                    "name",
-                    "data_file",
-                    "active_area",
-                    "intensity",
-                    "integration_time",
-                    "settling_time",
-                    "averaging",
-                    "compliance",
-                    "samples"])),
-        a_plot=[
+    m_def = Section(**eln_annotations(
+        'Chose_JVmeasurement', a_plot=[
             {
                 'x': 'jv_curve/:/voltage',
                 'y': 'jv_curve/:/current_density',
@@ -513,40 +419,105 @@ class Chose_JVmeasurement(JVMeasurement, EntryData):
                         "fixedrange": False},
                     'xaxis': {
                         "fixedrange": False}},
-            }])
+            }]))
 
+    @instrumented
     def normalize(self, archive, logger):
         if self.data_file:
             # todo detect file format
-            from baseclasses.helper.utilities import get_encoding
-            with archive.m_context.raw_file(self.data_file, "br") as f:
-                encoding = get_encoding(f)
-
-            with archive.m_context.raw_file(self.data_file, encoding=encoding) as f:
-                from .jv_parser import get_jv_data
-                from baseclasses.helper.archive_builder.jv_archive import get_jv_archive
-
-                jv_dict = get_jv_data(f.name, encoding)
+            from .parse_cache import load_jv_data
+            from baseclasses.helper.archive_builder.jv_archive import get_jv_archive
+
+            jv_dict = load_jv_data(archive, self.data_file)
+            computed = None
+            if config.validate_jv_parameters:
+                from .jv_analysis import validate_jv_parameters
+                with stage('validate'):
+                    computed, _ = validate_jv_parameters(jv_dict, logger, jv_dict['intensity'])
+            with stage('archive'):
                 get_jv_archive(jv_dict, self.data_file, self)
 
+            if config.write_jv_summaries:
+                from .jv_summary import measurement_record, update_sample_summary, write_jv_record
+                from .parser import get_search_id
+                search_id = get_search_id(self.data_file)
+                try:
+                    with stage('summary'):
+                        write_jv_record(
+                            archive, self.data_file, search_id, measurement_record(jv_dict, computed))
+                        update_sample_summary(archive, search_id)
+                except OSError as e:
+                    logger.warning('could not write the JV record', exc_info=e)
+
         super(Chose_JVmeasurement, self).normalize(archive, logger)
 
 
+class ChoseArraySidecar(ArchiveSection):
+    '''
+    Reference to the binary file that holds the large arrays of a measurement instead
+    of the archive, see `chose_parser.sidecar`.
+    '''
+
+    file = Quantity(
+        type=str,
+        a_browser=dict(adaptor='RawFileAdaptor'))
+
+    layout = Quantity(
+        type=JSON,
+        description='Name, dtype, shape and byte offset of every array in the file.')
+
+    def load(self, archive):
+        # dict of the arrays, memory mapped if the raw file is local
+        from .sidecar import load_sidecar
+        return load_sidecar(archive, self.file, self.layout)
+
+
+def write_array_sidecar(section, archive, arrays):
+    from .sidecar import get_sidecar_path, write_sidecar
+
+    data_file = section.data_file if isinstance(section.data_file, str) else section.data_file[0]
+    path = get_sidecar_path(data_file)
+    with stage('write'):
+        layout = write_sidecar(archive, path, arrays)
+    section.array_sidecar = ChoseArraySidecar(file=path, layout=layout)
+
+
+class ChoseMPPTrackingPreview(ArchiveSection):
+    m_def = Section(label_quantity='resolution')
+
+    resolution = Quantity(
+        type=int,
+        description='The number of points the series was decimated to.')
+
+    time = Quantity(type=np.dtype(np.float64), shape=['*'], unit='hour')
+
+    efficiency = Quantity(
+        type=np.dtype(np.float64), shape=['*'],
+        description='The power conversion efficiency in %.')
+
+    power_density = Quantity(type=np.dtype(np.float64), shape=['*'], unit='mW/cm**2')
+
+    voltage = Quantity(type=np.dtype(np.float64), shape=['*'], unit='V')
+
+    current_density = Quantity(type=np.dtype(np.float64), shape=['*'], unit='mA/cm**2')
+
+
 class Chose_MPPTracking(MPPTracking, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'location',
-                'end_time',  'steps', 'instruments', 'results', ],
-            properties=dict(
-                order=[
-                    "name",
-                    "data_file",
-                    "samples"])),
-        a_plot=[
+    m_def = Section(**eln_annotations(
+        'Chose_MPPTracking', a_plot=[
             {
+                'label': 'MPP tracking',
+                'x': 'previews/0/time',
+                'y': ['previews/0/efficiency', 'previews/0/voltage'],
+                'layout': {
+                    "showlegend": True,
+                    'yaxis': {
+                        "fixedrange": False},
+                    'xaxis': {
+                        "fixedrange": False}},
+            },
+            {
+                'label': 'MPP tracking (full resolution)',
                 'x': 'time',
                 'y': ['efficiency', 'voltage'],
                 'layout': {
@@ -555,35 +526,36 @@ class Chose_MPPTracking(MPPTracking, EntryData):
                         "fixedrange": False},
                     'xaxis': {
                         "fixedrange": False}},
-            }])
+            }]))
+
+    previews = SubSection(
+        section_def=ChoseMPPTrackingPreview, repeats=True,
+        description='Min/max preserving decimations of the tracking data for plotting.')
 
+    array_sidecar = SubSection(
+        section_def=ChoseArraySidecar,
+        description='The full resolution data, if it is not stored in the archive.')
+
+    @instrumented
     def normalize(self, archive, logger):
         if self.data_file:
-            from baseclasses.helper.utilities import get_encoding
-            with archive.m_context.raw_file(self.data_file, "br") as f:
-                encoding = get_encoding(f)
-
-            with archive.m_context.raw_file(self.data_file, encoding=encoding) as f:
-                from .mpp_parser import get_mpp_data, get_mpp_archive
-                mpp_dict, data = get_mpp_data(f.name, encoding)
-                get_mpp_archive(mpp_dict, data, self)
+            from .parse_cache import load_mpp_data
+            from .mpp_parser import get_mpp_archive
+
+            try:
+                mpp_dict, data = load_mpp_data(archive, self.data_file)
+                if config.array_sidecar:
+                    write_array_sidecar(self, archive, data)
+                with stage('archive'):
+                    get_mpp_archive(mpp_dict, data, self, full_resolution=not config.array_sidecar)
+            except ValueError as e:
+                logger.error('could not parse the MPP tracking file', exc_info=e)
         super(Chose_MPPTracking, self).normalize(archive, logger)
 
 
 class Chose_EQEmeasurement(EQEMeasurement, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id', 'solution',
-                'users',
-                'location',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name",
-                    "data_file",
-                    "samples"])),
-        a_plot=[
+    m_def = Section(**eln_annotations(
+        'Chose_EQEmeasurement', a_plot=[
             {
                 'x': 'eqe_data/:/photon_energy_array',
                 'y': 'eqe_data/:/eqe_array',
@@ -593,77 +565,170 @@ class Chose_EQEmeasurement(EQEMeasurement, EntryData):
                         "fixedrange": False},
                     'xaxis': {
                         "fixedrange": False}},
-            }])
+            }]))
+
+    @instrumented
+    def normalize(self, archive, logger):
+        if not self.data_file and self.eqe_data and self.eqe_data[0].eqe_data_file:
+            # entries of older versions reference the file in the SolarCellEQE section,
+            # which then parses it again in its own normalize
+            self.data_file = self.eqe_data[0].eqe_data_file
+            self.eqe_data[0].eqe_data_file = None
+
+        if self.data_file:
+            from nomad.datamodel.metainfo.eln import SolarCellEQE
+            from .encoding import read_raw_text
+            from .eqe_parser import analyze_eqe, get_eqe_archive, read_eqe_data
+            from .raw_io import read_raw_file
+
+            try:
+                with read_raw_file(archive, self.data_file) as raw:
+                    with stage('parse'):
+                        eqe_dict = read_raw_text(
+                            raw, read_eqe_data, archive.metadata.upload_id, self.data_file)
+                        count(rows=len(eqe_dict['eqe']))
+            except ValueError as e:
+                logger.error('could not parse the EQE file', exc_info=e)
+            else:
+                if not self.eqe_data:
+                    self.eqe_data = [SolarCellEQE()]
+                with stage('archive'):
+                    get_eqe_archive(
+                        eqe_dict, analyze_eqe(eqe_dict['wavelength'], eqe_dict['eqe']),
+                        self.eqe_data[0])
+
+        super(Chose_EQEmeasurement, self).normalize(archive, logger)
+
+
+class ChoseSpectrumPreview(ArchiveSection):
+    m_def = Section(label_quantity='name')
+
+    name = Quantity(type=str)
+
+    wavelength = Quantity(type=np.dtype(np.float64), shape=['*'], unit='nm')
+
+    intensity = Quantity(type=np.dtype(np.float32), shape=['*'])
+
+
+class ChoseSpectra(ArchiveSection):
+    '''
+    All spectra of the data files as one matrix over a shared wavelength axis. Setting
+    start, stop and step resamples the spectra onto that grid.
+    '''
+
+    resample_start = Quantity(
+        type=np.dtype(np.float64), unit='nm',
+        a_eln=dict(component='NumberEditQuantity', defaultDisplayUnit='nm'))
+
+    resample_stop = Quantity(
+        type=np.dtype(np.float64), unit='nm',
+        a_eln=dict(component='NumberEditQuantity', defaultDisplayUnit='nm'))
+
+    resample_step = Quantity(
+        type=np.dtype(np.float64), unit='nm',
+        a_eln=dict(component='NumberEditQuantity', defaultDisplayUnit='nm'))
+
+    names = Quantity(type=str, shape=['*'])
+
+    wavelength = Quantity(type=np.dtype(np.float64), shape=['*'], unit='nm')
+
+    intensity = Quantity(
+        type=np.dtype(np.float32), shape=['*', '*'],
+        description='One row per spectrum, one column per wavelength.')
+
+    previews = SubSection(
+        section_def=ChoseSpectrumPreview, repeats=True,
+        description='Decimated spectra for plotting, kept with an array sidecar.')
+
+
+def normalize_spectra(section, archive, logger):
+    # reads all data files of a PL or UV-vis measurement into section.spectra
+    from .encoding import read_raw_text
+    from .raw_io import read_raw_file
+    from .spectra_parser import get_spectra_archive, read_spectra
+
+    data_files = [section.data_file] if isinstance(section.data_file, str) else list(section.data_file)
+    spectra_list = []
+    try:
+        for data_file in data_files:
+            with read_raw_file(archive, data_file) as raw:
+                with stage('parse'):
+                    spectra_list.append(read_raw_text(
+                        raw, read_spectra, archive.metadata.upload_id, data_file))
+                    count(rows=spectra_list[-1]['intensity'].size)
+    except ValueError as e:
+        logger.warning('could not read the spectra of the data file', exc_info=e)
+        return False
+    if section.spectra is None:
+        section.spectra = ChoseSpectra()
+    with stage('archive'):
+        get_spectra_archive(spectra_list, section.spectra)
+    if config.array_sidecar:
+        write_array_sidecar(section, archive, dict(
+            wavelength=section.spectra.wavelength.magnitude, intensity=section.spectra.intensity))
+        section.spectra.intensity = None
+    return True
+
+
+def normalize_without_data_file(section, cls, archive, logger):
+    # the normalize of the baseclasses without their parsing of the data files, which
+    # would store the spectra a second time
+    data_file, section.data_file = section.data_file, None
+    try:
+        super(cls, section).normalize(archive, logger)
+    finally:
+        section.data_file = data_file
 
 
 class Chose_PLmeasurement(PLMeasurement, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'location',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name",
-                    "data_file",
-                    "samples", "solution"])),
-        a_plot=[
+    m_def = Section(**eln_annotations(
+        'Chose_PLmeasurement', a_plot=[
             {
-                'x': 'data/wavelength',
-                'y': 'data/intensity',
+                'x': 'spectra/previews/:/wavelength',
+                'y': 'spectra/previews/:/intensity',
                 'layout': {
                     "showlegend": True,
                     'yaxis': {
                         "fixedrange": False},
                     'xaxis': {
                         "fixedrange": False}},
-            }])
+            }]))
 
-    def normalize(self, archive, logger):
+    spectra = SubSection(section_def=ChoseSpectra)
+
+    array_sidecar = SubSection(section_def=ChoseArraySidecar)
 
-        super(Chose_PLmeasurement, self).normalize(archive, logger)
+    @instrumented
+    def normalize(self, archive, logger):
+        if self.data_file and normalize_spectra(self, archive, logger):
+            self.data = None
+            normalize_without_data_file(self, Chose_PLmeasurement, archive, logger)
+        else:
+            super(Chose_PLmeasurement, self).normalize(archive, logger)
 
 
 class Chose_UVvismeasurement(UVvisMeasurement, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'location',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name",
-                    "data_file",
-                    "samples", "solution"])))
+    m_def = Section(**eln_annotations('Chose_UVvismeasurement'))
 
-    def normalize(self, archive, logger):
+    spectra = SubSection(section_def=ChoseSpectra)
+
+    array_sidecar = SubSection(section_def=ChoseArraySidecar)
 
-        super(Chose_UVvismeasurement,
-              self).normalize(archive, logger)
+    @instrumented
+    def normalize(self, archive, logger):
+        if self.data_file and normalize_spectra(self, archive, logger):
+            self.measurements = []
+            normalize_without_data_file(self, Chose_UVvismeasurement, archive, logger)
+        else:
+            super(Chose_UVvismeasurement,
+                  self).normalize(archive, logger)
 
 
 # %%####################################### Generic Entries
 
 
 class Chose_Process(BaseProcess, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'location',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name",
-                    "present",
-                    "data_file",
-                    "batch",
-                    "samples"])))
+    m_def = Section(**eln_annotations('Chose_Process'))
 
     data_file = Quantity(
         type=str,
@@ -671,26 +736,13 @@ class Chose_Process(BaseProcess, EntryData):
         a_eln=dict(component='FileEditQuantity'),
         a_browser=dict(adaptor='RawFileAdaptor'))
 
+    def normalize(self, archive, logger):
+        super(Chose_Process, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
+
 
 class Chose_WetChemicalDepoistion(WetChemicalDeposition, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'location',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name",
-                    "present",
-                    "datetime", "previous_process",
-                    "batch",
-                    "samples",
-                    "solution",
-                    "layer",
-                    "quenching",
-                    "annealing"])))
+    m_def = Section(**eln_annotations('Chose_WetChemicalDepoistion'))
 
     data_file = Quantity(
         type=str,
@@ -698,24 +750,13 @@ class Chose_WetChemicalDepoistion(WetChemicalDeposition, EntryData):
         a_eln=dict(component='FileEditQuantity'),
         a_browser=dict(adaptor='RawFileAdaptor'))
 
+    def normalize(self, archive, logger):
+        super(Chose_WetChemicalDepoistion, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
+
 
 class Chose_Deposition(LayerDeposition, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'location',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name",
-                    "present",
-                    "datetime", "previous_process",
-                    "batch",
-                    "samples",
-                    "layer"
-                ])))
+    m_def = Section(**eln_annotations('Chose_Deposition'))
 
     data_file = Quantity(
         type=str,
@@ -723,20 +764,13 @@ class Chose_Deposition(LayerDeposition, EntryData):
         a_eln=dict(component='FileEditQuantity'),
         a_browser=dict(adaptor='RawFileAdaptor'))
 
+    def normalize(self, archive, logger):
+        super(Chose_Deposition, self).normalize(archive, logger)
+        normalize_process(self, archive, logger)
+
 
 class Chose_Measurement(BaseMeasurement, EntryData):
-    m_def = Section(
-        a_eln=dict(
-            hide=[
-                'lab_id',
-                'users',
-                'location',
-                'end_time', 'steps', 'instruments', 'results'],
-            properties=dict(
-                order=[
-                    "name",
-                    "data_file",
-                    "samples", "solution"])))
+    m_def = Section(**eln_annotations('Chose_Measurement'))
 
     data_file = Quantity(
         type=str,
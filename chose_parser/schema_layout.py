@@ -0,0 +1,115 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+ELN layout of the Chose sections, one row per section: the hidden quantities, the
+order of the edit form and the template of new entries. The section definitions in
+schema.py take their annotations from here with `eln_annotations`.
+'''
+
+HIDE_PROCESS = ['lab_id', 'users', 'end_time', 'steps', 'instruments', 'results']
+HIDE_MEASUREMENT = ['lab_id', 'users', 'location', 'end_time', 'steps', 'instruments', 'results']
+HIDE_SAMPLE = ['users', 'components', 'elemental_composition']
+
+ORDER_PROCESS = ['name', 'location', 'present', 'datetime', 'previous_process', 'batch', 'samples']
+ORDER_DEPOSITION = ORDER_PROCESS + ['solution', 'layer', 'properties', 'quenching', 'annealing']
+ORDER_VAPOUR = ['name', 'location', 'present', 'datetime', 'batch', 'samples', 'layer']
+ORDER_MEASUREMENT = ['name', 'data_file', 'samples', 'solution']
+
+TEMPLATE_CHOSE = dict(institute='HZB_Chose')
+TEMPLATE_ABSORBER = dict(layer_type='Absorber Layer')
+
+# section: (hidden quantities, order, template)
+ELN_LAYOUTS = {
+    'Chose_ExperimentalPlan': (['users'], [
+        'name', 'standard_plan', 'load_standard_processes', 'create_samples_and_processes',
+        'number_of_substrates', 'substrates_per_subbatch', 'lab_id'], TEMPLATE_CHOSE),
+    'Chose_StandardSample': (
+        ['users'], ['name', 'architecture', 'substrate', 'processes', 'lab_id'], None),
+    'Chose_Substrate': (['lab_id'] + HIDE_SAMPLE, [
+        'name', 'substrate', 'conducting_material', 'solar_cell_area', 'pixel_area',
+        'number_of_pixels'], None),
+    'ChoseSolutionChemical': (['chemical'], None, None),
+    'Chose_Solution': (HIDE_SAMPLE + [
+        'method', 'temperature', 'time', 'speed', 'solvent_ratio', 'washing'], [
+        'name', 'datetime', 'lab_id', 'description', 'preparation', 'solute', 'solvent',
+        'other_solution', 'additive', 'storage'], dict(temperature=45, time=15, method='Shaker')),
+    'Chose_Sample': (HIDE_SAMPLE, ['name', 'substrate', 'architecture'], TEMPLATE_CHOSE),
+    'Chose_BasicSample': (HIDE_SAMPLE, None, TEMPLATE_CHOSE),
+    'Chose_Batch': (['users', 'samples'], [
+        'name', 'export_batch_ids', 'csv_export_file', 'export_table', 'table_export_format',
+        'table_export_file'], None),
+
+    'Chose_Cleaning': (HIDE_PROCESS, ORDER_PROCESS, None),
+    'Chose_SprayPyrolysis': (HIDE_PROCESS, ORDER_DEPOSITION, None),
+    'Chose_Inkjet_Printing': (HIDE_PROCESS, [
+        'name', 'location', 'present', 'recipe_used', 'print_head_used', 'datetime',
+        'previous_process', 'batch', 'samples', 'solution', 'layer', 'properties',
+        'print_head_path', 'nozzle_voltage_profile', 'quenching', 'annealing'], TEMPLATE_ABSORBER),
+    'Chose_SpinCoating': (HIDE_PROCESS + ['recipe'], [
+        'name', 'location', 'present', 'recipe', 'datetime', 'previous_process', 'batch',
+        'samples', 'solution', 'layer', 'quenching', 'annealing'], TEMPLATE_ABSORBER),
+    'Chose_DipCoating': (HIDE_PROCESS, [
+        'name', 'location', 'present', 'datetime', 'batch', 'samples', 'solution', 'layer',
+        'quenching', 'annealing'], TEMPLATE_ABSORBER),
+    'Chose_SlotDieCoating': (HIDE_PROCESS + ['author'], ORDER_DEPOSITION, TEMPLATE_ABSORBER),
+    'Chose_Sputtering': (HIDE_PROCESS, ORDER_VAPOUR, None),
+    'Chose_AtomicLayerDeposition': (HIDE_PROCESS, ORDER_VAPOUR, None),
+    'ChoseEvaporation': (['chemical'], None, None),
+    'Chose_Evaporation': (HIDE_PROCESS + [
+        'organic_evaporation', 'inorganic_evaporation', 'perovskite_evaporation'],
+        ORDER_VAPOUR, None),
+    'Chose_LaserScribing': (
+        HIDE_PROCESS, ['name', 'location', 'present', 'datetime', 'batch', 'samples'], None),
+    'Chose_Storage': (HIDE_MEASUREMENT, ORDER_PROCESS, None),
+
+    'Chose_JVmeasurement': (HIDE_PROCESS + [
+        'solution', 'author', 'certified_values', 'certification_institute'], [
+        'name', 'data_file', 'active_area', 'intensity', 'integration_time', 'settling_time',
+        'averaging', 'compliance', 'samples'], None),
+    'Chose_MPPTracking': (HIDE_MEASUREMENT, ['name', 'data_file', 'samples'], None),
+    'Chose_EQEmeasurement': (
+        HIDE_MEASUREMENT + ['solution'], ['name', 'data_file', 'samples'], None),
+    'Chose_PLmeasurement': (HIDE_MEASUREMENT, ORDER_MEASUREMENT, None),
+    'Chose_UVvismeasurement': (HIDE_MEASUREMENT, ORDER_MEASUREMENT, None),
+
+    'Chose_Process': (
+        HIDE_MEASUREMENT, ['name', 'present', 'data_file', 'batch', 'samples'], None),
+    'Chose_WetChemicalDepoistion': (HIDE_MEASUREMENT, [
+        'name', 'present', 'datetime', 'previous_process', 'batch', 'samples', 'solution',
+        'layer', 'quenching', 'annealing'], None),
+    'Chose_Deposition': (HIDE_MEASUREMENT, [
+        'name', 'present', 'datetime', 'previous_process', 'batch', 'samples', 'layer'], None),
+    'Chose_Measurement': (HIDE_MEASUREMENT, ORDER_MEASUREMENT, None),
+}
+
+
+def eln_annotations(name, **kwargs):
+    '''
+    The keyword arguments of the Section of `name`: its a_eln and a_template annotations
+    and `kwargs`, e.g. a_plot or label_quantity.
+    '''
+    hide, order, template = ELN_LAYOUTS[name]
+    a_eln = dict(hide=list(hide))
+    if order:
+        a_eln['properties'] = dict(order=list(order))
+    annotations = dict(a_eln=a_eln)
+    if template:
+        annotations['a_template'] = dict(template)
+    annotations.update(kwargs)
+    return annotations
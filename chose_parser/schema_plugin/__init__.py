@@ -0,0 +1,6 @@
+'''
+Schema plugin of the Chose sections. Importing it registers the metainfo package of
+`chose_parser.schema`, which the parser plugin does not import.
+'''
+
+from ..schema import *  # noqa: F401,F403
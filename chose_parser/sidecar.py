@@ -0,0 +1,113 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Binary sidecar files for the large arrays of a measurement. All arrays of a data file
+are packed into the bytes of one `<data_file>.arrays.npy`, each starting at an aligned
+offset. The archive keeps the layout (name, dtype, shape, offset) and the loader maps
+the file into memory and returns views into it.
+'''
+
+import io
+import os
+
+import numpy as np
+
+SIDECAR_SUFFIX = '.arrays.npy'
+ALIGNMENT = 64
+# largest float32 rounding error of an axis relative to its smallest step
+AXIS_TOLERANCE = 0.01
+
+
+def get_sidecar_path(data_file):
+    return f'{data_file}{SIDECAR_SUFFIX}'
+
+
+def storage_dtype(array):
+    '''
+    float32 for measured values, whose precision is far below float32's. Monotonic
+    axes, e.g. the time of a long tracking, stay float64 if float32 cannot resolve
+    their steps.
+    '''
+    if array.dtype != np.float64:
+        return array.dtype
+    with np.errstate(over='ignore'):
+        single = array.astype(np.float32)
+    if not np.array_equal(np.isfinite(single), np.isfinite(array)):
+        return array.dtype
+    if array.ndim == 1 and array.size > 1:
+        steps = np.diff(array)
+        if (steps > 0).all() or (steps < 0).all():
+            error = np.abs(single - array).max()
+            if error > AXIS_TOLERANCE * np.abs(steps).min():
+                return array.dtype
+    return np.dtype(np.float32)
+
+
+def pack_arrays(arrays):
+    '''
+    Packs a dict of arrays into one uint8 buffer. Returns the buffer and the layout,
+    a list of dicts with name, dtype, shape and byte offset of each array.
+    '''
+    layout, offset = [], 0
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        dtype = storage_dtype(array)
+        layout.append(dict(name=name, dtype=dtype.str, shape=list(array.shape), offset=offset))
+        offset += -(-array.size * dtype.itemsize // ALIGNMENT) * ALIGNMENT
+
+    buffer = np.zeros(offset, dtype=np.uint8)
+    for item, array in zip(layout, arrays.values()):
+        dtype = np.dtype(item['dtype'])
+        size = int(np.prod(item['shape'])) * dtype.itemsize
+        target = buffer[item['offset']:item['offset'] + size].view(dtype).reshape(item['shape'])
+        target[...] = array
+    return buffer, layout
+
+
+def unpack_arrays(buffer, layout):
+    arrays = {}
+    for item in layout:
+        dtype = np.dtype(item['dtype'])
+        size = int(np.prod(item['shape'])) * dtype.itemsize
+        arrays[item['name']] = buffer[item['offset']:item['offset'] + size].view(dtype).reshape(
+            item['shape'])
+    return arrays
+
+
+def write_sidecar(archive, path, arrays):
+    buffer, layout = pack_arrays(arrays)
+    with archive.m_context.raw_file(path, 'wb') as f:
+        np.save(f, buffer)
+    return layout
+
+
+def load_arrays(filename, layout, mmap_mode='r'):
+    # the arrays are read-only views into the mapped file
+    return unpack_arrays(np.load(filename, mmap_mode=mmap_mode), layout)
+
+
+def load_sidecar(archive, path, layout):
+    try:
+        filename = os.path.join(archive.m_context.raw_path(), path)
+    except (AttributeError, NotImplementedError):
+        filename = None
+    if filename and os.path.exists(filename):
+        return load_arrays(filename, layout)
+    with archive.m_context.raw_file(path, 'rb') as f:
+        return unpack_arrays(np.load(io.BytesIO(f.read())), layout)
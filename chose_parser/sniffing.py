@@ -0,0 +1,143 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Classifies measurement files by the header signature of the Chose instruments. Only a
+bounded prefix of each file is read, so rejecting a misnamed file costs one small read.
+'''
+
+import bz2
+import gzip
+import lzma
+import os
+
+from .encoding import probe_encoding
+
+SNIFF_SIZE = 8 * 1024
+
+COMPRESSIONS = [
+    (b'\x1f\x8b', gzip.open),
+    (b'BZh', bz2.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+]
+
+# result of a signature check that needs more lines than the prefix holds
+UNDECIDED = None
+# consecutive numeric rows that make a table
+TABLE_MIN_ROWS = 2
+
+
+def _columns_in_line(lines, index, columns, truncated):
+    if len(lines) <= index:
+        # a complete file that is shorter does not match
+        return UNDECIDED if truncated else False
+    names = lines[index].rstrip('\r').split('\t')
+    return all(column in names for column in columns)
+
+
+def is_jv_file(lines, truncated=False):
+    from .jv_parser import TABLE_COLUMNS, TABLE_START
+    return _columns_in_line(lines, TABLE_START, TABLE_COLUMNS.values(), truncated)
+
+
+def is_mpp_file(lines, truncated=False):
+    from .mpp_parser import MPP_COLUMNS, MPP_HEADER_LINES
+    return _columns_in_line(lines, MPP_HEADER_LINES, MPP_COLUMNS, truncated)
+
+
+def is_table_file(lines, truncated=False):
+    # a numeric table with at least two columns, the table of a long header may start
+    # beyond the prefix
+    from .numeric import is_numeric_line
+    rows = 0
+    for line in lines:
+        rows = rows + 1 if is_numeric_line(line) else 0
+        if rows >= TABLE_MIN_ROWS:
+            return True
+    return UNDECIDED if truncated else False
+
+
+# type token -> check of the decoded prefix lines and whether the prefix was cut, in
+# the order files are reclassified
+SIGNATURES = {
+    'jv': is_jv_file,
+    'mpp': is_mpp_file,
+}
+
+# checks of types without an instrument signature, they only decide whether a file
+# named with the type is accepted and never reclassify other files
+CONTENT_CHECKS = {
+    'eqe': is_table_file,
+    'pl': is_table_file,
+    'uvvis': is_table_file,
+}
+
+
+def read_prefix(filename, size=SNIFF_SIZE):
+    with open(filename, 'rb') as f:
+        prefix = f.read(size)
+    for magic, open_compressed in COMPRESSIONS:
+        if prefix.startswith(magic):
+            with open_compressed(filename, 'rb') as f:
+                return f.read(size)
+    return prefix
+
+
+def sniff_measurement_type(type_token, prefix):
+    '''
+    The type token for a file named with `type_token` and starting with `prefix`: the
+    named type if the content matches its signature or the type has no signature,
+    another type if the content matches that type's signature, otherwise the named type
+    if the content passes its content check or it has none, None to reject the file.
+    '''
+    # all signatures are ascii, any single byte encoding will do if the probe fails
+    encoding = probe_encoding(prefix) or 'latin-1'
+    if b'\x00' in prefix and not encoding.startswith(('utf-16', 'utf-32')):
+        # binary content, the instruments write text files
+        return None
+    lines = prefix.decode(encoding, errors='replace').split('\n')
+    truncated = len(prefix) >= SNIFF_SIZE
+    if truncated:
+        # the last line may be cut
+        lines = lines[:-1]
+
+    check = SIGNATURES.get(type_token)
+    if check is not None:
+        matches = check(lines, truncated)
+        if matches or matches is UNDECIDED:
+            return type_token
+    for other_token, other_check in SIGNATURES.items():
+        if other_token != type_token and other_check(lines, truncated):
+            return other_token
+    if check is not None:
+        return None
+
+    content_check = CONTENT_CHECKS.get(type_token)
+    if content_check is not None:
+        matches = content_check(lines, truncated)
+        return type_token if matches or matches is UNDECIDED else None
+    return type_token
+
+
+def sniff_file(filename):
+    type_token = os.path.basename(filename).rsplit('.', 2)[-2]
+    try:
+        prefix = read_prefix(filename)
+    except OSError:
+        return None
+    return sniff_measurement_type(type_token, prefix)
@@ -0,0 +1,158 @@
+#
+# Copyright The NOMAD Authors.
+#
+# This file is part of NOMAD. See https://nomad-lab.eu for further info.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+'''
+Reader for PL and UV-vis exports with many spectra per file: a first column with the
+wavelength and one column per spectrum. The spectra are kept as one float32 matrix of
+shape (spectra, wavelengths) and a shared wavelength axis. The archive also keeps a
+min/max decimated preview of up to MAX_PREVIEWS spectra for the default plot, which
+stays when the matrix is moved to an array sidecar.
+'''
+
+import itertools
+
+import numpy as np
+
+from .downsampling import decimate
+from .numeric import (
+    ColumnBuffer, is_numeric_line, parse_numeric_block, parse_numeric_lines, unique_names)
+
+CHUNK_LINES = 1 << 14
+# points per preview and number of spectra with a preview
+PREVIEW_RESOLUTION = 500
+MAX_PREVIEWS = 32
+
+
+def read_spectra(f, chunk_lines=CHUNK_LINES, dtype=np.float32):
+    # The header is read line by line up to the first numeric row, the data in chunks.
+    preamble = []
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError('not a spectrum file, no numeric data found')
+        if is_numeric_line(line):
+            break
+        preamble.append(line)
+
+    ncols = len(line.split())
+    if preamble and len(preamble[-1].rstrip('\r\n').split('\t')) >= ncols:
+        names = unique_names(preamble.pop().rstrip('\r\n').split('\t')[:ncols])
+    else:
+        names = ['wavelength'] + [f'spectrum {index}' for index in range(1, ncols)]
+
+    buffer = ColumnBuffer(ncols, dtype=dtype)
+    lines = [line]
+    while lines:
+        block = ''.join(lines)
+        data = parse_numeric_block(block, ncols, dtype)
+        if data is None:
+            data = parse_numeric_lines(lines, ncols, dtype=dtype)
+        buffer.append(data)
+        lines = list(itertools.islice(f, chunk_lines))
+    columns = buffer.columns()
+
+    wavelength = columns[0].astype(np.float64)
+    intensity = columns[1:]
+    if wavelength.size > 1 and wavelength[0] > wavelength[-1]:
+        wavelength = wavelength[::-1].copy()
+        intensity = np.ascontiguousarray(intensity[:, ::-1])
+
+    return {
+        'header': [line.rstrip('\r\n') for line in preamble],
+        'names': names[1:],
+        'wavelength': wavelength,
+        'intensity': intensity,
+    }
+
+
+def get_spectra(filename, encoding='utf-8'):
+    with open(filename, encoding=encoding) as f:
+        return read_spectra(f)
+
+
+def resample_spectra(wavelength, intensity, grid):
+    '''
+    Linear interpolation of all spectra onto the ascending `grid` at once, points
+    outside of the measured range are nan.
+    '''
+    grid = np.asarray(grid, dtype=np.float64)
+    index = np.clip(np.searchsorted(wavelength, grid), 1, wavelength.size - 1)
+    left, right = wavelength[index - 1], wavelength[index]
+    weight = ((grid - left) / (right - left)).astype(intensity.dtype)
+    result = intensity[:, index - 1] * (1 - weight) + intensity[:, index] * weight
+    result[:, (grid < wavelength[0]) | (grid > wavelength[-1])] = np.nan
+    return result
+
+
+def get_grid(start, stop, step):
+    if start is None or stop is None or not step:
+        return None
+    return np.arange(start, stop + step / 2, step)
+
+
+def combine_spectra(spectra_list, grid=None):
+    '''
+    Stacks the spectra of several files. Without a grid all spectra are resampled onto
+    the axis of the first file, unless all files share it.
+    '''
+    wavelength = grid if grid is not None else spectra_list[0]['wavelength']
+    names, matrices = [], []
+    for spectra in spectra_list:
+        intensity = spectra['intensity']
+        if grid is not None or not np.array_equal(spectra['wavelength'], wavelength):
+            intensity = resample_spectra(spectra['wavelength'], intensity, wavelength)
+        names += spectra['names']
+        matrices.append(intensity)
+    intensity = matrices[0] if len(matrices) == 1 else np.concatenate(matrices)
+    return names, np.asarray(wavelength, dtype=np.float64), intensity
+
+
+def get_spectra_previews(names, wavelength, intensity, resolution=PREVIEW_RESOLUTION,
+                         max_previews=MAX_PREVIEWS):
+    '''
+    (name, wavelength, intensity) of min/max decimations of evenly spaced spectra, the
+    first and last one included. Points outside of the measured range are left out.
+    '''
+    rows = np.unique(np.linspace(
+        0, len(intensity) - 1, min(len(intensity), max_previews)).round().astype(int))
+    previews = []
+    for row in rows:
+        finite = np.isfinite(intensity[row])
+        series = decimate(
+            {'wavelength': wavelength[finite], 'intensity': intensity[row][finite]},
+            'intensity', resolution)
+        previews.append((names[row], series['wavelength'], series['intensity']))
+    return previews
+
+
+def get_spectra_archive(spectra_list, spectra_section):
+    from nomad.units import ureg
+
+    from .schema import ChoseSpectrumPreview
+
+    grid = get_grid(
+        *(None if value is None else value.to('nm').magnitude for value in (
+            spectra_section.resample_start, spectra_section.resample_stop,
+            spectra_section.resample_step)))
+    names, wavelength, intensity = combine_spectra(spectra_list, grid)
+    spectra_section.names = names
+    spectra_section.wavelength = wavelength * ureg('nm')
+    spectra_section.intensity = intensity
+    spectra_section.previews = [
+        ChoseSpectrumPreview(name=name, wavelength=x * ureg('nm'), intensity=y)
+        for name, x, y in get_spectra_previews(names, wavelength, intensity)]
@@ -0,0 +1,88 @@
+import csv
+import importlib.util
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from chose_parser.batch_export import (
+    check_export_format, export_rows, get_batch_samples, get_export_path, sample_row, strip_arrays)
+
+SPIN_COATING = {
+    'm_def': 'Chose_SpinCoating',
+    'datetime': '2023-10-02T10:00:00',
+    'samples': [{'reference': '#/data'}],
+    'solution': [{'solution_volume': 5e-08}],
+    'recipe_steps': [{'speed': 3000.0, 'time': 30.0}, {'speed': 5000.0, 'time': 10.0}],
+}
+JV = {
+    'datetime': '2023-10-05T10:00:00',
+    'jv_curve': [
+        {'cell_name': 'A1 FW', 'efficiency': 18.1, 'voltage': [0.0, 0.5, 1.0]},
+        {'cell_name': 'A1 RV', 'efficiency': 18.9, 'voltage': [0.0, 0.5, 1.0]}],
+}
+
+
+def test_sample_row():
+    entries = [('Chose_JVmeasurement', JV), ('Chose_SpinCoating', SPIN_COATING),
+               ('Chose_JVmeasurement', dict(JV, datetime='2023-10-06T10:00:00'))]
+    row = sample_row('B1_1', [(entry_type, strip_arrays(data)) for entry_type, data in entries])
+    assert row['sample_id'] == 'B1_1'
+    assert row['SpinCoating.solution.0.solution_volume'] == 5e-08
+    assert row['SpinCoating.recipe_steps.1.speed'] == 5000.0
+    assert row['JVmeasurement.jv_curve.1.efficiency'] == 18.9
+    assert row['JVmeasurement_2.jv_curve.0.cell_name'] == 'A1 FW'
+    assert not any('voltage' in column or 'samples' in column for column in row)
+
+
+def rows(n):
+    for index in range(n):
+        row = {'sample_id': f'B1_{index}', 'SpinCoating.speed': 3000 + index}
+        if index % 2:
+            row['JVmeasurement.jv_curve.0.efficiency'] = 18.5
+        yield row
+
+
+def test_export_csv():
+    f = io.StringIO()
+    assert export_rows(rows(5), f) == 5
+    f.seek(0)
+    table = list(csv.DictReader(f))
+    assert len(table) == 5
+    assert list(table[0]) == ['sample_id', 'SpinCoating.speed', 'JVmeasurement.jv_curve.0.efficiency']
+    assert table[0]['JVmeasurement.jv_curve.0.efficiency'] == ''
+    assert table[1]['JVmeasurement.jv_curve.0.efficiency'] == '18.5'
+
+
+def test_export_parquet(monkeypatch):
+    pq = pytest.importorskip('pyarrow.parquet')
+    monkeypatch.setattr('chose_parser.batch_export.ROW_GROUP_SIZE', 2)
+    f = io.BytesIO()
+    export_rows(rows(5), f, 'parquet')
+    f.seek(0)
+    parquet = pq.ParquetFile(f)
+    assert parquet.num_row_groups == 3
+    table = parquet.read().to_pydict()
+    assert table['SpinCoating.speed'] == [3000, 3001, 3002, 3003, 3004]
+    assert table['JVmeasurement.jv_curve.0.efficiency'] == [None, 18.5, None, 18.5, None]
+
+
+def test_batch_samples():
+    batch = SimpleNamespace(entities=[
+        SimpleNamespace(lab_id='B1_1', reference=SimpleNamespace(
+            m_proxy_value='../uploads/abc/archive/entry1#data')),
+        SimpleNamespace(lab_id='B1_2', reference=None)])
+    assert get_batch_samples(batch) == [('B1_1', 'entry1'), ('B1_2', None)]
+
+
+def test_export_path_and_format():
+    batch = SimpleNamespace(lab_id='HZB_JS_1', name='batch')
+    archive = SimpleNamespace(metadata=SimpleNamespace(mainfile='run_1/HZB_JS_1.archive.json'))
+    assert get_export_path(archive, batch, 'csv') == 'run_1/HZB_JS_1.samples.csv'
+
+    check_export_format('csv')
+    with pytest.raises(ValueError):
+        check_export_format('xlsx')
+    if importlib.util.find_spec('pyarrow') is None:
+        with pytest.raises(ImportError):
+            check_export_format('parquet')
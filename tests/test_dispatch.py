@@ -0,0 +1,37 @@
+from chose_parser.dispatch import MeasurementDispatcher, attach_data_file_list
+
+
+class Entry:
+    data_file = None
+
+
+def test_measurement_dispatcher():
+    dispatcher = MeasurementDispatcher()
+    dispatcher.register_default()(lambda file_name: Entry())
+
+    @dispatcher.register('jv', 'txt')
+    class JVEntry(Entry):
+        def __init__(self, file_name):
+            pass
+
+    @dispatcher.register('uvvis', attach=attach_data_file_list)
+    class UVvisEntry(Entry):
+        def __init__(self, file_name):
+            pass
+
+    entry = dispatcher.create_entry('S1.notes.jv.txt')
+    assert type(entry) is JVEntry and entry.data_file == 'S1.notes.jv.txt'
+
+    entry = dispatcher.create_entry('S1.jv.csv')
+    assert type(entry) is Entry and entry.data_file == 'S1.jv.csv'
+
+    entry = dispatcher.create_entry('S1.uvvis.csv')
+    assert type(entry) is UVvisEntry and entry.data_file == ['S1.uvvis.csv']
+
+    # new measurement types only need a registration
+    dispatcher.register('spv')(lambda file_name: JVEntry(file_name))
+    assert type(dispatcher.create_entry('S1.spv.txt')) is JVEntry
+
+    # the type sniffed from the content overrides the token of the name
+    entry = dispatcher.create_entry('S1.notes.jv.txt', 'uvvis')
+    assert type(entry) is UVvisEntry and entry.data_file == ['S1.notes.jv.txt']
@@ -0,0 +1,45 @@
+import codecs
+
+from chose_parser import encoding
+from chose_parser.encoding import decode_raw, detect_encoding, read_raw_text
+from chose_parser.raw_io import RawBuffer
+
+
+def test_detect_encoding():
+    assert detect_encoding('mA/cm²'.encode('utf-8')) == 'utf-8'
+    assert detect_encoding(codecs.BOM_UTF8 + b'Jsc') == 'utf-8-sig'
+    assert detect_encoding(('x' * 100 + 'mA/cm²\n' * 100).encode('cp1252')) != 'utf-8'
+
+
+def test_decode_raw_cache():
+    raw = ('Jsc\tmA/cm²\n' * 100).encode('cp1252')
+
+    text, detected = decode_raw(raw, 'upload', 'S1.jv.txt')
+    assert text.startswith('Jsc\tmA/cm²')
+    assert encoding._encoding_cache[('upload', 'jv.txt')] == detected
+
+    # sibling files of the same upload reuse the cached encoding
+    assert decode_raw(raw, 'upload', 'S2.notes.jv.txt') == (text, detected)
+
+    # an ascii probe must not hide later non utf-8 bytes
+    raw = ('x' * 10000 + 'mA/cm²').encode('cp1252')
+    text, _ = decode_raw(raw, 'other_upload', 'S1.jv.txt')
+    assert text.endswith('mA/cm²')
+
+
+def test_utf8_sibling_of_cached_encoding():
+    decode_raw(('Jsc\tmA/cm²\n' * 100).encode('cp1252'), 'upload_utf8', 'S1.jv.txt')
+    assert encoding._encoding_cache[('upload_utf8', 'jv.txt')] != 'utf-8'
+
+    # decodes in cp1252 as well, but into 'mA/cmÂ²'
+    text, detected = decode_raw('Jsc\tmA/cm²\n'.encode('utf-8'), 'upload_utf8', 'S2.jv.txt')
+    assert (text, detected) == ('Jsc\tmA/cm²\n', 'utf-8')
+
+
+def test_read_raw_text_detects_again():
+    # the first sample is ascii, the non utf-8 bytes come later
+    content = '0.1\t0.2\n' * encoding.CHARDET_SAMPLE_SIZE + 'Jsc\tmA/cm²\n' * 100
+    raw = RawBuffer('S1.mpp.txt', content.encode('cp1252'))
+    text = read_raw_text(raw, lambda f: f.read(), 'upload_stream', 'S1.mpp.txt')
+    assert text == content
+    assert encoding._encoding_cache[('upload_stream', 'mpp.txt')] != 'utf-8'
@@ -0,0 +1,58 @@
+import io
+import os.path
+
+import numpy as np
+import pytest
+
+from chose_parser.eqe_parser import (
+    BOLTZMANN_EV, ELEMENTARY_CHARGE, HC_EV_NM, TEMPERATURE, analyze_eqe, get_eqe_data, read_eqe_data)
+
+test_file = os.path.join(os.path.dirname(__file__), 'data', 'S1.test.eqe.txt')
+
+
+def test_get_eqe_data():
+    eqe_dict = get_eqe_data(test_file)
+
+    assert eqe_dict['header_lines'] == 9
+    assert eqe_dict['column_names'] == ['Wavelength (nm)', 'EQE (%)']
+    assert len(eqe_dict['wavelength']) == 61
+    np.testing.assert_allclose(eqe_dict['wavelength'][[0, -1]], [300, 900])
+    # percent are converted to fractions
+    assert 0.8 < eqe_dict['eqe'].max() < 0.9
+
+
+def test_read_eqe_data_without_header():
+    eqe_dict = read_eqe_data(io.StringIO('1.5\t10\n2.0\t80\n2.5\t85\n'))
+    assert eqe_dict['header_lines'] is None
+    # photon energies in eV are converted to wavelengths
+    np.testing.assert_allclose(eqe_dict['wavelength'], 1239.84198 / np.array([1.5, 2.0, 2.5]))
+
+    with pytest.raises(ValueError):
+        read_eqe_data(io.StringIO('no\ndata\n'))
+
+
+def test_analyze_eqe():
+    eqe_dict = get_eqe_data(test_file)
+    spectrum = (np.linspace(0.5, 5, 100), np.full(100, 1e17))
+    analysis = analyze_eqe(eqe_dict['wavelength'], eqe_dict['eqe'], spectrum)
+
+    assert np.all(np.diff(analysis['photon_energy']) > 0)
+    assert analysis['bandgap'] == pytest.approx(1.6, abs=0.05)
+    eqe, energy = analysis['eqe'], analysis['photon_energy']
+    expected = np.sum((eqe[1:] + eqe[:-1]) * np.diff(energy) / 2) * 1e17 * ELEMENTARY_CHARGE * 1e4
+    assert analysis['jsc'] == pytest.approx(expected, rel=1e-3)
+
+
+def test_urbach_tail_and_radiative_limit():
+    photon_energy = np.linspace(1.2, 2.5, 400)
+    eqe = np.where(photon_energy > 1.6, 0.8, 0.8 * np.exp((photon_energy - 1.6) / 0.015))
+    # noise floor below the tail
+    eqe[photon_energy < 1.3] = -1e-4
+    spectrum = (np.linspace(0.5, 5, 100), np.full(100, 1e17))
+    analysis = analyze_eqe(HC_EV_NM / photon_energy, eqe, spectrum)
+
+    assert analysis['urbach_energy'] == pytest.approx(0.015, rel=0.02)
+    assert analysis['j0'] > 0
+    assert analysis['voc_rad'] == pytest.approx(
+        BOLTZMANN_EV * TEMPERATURE * np.log(analysis['jsc'] / analysis['j0'] + 1))
+    assert 1.2 < analysis['voc_rad'] < analysis['bandgap']
@@ -0,0 +1,40 @@
+import os.path
+import subprocess
+import sys
+
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+test_file = os.path.join(root, 'tests', 'data', 'S1.test.jv.txt')
+
+
+def imported_modules(statement):
+    code = f'{statement}\nimport sys\nprint("\\n".join(sys.modules))'
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+def top_level(modules):
+    return {name.split('.')[0] for name in modules}
+
+
+def test_package_import_is_lazy():
+    modules = imported_modules('import chose_parser')
+    assert not top_level(modules) & {'nomad', 'baseclasses', 'pandas', 'chardet', 'numpy'}
+
+
+def test_readers_do_not_import_heavy_dependencies():
+    modules = imported_modules(
+        'import chose_parser.jv_parser, chose_parser.mpp_parser, chose_parser.encoding')
+    assert not top_level(modules) & {'nomad', 'baseclasses', 'pandas', 'chardet'}
+
+
+def test_matcher_does_not_import_the_schema():
+    pytest.importorskip('nomad')
+    # as the parser plugin, with nomad installed
+    modules = imported_modules(
+        'import chose_parser\n'
+        f'assert chose_parser.ChoseParser().is_mainfile({test_file!r}, "text/plain", b"", "")')
+    assert not top_level(modules) & {'baseclasses', 'pandas', 'chardet'}
+    assert 'chose_parser.schema' not in modules
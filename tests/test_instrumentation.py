@@ -0,0 +1,109 @@
+import os.path
+from types import SimpleNamespace
+
+import pytest
+
+from chose_parser import config, instrumentation
+from chose_parser.instrumentation import count, get_upload_stats, report_upload, stage, trace
+from chose_parser.parse_cache import load_mpp_data
+
+data_dir = os.path.join(os.path.dirname(__file__), 'data')
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.records = []
+
+    def info(self, event, **kwargs):
+        self.records.append((event, kwargs))
+
+
+@pytest.fixture
+def sample_rate(monkeypatch):
+    monkeypatch.setattr(config, 'instrumentation', True)
+    monkeypatch.setattr(instrumentation, '_uploads', instrumentation.OrderedDict())
+
+    def set_rate(rate):
+        monkeypatch.setattr(config, 'instrumentation_sample_rate', rate)
+    set_rate(1.)
+    return set_rate
+
+
+def test_trace_stages_and_counters(sample_rate):
+    logger = RecordingLogger()
+    with trace(logger, 'upload', 'S1.jv.txt'):
+        with stage('parse'):
+            count(rows=10, bytes=100)
+            with stage('encoding'):
+                count(cache_hits=1)
+        with stage('parse'):
+            count(rows=5)
+        # a nested trace continues the outer one
+        with trace(logger, 'upload', 'other'):
+            with stage('write'):
+                pass
+
+    assert len(logger.records) == 1
+    event, record = logger.records[0]
+    assert record['entry'] == 'S1.jv.txt'
+    stages = record['stages']
+    assert set(stages) == {'total', 'parse', 'encoding', 'write'}
+    assert stages['parse']['calls'] == 2
+    assert stages['parse']['rows'] == 15
+    assert stages['parse']['bytes'] == 100
+    assert stages['encoding']['cache_hits'] == 1
+    assert stages['total']['wall'] >= stages['parse']['wall']
+
+
+def test_not_sampled_and_disabled(sample_rate, monkeypatch):
+    logger = RecordingLogger()
+    sample_rate(0.)
+    with trace(logger, 'upload', 'a'):
+        # an entry that is not sampled is not traced by nested traces either
+        with trace(logger, 'upload', 'b'):
+            with stage('parse'):
+                count(rows=1)
+    sample_rate(1.)
+    monkeypatch.setattr(config, 'instrumentation', False)
+    with trace(logger, 'upload', 'c'):
+        count(rows=1)
+    assert logger.records == []
+    assert get_upload_stats('upload') is None
+
+
+def test_upload_totals(sample_rate, monkeypatch):
+    monkeypatch.setattr(instrumentation, 'UPLOAD_REPORT_INTERVAL', 2)
+    logger = RecordingLogger()
+    for entry in ['a', 'b', 'c']:
+        with trace(logger, 'upload', entry):
+            with stage('parse'):
+                count(rows=2)
+
+    events = [event for event, _ in logger.records]
+    assert events.count('chose parser timings') == 3
+    assert events.count('chose parser upload timings') == 1
+
+    stats = get_upload_stats('upload')
+    assert stats['traces'] == 3
+    assert stats['stages']['parse'] == dict(stats['stages']['parse'], calls=3, rows=6)
+
+    report_upload(logger, 'upload')
+    assert logger.records[-1][1]['traces'] == 3
+    assert get_upload_stats('upload') is None
+
+
+def test_raw_file_counters(sample_rate, monkeypatch):
+    monkeypatch.setattr(config, 'parse_cache_directory', '')
+    monkeypatch.setattr('chose_parser.parse_cache._parse_cache', None)
+    archive = SimpleNamespace(
+        metadata=SimpleNamespace(upload_id='upload'),
+        m_context=SimpleNamespace(
+            raw_file=lambda path, mode='r': open(os.path.join(data_dir, path), mode)))
+    logger = RecordingLogger()
+    with trace(logger, 'upload', 'test_Tracking.txt'):
+        _, data = load_mpp_data(archive, 'test_Tracking.txt')
+
+    stages = logger.records[0][1]['stages']
+    assert stages['read']['bytes'] == os.path.getsize(os.path.join(data_dir, 'test_Tracking.txt'))
+    assert stages['parse']['rows'] == len(next(iter(data.values())))
+    assert stages['encoding']['calls'] == 1
@@ -0,0 +1,81 @@
+import os.path
+
+import numpy as np
+
+from chose_parser.jv_analysis import (
+    compare_jv_parameters, compute_jv_parameters, validate_jv_parameters)
+from chose_parser.jv_parser import get_jv_data
+
+test_file = os.path.join(os.path.dirname(__file__), 'data', 'S1.test.jv.txt')
+
+
+def diode_curve(voltage, j_ph=21.5, j_0=1e-9, n_vt=0.05):
+    return j_ph - j_0 * np.expm1(voltage / n_vt)
+
+
+def test_compute_jv_parameters():
+    voltage = np.linspace(-0.2, 1.3, 1501)
+    current_density = diode_curve(voltage)
+    # second curve: reverse scan with the opposite sign convention
+    result = compute_jv_parameters(
+        [voltage, voltage[::-1]], [current_density, -current_density[::-1]], active_area=0.16)
+
+    v_oc = 0.05 * np.log1p(21.5 / 1e-9)
+    power = voltage * current_density
+    np.testing.assert_allclose(result['J_sc'], 21.5, rtol=1e-6)
+    np.testing.assert_allclose(result['V_oc'], v_oc, rtol=1e-4)
+    np.testing.assert_allclose(result['P_MPP'], power.max(), rtol=1e-9)
+    np.testing.assert_allclose(result['Efficiency'], power.max())
+    np.testing.assert_allclose(result['Fill_factor'], 100 * power.max() / (21.5 * v_oc), rtol=1e-4)
+    # dV/dJ at Voc is n_vt / (j_0 + j_ph) in V cm²/mA
+    np.testing.assert_allclose(result['R_ser'], 0.05 / 21.5 * 1e3 / 0.16, rtol=0.05)
+    assert (result['R_par'] > 1e6).all()
+
+
+def test_compute_jv_parameters_without_voc():
+    voltage = np.linspace(0, 0.5, 50)
+    result = compute_jv_parameters([voltage], [diode_curve(voltage)])
+    assert np.isnan(result['V_oc']).all()
+    np.testing.assert_allclose(result['J_sc'], 21.5)
+
+
+def test_compare_jv_parameters():
+    voltage = np.linspace(-0.2, 1.3, 1501)
+    current_density = diode_curve(voltage)
+    computed = compute_jv_parameters([voltage], [current_density])
+    jv_dict = {
+        'J_sc': [21.5], 'V_oc': [1.0], 'Efficiency': [0.],
+        'jv_curve': [{'name': 'FW V_1', 'voltage': voltage, 'current_density': current_density}]}
+
+    disagreements = compare_jv_parameters(jv_dict, computed)
+    assert [(name, key) for name, key, _, _ in disagreements] == [
+        ('FW V_1', 'V_oc'), ('FW V_1', 'Efficiency')]
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.warnings = []
+
+    def warning(self, event, **kwargs):
+        self.warnings.append(kwargs)
+
+
+def test_validate_jv_parameters_at_header_intensity(tmp_path):
+    # the test file at half a sun, the instrument efficiency is twice P_MPP
+    with open(test_file, encoding='utf-8') as f:
+        content = f.read()
+    content = content.replace('Intensity [mW/cm²]\t100', 'Intensity [mW/cm²]\t50')
+    content = content.replace('FW\t21.5\t1.12\t78.1\t18.8\t18.8', 'FW\t21.5\t1.12\t78.1\t42.27\t21.14')
+    path = tmp_path / 'S1.half_sun.jv.txt'
+    path.write_text(content, encoding='utf-8')
+
+    jv_dict = get_jv_data(str(path))
+    assert jv_dict['intensity'] == 50.
+
+    logger = RecordingLogger()
+    computed, disagreements = validate_jv_parameters(jv_dict, logger)
+    np.testing.assert_allclose(computed['Efficiency'], 2 * computed['P_MPP'])
+    flagged = {(name, key) for name, key, _, _ in disagreements}
+    assert ('FW V_1', 'Efficiency') not in flagged
+    assert ('FW V_1', 'P_MPP') not in flagged
+    assert len(logger.warnings) == len(disagreements)
@@ -0,0 +1,35 @@
+import os.path
+
+import numpy as np
+
+from chose_parser.jv_parser import get_jv_data
+
+test_file = os.path.join(os.path.dirname(__file__), 'data', 'S1.test.jv.txt')
+
+
+def test_get_jv_data():
+    jv_dict = get_jv_data(test_file)
+
+    assert jv_dict['active_area'] == 0.16
+    assert jv_dict['J_sc'] == [21.5, 21.7]
+    assert jv_dict['U_MPP'] == [0.945, 0.966]
+    # inf and nan in the summary table are replaced by 0
+    assert jv_dict['Efficiency'] == [18.8, 0.]
+    assert jv_dict['R_par'] == [10512., 0.]
+
+    assert [curve['name'] for curve in jv_dict['jv_curve']] == ['FW V_1', 'RV V_2']
+    for curve in jv_dict['jv_curve']:
+        assert len(curve['voltage']) == 30
+        assert len(curve['current_density']) == 30
+    np.testing.assert_allclose(jv_dict['jv_curve'][0]['voltage'][[0, -1]], [-0.2, 1.2])
+
+
+def test_get_jv_data_curves_are_views():
+    jv_dict = get_jv_data(test_file)
+
+    # all curves are views into one float64 buffer of 30 points x 4 columns
+    buffer = jv_dict['jv_curve'][0]['voltage'].base
+    assert buffer.size == 30 * 4 and buffer.dtype == np.float64
+    for curve in jv_dict['jv_curve']:
+        assert curve['voltage'].base is buffer
+        assert curve['current_density'].base is buffer
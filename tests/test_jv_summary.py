@@ -0,0 +1,81 @@
+import os.path
+from types import SimpleNamespace
+
+import pytest
+
+from chose_parser.jv_parser import get_jv_data
+from chose_parser.jv_summary import (
+    SUMMARY_SUFFIX, get_batch_id, load_jv_records, load_jv_summary, measurement_record,
+    summarize, update_sample_summary, write_batch_summary, write_jv_record)
+
+test_file = os.path.join(os.path.dirname(__file__), 'data', 'S1.test.jv.txt')
+
+
+def raw_archive(directory):
+    def raw_file(path, mode='r'):
+        return open(os.path.join(directory, path), mode)
+    return SimpleNamespace(m_context=SimpleNamespace(
+        raw_file=raw_file, raw_path=lambda: directory,
+        raw_path_exists=lambda path: os.path.exists(os.path.join(directory, path))))
+
+
+def test_measurement_record():
+    record = measurement_record(get_jv_data(test_file))
+
+    assert record['curves'] == ['FW V_1', 'RV V_2']
+    assert record['Efficiency'] == [18.8, None]
+    assert record['hysteresis_index'] == [None]
+
+    record = measurement_record(get_jv_data(test_file), {'Efficiency': [0., 19.7], 'R_par': [0., 0.]})
+    assert record['Efficiency'] == [18.8, 19.7]
+    assert record['hysteresis_index'] == [pytest.approx((19.7 - 18.8) / 19.7)]
+
+
+def test_summarize():
+    records = [{'Efficiency': [18., None], 'R_ser': [20., 30.], 'hysteresis_index': [-0.1]},
+               {'Efficiency': [20., 19.], 'R_ser': [25.], 'hysteresis_index': [0.05]}]
+    for record in records:
+        for key in ('J_sc', 'V_oc', 'Fill_factor', 'P_MPP', 'J_MPP', 'U_MPP', 'R_par'):
+            record[key] = []
+
+    summary = summarize(records)
+    assert summary['Efficiency'] == {'n': 3, 'best': 20., 'median': 19., 'stdev': 1.}
+    assert summary['R_ser']['best'] == 20.
+    assert summary['hysteresis_index']['best'] == 0.05
+    assert summary['J_sc'] == {'n': 0, 'best': None, 'median': None, 'stdev': None}
+
+
+def test_jv_records(tmp_path):
+    archive = raw_archive(str(tmp_path))
+    record = measurement_record(get_jv_data(test_file))
+    assert get_batch_id('HZB_JS_1_3') == 'HZB_JS_1'
+
+    data_files = [
+        'HZB_JS_1_3.a.jv.txt', 'HZB_JS_1_3.b.jv.txt', 'HZB_JS_1_4.a.jv.txt', 'HZB_JS_2_1.a.jv.txt']
+    for data_file in data_files:
+        (tmp_path / data_file).write_text('')
+        write_jv_record(archive, data_file, data_file.split('.')[0], record)
+    # normalizing an entry again replaces its record
+    write_jv_record(archive, 'HZB_JS_1_4.a.jv.txt', 'HZB_JS_1_4', record)
+    # the record of a removed data file is left out
+    write_jv_record(archive, 'HZB_JS_1_4.removed.jv.txt', 'HZB_JS_1_4', record)
+
+    records = load_jv_records(archive)
+    assert len(records) == 4
+    assert len(load_jv_records(archive, search_id='HZB_JS_1_3')) == 2
+
+    for search_id in ('HZB_JS_1_3', 'HZB_JS_1_4', 'HZB_JS_2_1'):
+        update_sample_summary(archive, search_id)
+    sample = load_jv_summary(archive, 'HZB_JS_1_3')
+    assert sample['batch_id'] == 'HZB_JS_1'
+    assert sorted(sample['measurements']) == ['HZB_JS_1_3.a.jv.txt', 'HZB_JS_1_3.b.jv.txt']
+    assert sample['summary']['Efficiency']['n'] == 2
+
+    # the batch summary is built from the sample summaries, not from the records
+    write_batch_summary(archive, 'HZB_JS_1')
+    batch = load_jv_summary(archive, 'HZB_JS_1')
+    assert sorted(batch['samples']) == ['HZB_JS_1_3', 'HZB_JS_1_4']
+    assert batch['samples']['HZB_JS_1_4']['Efficiency']['n'] == 1
+    assert batch['summary']['Efficiency']['n'] == 3
+    assert (tmp_path / f'HZB_JS_1{SUMMARY_SUFFIX}').exists()
+    assert load_jv_summary(archive, 'HZB_JS_3') is None
@@ -0,0 +1,75 @@
+import io
+import os.path
+
+import numpy as np
+import pytest
+
+from chose_parser.downsampling import minmax_indices
+from chose_parser.mpp_parser import (
+    get_mpp_data, get_preview_resolutions, get_preview_series, read_mpp_data)
+
+test_file = os.path.join(os.path.dirname(__file__), 'data', 'test_Tracking.txt')
+
+
+def test_get_mpp_data():
+    header_dict, data = get_mpp_data(test_file)
+
+    assert header_dict['datetime'] == '2023-10-19 06:33 PM'
+    assert header_dict['start_voltage_manually'] == 'true'
+    assert header_dict['perturbation_frequency_[s]'] == 0.5
+    assert header_dict['sampling'] == 10
+    assert header_dict['last_vmpp_[v]'] == 0.95
+
+    assert list(data) == ['Time (hours) ', 'P (mWcm-2)', 'V (V)', 'J (mAcm-2)', 'PCE']
+    for column in data.values():
+        assert column.shape == (50,) and column.flags.c_contiguous
+    np.testing.assert_allclose(data['Time (hours) '][[0, -1]], [0, 49 * 0.5 / 3600], atol=1e-6)
+
+
+def test_read_mpp_data_rejects_other_files():
+    with open(test_file) as f:
+        lines = f.readlines()
+    lines[42] = 'Voltage\tCurrent\n'
+
+    with pytest.raises(ValueError):
+        read_mpp_data(io.StringIO(''.join(lines)))
+
+
+def test_read_mpp_data_chunks():
+    _, data = get_mpp_data(test_file)
+    with open(test_file) as f:
+        _, chunked = read_mpp_data(io.StringIO(f.read()), chunk_lines=7)
+
+    for name, column in data.items():
+        np.testing.assert_array_equal(chunked[name], column)
+
+
+def test_minmax_indices():
+    y = np.sin(np.linspace(0, 20, 100001))
+    y[5000] = 10
+    y[70000] = np.nan
+
+    indices = minmax_indices(y, 1000)
+    assert len(indices) <= 1002
+    assert np.all(np.diff(indices) > 0)
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    # extrema survive the decimation
+    assert 5000 in indices
+    assert np.nanmin(y[indices]) == np.nanmin(y)
+
+    np.testing.assert_array_equal(minmax_indices(y[:10], 1000), np.arange(10))
+
+
+def test_preview_resolutions():
+    # the default plot always has a preview, also for short tracks
+    assert get_preview_resolutions(50) == [1000]
+    assert get_preview_resolutions(5000) == [1000]
+    assert get_preview_resolutions(10000) == [1000]
+    assert get_preview_resolutions(20000) == [1000, 10000]
+
+
+def test_preview_series():
+    _, data = get_mpp_data(test_file)
+    np.testing.assert_array_equal(get_preview_series(data)['efficiency'], data['PCE'])
+    del data['PCE']
+    np.testing.assert_array_equal(get_preview_series(data)['efficiency'], data['P (mWcm-2)'])
@@ -0,0 +1,63 @@
+import os.path
+
+import numpy as np
+
+from chose_parser.jv_parser import get_jv_data
+from chose_parser.mpp_parser import get_mpp_data
+from chose_parser.parse_cache import (
+    ParseCache, pack_jv_dict, unpack_jv_dict, pack_mpp_data, unpack_mpp_data)
+
+data_dir = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def test_parse_cache_round_trip(tmp_path):
+    cache = ParseCache(str(tmp_path), max_bytes=1 << 20)
+    jv_dict = get_jv_data(os.path.join(data_dir, 'S1.test.jv.txt'))
+    header_dict, data = get_mpp_data(os.path.join(data_dir, 'test_Tracking.txt'))
+
+    assert cache.load('jv', 'digest') is None
+    cache.store('jv', 'digest', pack_jv_dict(jv_dict))
+    cache.store('mpp', 'digest', pack_mpp_data(header_dict, data))
+
+    cached = unpack_jv_dict(cache.load('jv', 'digest'))
+    assert cached.keys() == jv_dict.keys()
+    assert cached['J_sc'] == jv_dict['J_sc']
+    assert cached['active_area'] == jv_dict['active_area']
+    for curve, cached_curve in zip(jv_dict['jv_curve'], cached['jv_curve']):
+        assert curve['name'] == cached_curve['name']
+        np.testing.assert_array_equal(curve['voltage'], cached_curve['voltage'])
+        np.testing.assert_array_equal(curve['current_density'], cached_curve['current_density'])
+
+    cached_header, cached_data = unpack_mpp_data(cache.load('mpp', 'digest'))
+    assert cached_header == header_dict
+    assert list(cached_data) == list(data)
+    np.testing.assert_array_equal(cached_data['V (V)'], data['V (V)'])
+
+
+def test_parse_cache_eviction(tmp_path):
+    cache = ParseCache(str(tmp_path), max_bytes=3000)
+    arrays = {'data': np.zeros(100)}
+    for index in range(5):
+        cache.store('jv', str(index), arrays)
+        os.utime(cache._path('jv', str(index)), (index, index))
+
+    cache.store('jv', 'last', arrays)
+    assert cache.load('jv', '0') is None
+    assert cache.load('jv', 'last') is not None
+    assert sum(f.stat().st_size for f in tmp_path.iterdir()) <= 3000
+
+
+def test_parse_cache_scans_after_evict_interval(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path), max_bytes=1 << 20)
+    scans = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, 'evict', lambda: scans.append(1) or evict())
+
+    arrays = {'data': np.zeros(100)}
+    for index in range(10):
+        cache.store('jv', str(index), arrays)
+    # the first store scans, the next ones stay below the interval
+    assert len(scans) == 1
+
+    cache.store('jv', 'large', {'data': np.zeros(cache.evict_interval // 8)})
+    assert len(scans) == 2
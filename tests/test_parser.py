@@ -1,11 +1,65 @@
 import os.path
-from nomad.client import parse, normalize_all
+import shutil
 
-def test_parser():
-    test_file = os.path.join(os.path.dirname(__file__), 'data', 'test.example-format.txt')
-    entry_archive = parse(test_file)[0]
-    normalize_all(entry_archive)
+import pytest
 
-    assert entry_archive.data.pattern.tolist() == [
-        [1.0, 0.0, 1.0], [1.0, 1.0, 1.0], [1.0, 0.0, 1.0]
+pytest.importorskip('nomad')
+pytest.importorskip('baseclasses')
+
+from chose_parser import ChoseParser, create_entry  # noqa: E402
+from chose_parser.parser import create_entries  # noqa: E402
+from chose_parser.schema import Chose_JVmeasurement, Chose_MPPTracking  # noqa: E402
+
+data_dir = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def copy(tmp_path, source, name):
+    target = tmp_path / name
+    shutil.copy(os.path.join(data_dir, source), target)
+    return str(target)
+
+
+def test_is_mainfile(tmp_path):
+    parser = ChoseParser()
+    assert parser.is_mainfile(copy(tmp_path, 'S1.test.jv.txt', 'S1.test.jv.txt'), 'text/plain', b'', '')
+    other = tmp_path / 'S2.export.jv.txt'
+    other.write_text('\n'.join(f'{i}\t{i * 2}' for i in range(100)))
+    assert not parser.is_mainfile(str(other), 'text/plain', b'', '')
+
+
+def test_create_entry(tmp_path):
+    entry, search_id = create_entry(copy(tmp_path, 'S1.test.jv.txt', 'S1.test.jv.txt'))
+    assert isinstance(entry, Chose_JVmeasurement)
+    assert search_id == 'S1'
+    assert entry.name == 'S1 test'
+
+    # a tracking file named like a JV file is created as MPP tracking
+    entry, _ = create_entry(copy(tmp_path, 'test_Tracking.txt', 'S1.notes.jv.txt'))
+    assert isinstance(entry, Chose_MPPTracking)
+
+
+def test_create_entries(tmp_path):
+    groups = [
+        [copy(tmp_path, 'S1.test.jv.txt', 'S1.a.jv.txt'), copy(tmp_path, 'S1.test.jv.txt', 'S1.b.jv.txt')],
+        [copy(tmp_path, 'test_Tracking.txt', 'S2.a.jv.txt')],
+        [copy(tmp_path, 'S1.test.jv.txt', 'S3.a.jv.txt')],
     ]
+    serial = create_entries(groups, workers=1)
+    parallel = create_entries(groups, workers=2)
+    assert [entry.name for entry in parallel] == ['S1 a', 'S1 b', 'S2 a', 'S3 a']
+    assert [type(entry) for entry in parallel] == [type(entry) for entry in serial]
+    assert isinstance(parallel[2], Chose_MPPTracking)
+
+
+def test_parse_bulk_empty():
+    ChoseParser().parse_bulk([], {}, None)
+
+
+def test_parser_name():
+    import yaml
+
+    root = os.path.dirname(os.path.dirname(__file__))
+    with open(os.path.join(root, 'chose_parser', 'nomad_plugin.yaml')) as f:
+        plugin = yaml.safe_load(f)
+    # entries of the plugin store its name, the parser has to keep it
+    assert ChoseParser().name == plugin['name'] == 'parsers/chose_parser'
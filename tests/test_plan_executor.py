@@ -0,0 +1,119 @@
+import datetime
+import io
+import json
+from types import SimpleNamespace
+
+from chose_parser.plan_executor import MANIFEST_SUFFIX, execute_plan
+
+
+class DictContext:
+    def __init__(self):
+        self.files = {}
+        self.processed = []
+        self.allow_modify = {}
+
+    def raw_path_exists(self, path):
+        return path in self.files
+
+    def raw_file(self, path, mode='r'):
+        if 'w' in mode:
+            files = self.files
+
+            class File(io.BytesIO if 'b' in mode else io.StringIO):
+                def close(self):
+                    value = self.getvalue()
+                    files[path] = value if isinstance(value, bytes) else value.encode()
+                    super().close()
+            return File()
+        content = self.files[path]
+        return io.BytesIO(content) if 'b' in mode else io.StringIO(content.decode())
+
+    def process_updated_raw_file(self, path, allow_modify=False):
+        self.processed.append(path)
+        self.allow_modify[path] = allow_modify
+
+
+class Logger:
+    def info(self, *args, **kwargs):
+        pass
+
+    warning = info
+
+
+def create_archive(data, archive, file_name):
+    # the behaviour of baseclasses.helper.utilities.create_archive
+    if not archive.m_context.raw_path_exists(file_name):
+        with archive.m_context.raw_file(file_name, 'w') as f:
+            json.dump({'data': data}, f)
+        archive.m_context.process_updated_raw_file(file_name, allow_modify=False)
+
+
+def execute(plan, archive, sample_cls, batch_cls, logger):
+    # every run creates the sections at the current time, as execute_solar_sample_plan
+    now = datetime.datetime.now().isoformat()
+    samples = [f'{plan["lab_id"]}_{index}' for index in range(plan['number_of_substrates'])]
+    for sample in samples:
+        create_archive(
+            {'lab_id': sample, 'width': plan['width'], 'datetime': now}, archive, f'{sample}.archive.json')
+    create_archive(
+        {'lab_id': plan['lab_id'], 'entities': samples, 'datetime': now}, archive,
+        f'{plan["lab_id"]}.archive.json')
+
+
+def run(context, plan):
+    archive = SimpleNamespace(
+        m_context=context, metadata=SimpleNamespace(mainfile='plan.archive.yaml', upload_id='upload'))
+    return execute_plan(plan, archive, None, None, Logger(), execute=execute)
+
+
+def test_execute_plan():
+    context = DictContext()
+    plan = {'lab_id': 'B1', 'number_of_substrates': 3, 'width': 1}
+
+    result = run(context, plan)
+    assert result.new == ['B1_0.archive.json', 'B1_1.archive.json', 'B1_2.archive.json', 'B1.archive.json']
+    assert context.processed == result.new
+    assert 'plan.archive.yaml' + MANIFEST_SUFFIX in context.files
+
+    # an unchanged plan writes nothing
+    files = dict(context.files)
+    context.processed.clear()
+    result = run(context, plan)
+    assert len(result.unchanged) == 4
+    assert context.files == files
+    assert context.processed == []
+
+    # a changed plan replaces the archives it wrote, except edited ones
+    context.files['B1_0.archive.json'] = b'{"data": {"lab_id": "B1_0", "edited": true}}'
+    result = run(context, dict(plan, number_of_substrates=4, width=2))
+    assert result.kept == ['B1_0.archive.json']
+    assert result.changed == ['B1_1.archive.json', 'B1_2.archive.json', 'B1.archive.json']
+    assert result.new == ['B1_3.archive.json']
+    assert json.loads(context.files['B1_1.archive.json'])['data']['width'] == 2
+    assert b'edited' in context.files['B1_0.archive.json']
+    assert context.processed == ['B1_1.archive.json', 'B1_2.archive.json', 'B1_3.archive.json', 'B1.archive.json']
+    # the entries of replaced archives exist and are modified
+    assert context.allow_modify['B1_1.archive.json'] is True
+    assert context.allow_modify['B1_3.archive.json'] is False
+
+
+class Plan:
+    def __init__(self, **content):
+        self.content = content
+
+    def m_to_dict(self):
+        return self.content
+
+
+def test_plan_fingerprint():
+    from chose_parser.plan_executor import plan_fingerprint
+
+    plan = dict(
+        lab_id='B1', number_of_substrates=4, standard_plan='../upload/archive/abc#data',
+        solar_cell_properties={'substrate': 'glass'}, plan=[{'name': 'Cleaning'}],
+        description='first')
+    fingerprint = plan_fingerprint(Plan(**plan))
+    assert plan_fingerprint(Plan(**dict(plan, description='second'))) == fingerprint
+    assert plan_fingerprint(Plan(**dict(plan, plan=[{'name': 'Cleaning'}, {'name': 'Evaporation'}]))) != fingerprint
+    assert plan_fingerprint(Plan(**dict(plan, solar_cell_properties={'substrate': 'ITO'}))) != fingerprint
+    assert plan_fingerprint(Plan(**dict(plan, standard_plan=None))) != fingerprint
@@ -0,0 +1,72 @@
+import datetime
+import os.path
+from types import SimpleNamespace
+
+from chose_parser.process_history import (
+    HISTORY_SUFFIX, load_process_history, update_process_history)
+
+
+class Context:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def raw_file(self, path, mode='r'):
+        return open(os.path.join(self.directory, path), mode)
+
+    def raw_path_exists(self, path):
+        return os.path.exists(os.path.join(self.directory, path))
+
+    def process_updated_raw_file(self, path, allow_modify=False):
+        raise AssertionError('the samples read the history on demand')
+
+
+def make_archive(context, entry_id, mainfile):
+    path = os.path.join(context.directory, mainfile)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'a').close()
+    return SimpleNamespace(
+        metadata=SimpleNamespace(entry_id=entry_id, upload_id='upload', mainfile=mainfile),
+        m_context=context)
+
+
+def make_process(entry_type, name, day, samples, position=None):
+    return SimpleNamespace(
+        m_def=SimpleNamespace(name=entry_type), name=name,
+        datetime=datetime.datetime(2023, 10, day), position_in_experimental_plan=position,
+        samples=[SimpleNamespace(lab_id=lab_id) for lab_id in samples])
+
+
+def test_process_history(tmp_path):
+    context = Context(str(tmp_path))
+    processes = [
+        ('evaporation', make_process('Chose_Evaporation', 'Au', 5, ['B1_1'], position=3)),
+        ('spin', make_process('Chose_SpinCoating', 'Perovskite', 2, ['B1_1', 'B1_2'], position=2)),
+        ('cleaning', make_process('Chose_Cleaning', 'Cleaning', 1, ['B1_1', 'B1_2'], position=1)),
+        ('storage', make_process('Chose_Storage', 'Glovebox', 9, ['B1_1'])),
+    ]
+    # the processes are in other folders than the samples
+    for entry_id, process in processes:
+        update_process_history(
+            process, make_archive(context, entry_id, f'{entry_id}/{entry_id}.archive.json'))
+
+    # normalizing a process again replaces its record
+    processes[1][1].name = 'Perovskite 2'
+    spin = make_archive(context, 'spin', 'spin/spin.archive.json')
+    update_process_history(processes[1][1], spin)
+    update_process_history(processes[1][1], spin)
+
+    sample = make_archive(context, 'B1_1', 'samples/B1_1.archive.json')
+    history = load_process_history(sample, 'B1_1')
+    assert [record['entry_id'] for record in history] == ['cleaning', 'spin', 'evaporation', 'storage']
+    assert history[1]['name'] == 'Perovskite 2'
+    assert history[1]['entry_type'] == 'Chose_SpinCoating'
+    assert history[0]['datetime'] == '2023-10-01T00:00:00'
+
+    assert [record['entry_id'] for record in load_process_history(sample, 'B1_2')] == ['cleaning', 'spin']
+    assert load_process_history(sample, 'B1_3') == []
+    assert (tmp_path / f'B1_1{HISTORY_SUFFIX}').exists()
+
+    # deleted processes are dropped
+    os.remove(tmp_path / 'evaporation' / 'evaporation.archive.json')
+    history = load_process_history(sample, 'B1_1')
+    assert [record['entry_id'] for record in history] == ['cleaning', 'spin', 'storage']
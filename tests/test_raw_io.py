@@ -0,0 +1,78 @@
+import mmap
+import os.path
+from types import SimpleNamespace
+
+import numpy as np
+
+from chose_parser import raw_io
+from chose_parser.encoding import open_raw_text
+from chose_parser.mpp_parser import get_mpp_data, read_mpp_data
+from chose_parser.raw_io import RawFilePrefetcher, read_raw_file
+
+data_dir = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def raw_archive(directory, opened):
+    def raw_file(path, mode='r'):
+        opened.append(path)
+        return open(os.path.join(directory, path), mode)
+    return SimpleNamespace(
+        metadata=SimpleNamespace(upload_id='upload'),
+        m_context=SimpleNamespace(raw_file=raw_file, raw_path=lambda: directory))
+
+
+def test_read_raw_file_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(raw_io, 'MMAP_MIN_BYTES', 1024)
+    with open(os.path.join(data_dir, 'test_Tracking.txt'), 'rb') as f:
+        (tmp_path / 'test_Tracking.txt').write_bytes(f.read())
+    opened = []
+    archive = raw_archive(str(tmp_path), opened)
+
+    with read_raw_file(archive, 'test_Tracking.txt') as raw:
+        assert isinstance(raw.data, mmap.mmap)
+        with open_raw_text(raw, 'upload', 'test_Tracking.txt') as f:
+            header_dict, data = read_mpp_data(f, size_hint=len(raw))
+    assert opened == ['test_Tracking.txt']
+
+    expected_header, expected = get_mpp_data(os.path.join(data_dir, 'test_Tracking.txt'))
+    assert header_dict == expected_header
+    for name in expected:
+        np.testing.assert_array_equal(data[name], expected[name])
+
+
+def test_prefetch_siblings(tmp_path):
+    for name in ['S1.a.jv.txt', 'S2.a.jv.txt', 'S3.a.jv.txt', 'S4.a.jv.txt', 'S2.a.pl.txt']:
+        (tmp_path / name).write_bytes(name.encode())
+    opened = []
+    archive = raw_archive(str(tmp_path), opened)
+    prefetcher = RawFilePrefetcher(depth=2)
+
+    assert prefetcher.siblings(archive, 'S1.a.jv.txt') == ['S2.a.jv.txt', 'S3.a.jv.txt']
+    prefetcher.schedule(archive, 'S1.a.jv.txt')
+    assert prefetcher.take(archive, 'S2.a.jv.txt') == b'S2.a.jv.txt'
+    assert prefetcher.take(archive, 'S2.a.jv.txt') is None
+    assert prefetcher.take(archive, 'S3.a.jv.txt') == b'S3.a.jv.txt'
+    assert sorted(opened) == ['S2.a.jv.txt', 'S3.a.jv.txt']
+
+    # a file that changed after it was read ahead is read again
+    prefetcher.schedule(archive, 'S2.a.jv.txt')
+    prefetcher._futures[('upload', 'S4.a.jv.txt')].result()
+    (tmp_path / 'S4.a.jv.txt').write_bytes(b'changed')
+    assert prefetcher.take(archive, 'S4.a.jv.txt') is None
+
+
+def test_prefetch_releases_mappings(tmp_path, monkeypatch):
+    monkeypatch.setattr(raw_io, 'MMAP_MIN_BYTES', 1024)
+    (tmp_path / 'S1.a.jv.txt').write_bytes(b'x' * 4096)
+    mappings = []
+    read = raw_io._read
+
+    def _read(archive, path):
+        data = read(archive, path)
+        mappings.append(data)
+        return data
+
+    monkeypatch.setattr(raw_io, '_read', _read)
+    signature, data = RawFilePrefetcher._prefetch(raw_archive(str(tmp_path), []), 'S1.a.jv.txt')
+    assert data == b'x' * 4096 and signature[0] == 4096
+    assert isinstance(mappings[0], mmap.mmap) and mappings[0].closed
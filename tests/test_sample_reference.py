@@ -0,0 +1,49 @@
+from chose_parser import sample_reference
+from chose_parser.sample_reference import SampleReferenceCache
+
+
+def test_sample_reference_cache(monkeypatch):
+    requests = []
+
+    def search_lab_ids(archive, search_ids):
+        requests.append(list(search_ids))
+        return {search_id: [{'entry_id': search_id}] for search_id in search_ids}
+
+    monkeypatch.setattr(sample_reference, 'search_lab_ids', search_lab_ids)
+
+    cache = SampleReferenceCache(max_size=2)
+    cache.prefetch(None, ['S2', 'S1', 'S1'])
+    assert requests == [['S1', 'S2']]
+
+    cache.resolve(None, 'S1')
+    cache.resolve(None, 'S2')
+    cache.resolve(None, 'S3')
+    assert requests[1:] == [['S3']]
+    assert cache.stats() == dict(hits=2, misses=1, size=2)
+
+    # S1 was the least recently used id
+    cache.resolve(None, 'S1')
+    assert requests[2:] == [['S1']]
+
+    cache.ttl = -1
+    cache.resolve(None, 'S1')
+    assert cache.misses == 3
+
+
+def test_misses_expire_earlier(monkeypatch):
+    requests = []
+
+    def search_lab_ids(archive, search_ids):
+        requests.append(list(search_ids))
+        return {
+            search_id: [{'entry_id': search_id}] if search_id == 'S1' else []
+            for search_id in search_ids}
+
+    monkeypatch.setattr(sample_reference, 'search_lab_ids', search_lab_ids)
+
+    cache = SampleReferenceCache(miss_ttl=-1)
+    cache.prefetch(None, ['S1', 'S2'])
+    cache.resolve(None, 'S1')
+    # S2 had no hits, it is searched again
+    cache.resolve(None, 'S2')
+    assert requests == [['S1', 'S2'], ['S2']]
@@ -0,0 +1,37 @@
+import ast
+import os.path
+
+from chose_parser.schema_layout import (
+    ELN_LAYOUTS, HIDE_PROCESS, ORDER_PROCESS, TEMPLATE_CHOSE, eln_annotations)
+
+schema_file = os.path.join(os.path.dirname(__file__), '..', 'chose_parser', 'schema.py')
+
+
+def test_eln_annotations():
+    assert eln_annotations('Chose_Cleaning') == dict(
+        a_eln=dict(hide=HIDE_PROCESS, properties=dict(order=ORDER_PROCESS)))
+
+    annotations = eln_annotations('Chose_Sample', label_quantity='sample_id')
+    assert annotations['a_template'] == TEMPLATE_CHOSE
+    assert annotations['label_quantity'] == 'sample_id'
+    assert 'properties' not in eln_annotations('ChoseSolutionChemical')['a_eln']
+
+    # the shared lists are not changed through the annotations of one section
+    annotations = eln_annotations('Chose_Sample')
+    annotations['a_eln']['hide'].append('lab_id')
+    annotations['a_template']['institute'] = 'other'
+    assert 'lab_id' not in eln_annotations('Chose_BasicSample')['a_eln']['hide']
+    assert TEMPLATE_CHOSE == dict(institute='HZB_Chose')
+
+
+def test_every_section_has_a_layout():
+    with open(schema_file) as f:
+        tree = ast.parse(f.read())
+    names = [
+        node.args[0].value for node in ast.walk(tree)
+        if isinstance(node, ast.Call) and getattr(node.func, 'id', None) == 'eln_annotations']
+    classes = {node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)}
+
+    assert len(names) == len(set(names)) == len(ELN_LAYOUTS)
+    assert set(names) == set(ELN_LAYOUTS)
+    assert set(names) <= classes
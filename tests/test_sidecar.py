@@ -0,0 +1,32 @@
+import numpy as np
+
+from chose_parser.sidecar import load_arrays, pack_arrays, storage_dtype, unpack_arrays
+
+
+def test_storage_dtype():
+    assert storage_dtype(np.linspace(0, 1, 100)) == np.float32
+    # a time axis in hours with 0.5 s steps over 2000 h needs double precision
+    assert storage_dtype(2000 + np.arange(100) * 0.5 / 3600) == np.float64
+    assert storage_dtype(np.array([1e300])) == np.float64
+    assert storage_dtype(np.array([1.5, np.nan])) == np.float32
+    assert storage_dtype(np.arange(3)) == np.arange(3).dtype
+
+
+def test_sidecar_round_trip(tmp_path):
+    arrays = {
+        'time': 2000 + np.arange(1000) * 0.5 / 3600,
+        'voltage': np.random.default_rng(0).normal(1, 0.1, 1000),
+        'intensity': np.ones((3, 7), dtype=np.float32),
+    }
+    buffer, layout = pack_arrays(arrays)
+    assert [item['dtype'] for item in layout] == ['<f8', '<f4', '<f4']
+    assert all(item['offset'] % 64 == 0 for item in layout)
+
+    np.save(tmp_path / 'S1.jv.txt.arrays.npy', buffer)
+    loaded = load_arrays(str(tmp_path / 'S1.jv.txt.arrays.npy'), layout)
+    assert isinstance(loaded['time'].base, np.memmap) or isinstance(loaded['time'], np.memmap)
+    np.testing.assert_array_equal(loaded['time'], arrays['time'])
+    np.testing.assert_allclose(loaded['voltage'], arrays['voltage'], rtol=1e-7)
+    assert loaded['intensity'].shape == (3, 7)
+
+    assert unpack_arrays(buffer, layout).keys() == arrays.keys()
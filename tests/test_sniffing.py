@@ -0,0 +1,72 @@
+import gzip
+import os.path
+import shutil
+
+import pytest
+
+from chose_parser.sniffing import SNIFF_SIZE, sniff_file, sniff_measurement_type
+
+data_dir = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def copy(tmp_path, source, name):
+    target = tmp_path / name
+    shutil.copy(os.path.join(data_dir, source), target)
+    return str(target)
+
+
+def test_sniff_file(tmp_path):
+    assert sniff_file(copy(tmp_path, 'S1.test.jv.txt', 'S1.a.jv.txt')) == 'jv'
+    # a tracking file named like a JV file is reclassified
+    assert sniff_file(copy(tmp_path, 'test_Tracking.txt', 'S1.a.jv.txt')) == 'mpp'
+    assert sniff_file(copy(tmp_path, 'test_Tracking.txt', 'S1.a.pl.txt')) == 'mpp'
+
+    other = tmp_path / 'S2.export.jv.txt'
+    other.write_text('\n'.join(f'{i}\t{i * 2}' for i in range(100)))
+    assert sniff_file(str(other)) is None
+    # types without a signature accept a numeric table
+    other.rename(tmp_path / 'S2.export.pl.txt')
+    assert sniff_file(str(tmp_path / 'S2.export.pl.txt')) == 'pl'
+    assert sniff_file(copy(tmp_path, 'S1.test.eqe.txt', 'S1.a.eqe.txt')) == 'eqe'
+    assert sniff_file(copy(tmp_path, 'S1.test.eqe.txt', 'S1.a.uvvis.txt')) == 'uvvis'
+
+    text = tmp_path / 'S2.notes.uvvis.txt'
+    text.write_text('exported by another tool\nno data\n')
+    assert sniff_file(str(text)) is None
+    # types without any check accept any text
+    text.rename(tmp_path / 'S2.notes.spv.txt')
+    assert sniff_file(str(tmp_path / 'S2.notes.spv.txt')) == 'spv'
+
+
+def test_sniff_compressed_file(tmp_path):
+    with open(os.path.join(data_dir, 'S1.test.jv.txt'), 'rb') as f:
+        content = f.read()
+    with gzip.open(tmp_path / 'S1.a.jv.gz', 'wb') as f:
+        f.write(content)
+    assert sniff_file(str(tmp_path / 'S1.a.jv.gz')) == 'jv'
+
+
+@pytest.mark.parametrize('prefix, expected', [
+    (b'\x00\x01\x02binary' * 10, None),
+    ('a\tb\n1\t2\n3\t4\n'.encode('utf-16'), 'pl'),
+    (b'header line\n' * 10, None),
+    (b'header line\n1 2\nfooter\n', None),
+    (b'wavelength\tspectrum\n400 1\n401 2\n', 'pl'),
+])
+def test_sniff_measurement_type(prefix, expected):
+    assert sniff_measurement_type('pl', prefix) == expected
+
+
+def test_sniff_long_header_is_undecided():
+    # the signature line or the table is beyond the prefix, the name decides
+    prefix = (b'x' * 500 + b'\n') * (SNIFF_SIZE // 501 + 1)
+    assert sniff_measurement_type('jv', prefix[:SNIFF_SIZE]) == 'jv'
+    assert sniff_measurement_type('uvvis', prefix[:SNIFF_SIZE]) == 'uvvis'
+
+
+def test_sniff_short_file_is_rejected(tmp_path):
+    # a complete file that ends before the signature line does not match
+    short = tmp_path / 'S3.short.jv.txt'
+    short.write_text('Chose JV measurement\nSample\tS3\n')
+    assert sniff_file(str(short)) is None
+    assert sniff_measurement_type('jv', b'Chose JV measurement\n') is None
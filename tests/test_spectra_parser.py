@@ -0,0 +1,67 @@
+import io
+
+import numpy as np
+
+from chose_parser.spectra_parser import (
+    combine_spectra, get_grid, get_spectra_previews, read_spectra, resample_spectra)
+
+content = '''Chose spectra export
+Integration time [ms]\t100
+Wavelength (nm)\tSpectrum 1\tSpectrum 2\tSpectrum 3
+''' + ''.join(f'{800 - 2 * i}\t{i}\t{2 * i}\t{3 * i}\n' for i in range(50))
+
+
+def test_read_spectra():
+    spectra = read_spectra(io.StringIO(content), chunk_lines=7)
+
+    assert spectra['header'] == ['Chose spectra export', 'Integration time [ms]\t100']
+    assert spectra['names'] == ['Spectrum 1', 'Spectrum 2', 'Spectrum 3']
+    # sorted by ascending wavelength
+    np.testing.assert_array_equal(spectra['wavelength'], np.arange(702, 801, 2))
+    intensity = spectra['intensity']
+    assert intensity.shape == (3, 50) and intensity.dtype == np.float32
+    assert intensity.flags.c_contiguous
+    np.testing.assert_array_equal(intensity[1], 2 * np.arange(49, -1, -1))
+
+
+def test_resample_spectra():
+    spectra = read_spectra(io.StringIO(content))
+    grid = get_grid(700., 801., 1.)
+    assert get_grid(None, 801., 1.) is None
+
+    resampled = resample_spectra(spectra['wavelength'], spectra['intensity'], grid)
+    assert resampled.shape == (3, grid.size)
+    assert np.isnan(resampled[:, :2]).all() and np.isnan(resampled[:, -1]).all()
+    # the intensity decreases by 1 per 2 nm in the first spectrum
+    np.testing.assert_allclose(resampled[0, grid == 703.], 48.5)
+
+
+def test_combine_spectra():
+    first = read_spectra(io.StringIO(content))
+    second = read_spectra(io.StringIO(content.replace('\n800\t', '\n801\t')))
+    names, wavelength, intensity = combine_spectra([first, first])
+    assert len(names) == 6 and intensity.shape == (6, 50)
+
+    # the second file is resampled onto the axis of the first one
+    names, wavelength, intensity = combine_spectra([first, second])
+    np.testing.assert_array_equal(wavelength, first['wavelength'])
+    assert intensity.shape == (6, 50)
+
+
+def test_spectra_previews():
+    wavelength = np.linspace(400., 800., 2001)
+    intensity = np.tile(np.sin(wavelength / 20), (100, 1)).astype(np.float32)
+    intensity[:, :10] = np.nan
+    names = [f'Spectrum {index}' for index in range(100)]
+
+    previews = get_spectra_previews(names, wavelength, intensity, resolution=200, max_previews=5)
+    assert [name for name, _, _ in previews] == [
+        'Spectrum 0', 'Spectrum 25', 'Spectrum 50', 'Spectrum 74', 'Spectrum 99']
+    _, x, y = previews[0]
+    assert len(x) == len(y) <= 202
+    # resampled points outside of the measured range are left out
+    assert x[0] == wavelength[10] and not np.isnan(y).any()
+    assert y.max() == np.nanmax(intensity[0])
+
+    assert len(get_spectra_previews(names[:2], wavelength, intensity[:2])) == 2
+    assert get_spectra_previews([], wavelength, intensity[:0]) == []
@@ -0,0 +1,57 @@
+import pytest
+
+pytest.importorskip('nomad')
+pytest.importorskip('baseclasses')
+
+from nomad.datamodel import EntryArchive, EntryMetadata  # noqa: E402
+from nomad.datamodel.context import ClientContext  # noqa: E402
+from nomad.utils import get_logger  # noqa: E402
+
+from chose_parser import config  # noqa: E402
+from chose_parser.schema import Chose_PLmeasurement, Chose_UVvismeasurement  # noqa: E402
+
+content = 'Chose spectra export\nWavelength (nm)\tSpectrum 1\tSpectrum 2\n' + ''.join(
+    f'{800 - 2 * i}\t{i}\t{2 * i}\n' for i in range(50))
+
+
+def normalize(tmp_path, entry, mainfile):
+    archive = EntryArchive(
+        metadata=EntryMetadata(upload_id='upload', mainfile=mainfile),
+        m_context=ClientContext(local_dir=str(tmp_path)))
+    archive.data = entry
+    entry.normalize(archive, get_logger(__name__))
+    return entry
+
+
+def test_pl_spectra_only(tmp_path):
+    (tmp_path / 'S1.a.pl.txt').write_text(content)
+    entry = normalize(tmp_path, Chose_PLmeasurement(data_file='S1.a.pl.txt'), 'S1.a.pl.txt')
+
+    assert entry.spectra.intensity.shape == (2, 50)
+    assert [preview.name for preview in entry.spectra.previews] == ['Spectrum 1', 'Spectrum 2']
+    # the baseclasses do not store the spectra a second time
+    assert entry.data is None
+    assert entry.data_file == 'S1.a.pl.txt'
+
+
+def test_uvvis_spectra_only(tmp_path):
+    data_files = ['S1.a.uvvis.txt', 'S1.b.uvvis.txt']
+    for data_file in data_files:
+        (tmp_path / data_file).write_text(content)
+    entry = normalize(tmp_path, Chose_UVvismeasurement(data_file=data_files), data_files[0])
+
+    assert entry.spectra.intensity.shape == (4, 50)
+    assert not entry.measurements
+    assert list(entry.data_file) == data_files
+
+
+def test_pl_previews_with_array_sidecar(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'array_sidecar', True)
+    (tmp_path / 'S1.a.pl.txt').write_text(content)
+    entry = normalize(tmp_path, Chose_PLmeasurement(data_file='S1.a.pl.txt'), 'S1.a.pl.txt')
+
+    # the matrix is in the sidecar, the default plot still has data
+    assert entry.spectra.intensity is None
+    assert entry.array_sidecar is not None
+    assert len(entry.spectra.previews) == 2
+    assert entry.spectra.previews[1].intensity.shape == (50,)